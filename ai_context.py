@@ -21,7 +21,7 @@ CONTEXT = """
 - `url` (URL): endpoint that receives POST requests
 - `events` (JSON list): list of event names to subscribe to (e.g. `["sale.created", "customer.updated"]`)
 - `is_active` (bool, default True): enables/disables delivery
-- `secret` (str): HMAC signing secret for verifying payload authenticity
+- `secret` (str): HMAC signing secret; when set, each POST carries `X-Webhook-Timestamp` and `X-Webhook-Signature: sha256=<hex HMAC-SHA256 of "<timestamp>.<body>">`
 - `last_triggered_at` (datetime, nullable): last successful delivery
 - `failure_count` (int, default 0): consecutive delivery failures; high count may indicate endpoint issues
 
@@ -1,37 +1,115 @@
-"""AI tools for the API Connect module."""
+"""AI tools for the API Connect module.
+
+List tools only see the session's hub, select just the fields they return and
+page by cursor, so one call is a single bounded query whatever the data size.
+"""
+from datetime import date
+from uuid import UUID
+
 from assistant.tools import AssistantTool, register_tool
 
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+PAGE_PROPERTIES = {
+    "limit": {"type": "integer", "minimum": 1, "maximum": MAX_LIMIT, "description": f"Results per page (default {DEFAULT_LIMIT})"},
+    "cursor": {"type": "string", "description": "next_cursor from the previous page"},
+}
+
+
+def _limit(args):
+    try:
+        return min(max(int(args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except (TypeError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def _jsonable(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _page(qs, fields, args):
+    """``(rows, next_cursor)`` for one page of ``qs`` by name, with only ``fields`` selected."""
+    from api_connect.pagination import paginate_keyset
+    page = paginate_keyset(qs.values(*fields), ['name', 'id'], args.get('cursor'), _limit(args), descending=False)
+    return [{f: _jsonable(row[f]) for f in fields} for row in page], page.next_cursor
+
+
+def _named(qs, args):
+    from api_connect.search import search
+    name = (args.get('name') or '').strip()
+    return search(qs, name, ['name'])[0] if name else qs
+
 
 @register_tool
 class ListAPIKeys(AssistantTool):
     name = "list_api_keys"
-    description = "List API keys."
+    description = "List the hub's API keys, a page at a time. Pass next_cursor back as cursor for the next page."
     module_id = "api_connect"
     required_permission = "api_connect.view_apikey"
-    parameters = {"type": "object", "properties": {"is_active": {"type": "boolean"}}, "required": [], "additionalProperties": False}
+    parameters = {
+        "type": "object",
+        "properties": {
+            "is_active": {"type": "boolean"},
+            "name": {"type": "string", "description": "Only keys whose name contains this text"},
+            **PAGE_PROPERTIES,
+        },
+        "required": [],
+        "additionalProperties": False,
+    }
 
     def execute(self, args, request):
         from api_connect.models import APIKey
-        qs = APIKey.objects.all()
+        qs = APIKey.objects.filter(hub_id=request.session.get('hub_id'), is_deleted=False)
         if 'is_active' in args:
             qs = qs.filter(is_active=args['is_active'])
-        return {"keys": [{"id": str(k.id), "name": k.name, "key_prefix": k.key_prefix, "is_active": k.is_active, "expires_at": k.expires_at.isoformat() if k.expires_at else None, "last_used_at": k.last_used_at.isoformat() if k.last_used_at else None} for k in qs]}
+        keys, next_cursor = _page(
+            _named(qs, args), ['id', 'name', 'key_prefix', 'is_active', 'expires_at', 'last_used_at'], args,
+        )
+        return {"keys": keys, "next_cursor": next_cursor}
 
 
 @register_tool
 class ListWebhooks(AssistantTool):
     name = "list_webhooks"
-    description = "List configured webhooks."
+    description = "List the hub's webhooks, a page at a time. Pass next_cursor back as cursor for the next page."
     module_id = "api_connect"
     required_permission = "api_connect.view_webhook"
-    parameters = {"type": "object", "properties": {"is_active": {"type": "boolean"}}, "required": [], "additionalProperties": False}
+    parameters = {
+        "type": "object",
+        "properties": {
+            "is_active": {"type": "boolean"},
+            "name": {"type": "string", "description": "Only webhooks whose name contains this text"},
+            "event": {"type": "string", "description": "Only active webhooks that receive this event, e.g. sale.created"},
+            "failing": {"type": "boolean", "description": "Only webhooks with failed deliveries or a tripped circuit"},
+            **PAGE_PROPERTIES,
+        },
+        "required": [],
+        "additionalProperties": False,
+    }
 
     def execute(self, args, request):
-        from api_connect.models import Webhook
-        qs = Webhook.objects.all()
+        from django.db.models import Q
+        from api_connect.models import Webhook, WebhookSubscription
+        from api_connect.routing import event_patterns
+        hub_id = request.session.get('hub_id')
+        qs = Webhook.objects.filter(hub_id=hub_id, is_deleted=False)
         if 'is_active' in args:
             qs = qs.filter(is_active=args['is_active'])
-        return {"webhooks": [{"id": str(w.id), "name": w.name, "url": w.url, "events": w.events, "is_active": w.is_active, "failure_count": w.failure_count} for w in qs]}
+        if args.get('event'):
+            qs = qs.filter(id__in=WebhookSubscription.objects.filter(
+                hub_id=hub_id, event__in=event_patterns(args['event']),
+            ).values('webhook_id'))
+        if args.get('failing'):
+            qs = qs.filter(Q(failure_count__gt=0) | ~Q(circuit_state='closed'))
+        webhooks, next_cursor = _page(
+            _named(qs, args), ['id', 'name', 'url', 'events', 'is_active', 'failure_count', 'circuit_state'], args,
+        )
+        return {"webhooks": webhooks, "next_cursor": next_cursor}
 
 
 @register_tool
@@ -50,5 +128,7 @@ class CreateWebhook(AssistantTool):
 
     def execute(self, args, request):
         from api_connect.models import Webhook
-        w = Webhook.objects.create(name=args['name'], url=args['url'], events=args['events'])
+        w = Webhook.objects.create(
+            hub_id=request.session.get('hub_id'), name=args['name'], url=args['url'], events=args['events'],
+        )
         return {"id": str(w.id), "name": w.name, "created": True}
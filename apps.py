@@ -9,4 +9,4 @@ class ApiConnectConfig(AppConfig):
     verbose_name = _('API & Webhooks')
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401  (connects receivers)
@@ -0,0 +1,205 @@
+"""
+API key authentication.
+
+Incoming keys are looked up by their indexed ``key_prefix`` and verified
+against ``key_hash`` with Django's password hashers (constant-time compare,
+slow by design). Successful verifications are kept in a bounded LRU cache
+with a TTL, so the expensive hash runs once per key per window instead of
+once per request. Views that change a key call ``invalidate_api_keys()``.
+
+The snapshot also carries the key's rate limits, so the middleware can
+enforce them (see ``ratelimit``) without touching the database.
+"""
+import hashlib
+import math
+import secrets
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .models import APIKey
+from .ratelimit import get_rate_limiter
+from .usage import usage_meter, usage_recorder
+
+KEY_PREFIX = 'erp_'
+# The whole key_prefix column: 'erp_' plus 6 random characters.
+KEY_PREFIX_LENGTH = 10
+# Prefix length of keys generated before it took the whole column.
+LEGACY_KEY_PREFIX_LENGTH = 8
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 60
+
+
+def generate_api_key():
+    """Return ``(raw_key, key_prefix, key_hash)`` for a new key."""
+    raw_key = KEY_PREFIX + secrets.token_urlsafe(32)
+    return raw_key, raw_key[:KEY_PREFIX_LENGTH], make_password(raw_key)
+
+
+class AuthenticatedKey:
+    """Snapshot of a verified ``APIKey``, safe to share between requests."""
+    __slots__ = ('id', 'hub_id', 'name', 'expires_at', 'rate_limit', 'rate_limit_burst')
+
+    def __init__(self, id, hub_id, name, expires_at, rate_limit=0, rate_limit_burst=0):
+        self.id = id
+        self.hub_id = hub_id
+        self.name = name
+        self.expires_at = expires_at
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+
+    @classmethod
+    def from_model(cls, api_key):
+        return cls(
+            api_key.id, api_key.hub_id, api_key.name, api_key.expires_at,
+            api_key.rate_limit_per_second, api_key.rate_limit_burst,
+        )
+
+    def is_expired(self, now=None):
+        return self.expires_at is not None and self.expires_at <= (now or timezone.now())
+
+
+class VerifiedKeyCache:
+    """Thread-safe LRU of verified keys, indexed by a digest of the raw key.
+
+    The raw key itself is never stored; entries expire after ``ttl`` seconds
+    so changes made by other processes are picked up within one window.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # digest -> (AuthenticatedKey, deadline)
+        self._by_key_id = {}  # str(key id) -> set of digests
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(raw_key):
+        return hashlib.sha256(raw_key.encode()).digest()
+
+    def get(self, raw_key):
+        digest = self.digest(raw_key)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            if entry[1] <= monotonic():
+                self._discard(digest)
+                return None
+            self._entries.move_to_end(digest)
+            return entry[0]
+
+    def set(self, raw_key, key):
+        digest = self.digest(raw_key)
+        with self._lock:
+            self._discard(digest)
+            self._entries[digest] = (key, monotonic() + self.ttl)
+            self._by_key_id.setdefault(str(key.id), set()).add(digest)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, key_id):
+        with self._lock:
+            for digest in self._by_key_id.pop(str(key_id), ()):
+                self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_key_id.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, digest):
+        entry = self._entries.pop(digest, None)
+        if entry is not None:
+            key_id = str(entry[0].id)
+            digests = self._by_key_id.get(key_id)
+            if digests is not None:
+                digests.discard(digest)
+                if not digests:
+                    del self._by_key_id[key_id]
+
+
+verified_keys = VerifiedKeyCache(
+    maxsize=getattr(settings, 'API_CONNECT_AUTH_CACHE_SIZE', DEFAULT_CACHE_SIZE),
+    ttl=getattr(settings, 'API_CONNECT_AUTH_CACHE_TTL', DEFAULT_CACHE_TTL),
+)
+
+
+def invalidate_api_keys(key_ids):
+    """Drop cached verifications for ``key_ids`` after they were changed."""
+    for key_id in key_ids:
+        verified_keys.invalidate(key_id)
+
+
+def authenticate_api_key(raw_key):
+    """Return an ``AuthenticatedKey`` for ``raw_key`` or ``None`` if invalid."""
+    if not raw_key or len(raw_key) <= KEY_PREFIX_LENGTH:
+        return None
+    now = timezone.now()
+    cached = verified_keys.get(raw_key)
+    if cached is not None:
+        return None if cached.is_expired(now) else cached
+
+    # The prefix is shown in the UI and is not secret, so short-circuiting
+    # on an unknown prefix leaks nothing an operator couldn't already see.
+    prefixes = {raw_key[:KEY_PREFIX_LENGTH], raw_key[:LEGACY_KEY_PREFIX_LENGTH]}
+    candidates = APIKey.objects.filter(
+        key_prefix__in=prefixes, is_active=True, is_deleted=False,
+    ).only('id', 'hub_id', 'name', 'key_hash', 'expires_at', 'rate_limit_per_second', 'rate_limit_burst')
+    for api_key in candidates:
+        if check_password(raw_key, api_key.key_hash):
+            key = AuthenticatedKey.from_model(api_key)
+            if key.is_expired(now):
+                return None
+            verified_keys.set(raw_key, key)
+            return key
+    return None
+
+
+def get_raw_key(request):
+    """Extract the key from ``Authorization: Bearer`` or ``X-API-Key``."""
+    auth = request.headers.get('Authorization', '')
+    if auth[:7].lower() == 'bearer ':
+        return auth[7:].strip()
+    return request.headers.get('X-API-Key', '').strip()
+
+
+class APIKeyAuthenticationMiddleware:
+    """Authenticate requests that carry an API key.
+
+    Requests without a key pass through untouched (session auth still
+    applies). A present but invalid key is rejected with 401 and a key over
+    its rate limit with 429; a valid one sets ``request.api_key`` to an
+    ``AuthenticatedKey`` and records its use. Every response to a valid key,
+    429s included, is metered with its status and latency.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.api_key = None
+        raw_key = get_raw_key(request)
+        if not raw_key:
+            return self.get_response(request)
+        request.api_key = key = authenticate_api_key(raw_key)
+        if key is None:
+            return JsonResponse({'error': 'Invalid or expired API key'}, status=401)
+        start = monotonic()
+        retry_after = get_rate_limiter().check(key.id, key.rate_limit, key.rate_limit_burst)
+        if retry_after is not None:
+            response = JsonResponse({'error': 'Rate limit exceeded'}, status=429)
+            response['Retry-After'] = str(math.ceil(retry_after))
+        else:
+            usage_recorder.record(key.id)
+            response = self.get_response(request)
+        usage_meter.record(key.hub_id, key.id, response.status_code, (monotonic() - start) * 1000)
+        return response
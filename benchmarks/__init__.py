@@ -0,0 +1 @@
+"""Stand-alone benchmarks for the webhook delivery path (no database needed)."""
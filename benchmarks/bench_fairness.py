@@ -0,0 +1,78 @@
+"""
+Delivery latency of quiet hubs while one hub floods the outbox.
+
+Simulates workers claiming ``--batch`` deliveries per round, each round taking
+``--round-ms``. One noisy hub queues ``--flood`` deliveries over ``--endpoints``
+endpoints up front; ``--quiet`` other hubs publish one event every few rounds.
+The quiet hubs' latency (publish to the end of the round that sends them) is
+compared for:
+
+- "fifo": batches filled strictly by ``next_attempt_at``, as before.
+- "fair": batches split by ``FairScheduler`` across hubs, then endpoints.
+
+Run from the directory containing the ``api_connect`` package::
+
+    python -m api_connect.benchmarks.bench_fairness [--flood 10000] [--quiet 20] [--batch 100]
+"""
+import argparse
+import random
+import statistics
+from collections import deque
+
+from api_connect.delivery.scheduler import FairScheduler
+
+NOISY = 'hub-noisy'
+
+
+def simulate(strategy, flood, endpoints, quiet, batch, rounds, seed):
+    rng = random.Random(seed)
+    queues = {}  # (hub, endpoint) -> deque of publish rounds, oldest first
+    for i in range(flood):
+        queues.setdefault((NOISY, f'noisy-{i % endpoints}'), deque()).append(0)
+    scheduler = FairScheduler()
+    latencies = []
+    for now in range(rounds):
+        for hub in range(quiet):
+            if rng.random() < 0.2:
+                queues.setdefault((f'hub-{hub:03d}', f'quiet-{hub:03d}'), deque()).append(now)
+        if strategy == 'fifo':
+            heads = sorted((published, key) for key, queue in queues.items() for published in queue)
+            picked = {}
+            for _, key in heads[:batch]:
+                picked[key] = picked.get(key, 0) + 1
+        else:
+            backlog = {}
+            for (hub, endpoint), queue in queues.items():
+                backlog.setdefault(hub, {})[(hub, endpoint)] = len(queue)
+            picked = scheduler.allocate(backlog, batch)
+        for key, n in picked.items():
+            for _ in range(n):
+                published = queues[key].popleft()
+                if key[0] != NOISY:
+                    latencies.append(now - published + 1)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--flood', type=int, default=10000)
+    parser.add_argument('--endpoints', type=int, default=5)
+    parser.add_argument('--quiet', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=150)
+    parser.add_argument('--round-ms', type=float, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    for strategy in ('fifo', 'fair'):
+        latencies = simulate(strategy, args.flood, args.endpoints, args.quiet, args.batch, args.rounds, args.seed)
+        if not latencies:
+            print(f'{strategy:5s} no quiet-hub delivery claimed within {args.rounds} rounds')
+            continue
+        ms = sorted(rounds * args.round_ms for rounds in latencies)
+        p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+        print(f'{strategy:5s} {len(ms):6d} quiet deliveries  p50 {statistics.median(ms):8.0f} ms  p99 {p99:8.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Search latency over 100k API keys, leading-wildcard LIKE vs the FTS5 index.
+
+Builds an in-memory SQLite table shaped like ``api_connect_apikey`` (keys
+spread over ``--hubs`` hubs, the first of which is searched), adds the
+trigram FTS5 table and triggers migration 0013 creates and times one 12-row
+result page per query term:
+
+- "like": the ``icontains`` OR filters the list views used before.
+- "fts": the ``rowid IN (... MATCH ...)`` filter and rank ``search()`` builds.
+
+Requires SQLite 3.34+. Run from the directory containing the ``api_connect``
+package::
+
+    python -m api_connect.benchmarks.bench_search [--rows 100000] [--hubs 1] [--rounds 50]
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import string
+import time
+import uuid
+
+from api_connect.search import SQLITE_TRIGRAM
+
+WORDS = ['shop', 'sync', 'erp', 'stock', 'invoice', 'report', 'mobile', 'backup', 'zapier', 'crm']
+TERMS = ['zapier', 'invoice 12', 'ak_q', 'qwerty', 'backup sync']
+
+LIKE = '''
+    SELECT id, name FROM api_connect_apikey
+    WHERE hub_id = ? AND NOT is_deleted
+      AND (name LIKE ? ESCAPE '\\' OR key_prefix LIKE ? ESCAPE '\\')
+    ORDER BY name LIMIT 12
+'''
+FTS = '''
+    SELECT id, name,
+        CASE WHEN name LIKE ? ESCAPE '\\' THEN ? * 1.0 / length(name) ELSE 0.0 END
+        + CASE WHEN key_prefix LIKE ? ESCAPE '\\' THEN ? * 1.0 / length(key_prefix) ELSE 0.0 END AS rank
+    FROM api_connect_apikey
+    WHERE hub_id = ? AND NOT is_deleted
+      AND api_connect_apikey.rowid IN (SELECT rowid FROM api_connect_apikey_fts WHERE api_connect_apikey_fts MATCH ?)
+    ORDER BY rank DESC, id DESC LIMIT 12
+'''
+# The FTS table and triggers as created by migration 0013.
+FTS_SCHEMA = '''
+    CREATE VIRTUAL TABLE api_connect_apikey_fts USING fts5(
+        name, key_prefix, content='api_connect_apikey', content_rowid='rowid', tokenize='trigram'
+    );
+    CREATE TRIGGER api_connect_apikey_fts_ai AFTER INSERT ON api_connect_apikey BEGIN
+        INSERT INTO api_connect_apikey_fts(rowid, name, key_prefix) VALUES (new.rowid, new.name, new.key_prefix);
+    END;
+    CREATE TRIGGER api_connect_apikey_fts_ad AFTER DELETE ON api_connect_apikey BEGIN
+        INSERT INTO api_connect_apikey_fts(api_connect_apikey_fts, rowid, name, key_prefix)
+        VALUES ('delete', old.rowid, old.name, old.key_prefix);
+    END;
+    CREATE TRIGGER api_connect_apikey_fts_au AFTER UPDATE OF name, key_prefix ON api_connect_apikey BEGIN
+        INSERT INTO api_connect_apikey_fts(api_connect_apikey_fts, rowid, name, key_prefix)
+        VALUES ('delete', old.rowid, old.name, old.key_prefix);
+        INSERT INTO api_connect_apikey_fts(rowid, name, key_prefix) VALUES (new.rowid, new.name, new.key_prefix);
+    END;
+'''
+
+
+def build(rows, hubs):
+    db = sqlite3.connect(':memory:')
+    db.execute('''
+        CREATE TABLE api_connect_apikey (
+            id char(32) PRIMARY KEY, hub_id char(32), is_deleted bool NOT NULL DEFAULT 0,
+            name varchar(255), key_prefix varchar(10)
+        )
+    ''')
+    db.execute('CREATE INDEX api_connect_apikey_hub_id ON api_connect_apikey (hub_id)')
+    db.executescript(FTS_SCHEMA)
+    hubs = [uuid.uuid4().hex for _ in range(hubs)]
+    rng = random.Random(0)
+    db.executemany('INSERT INTO api_connect_apikey (id, hub_id, name, key_prefix) VALUES (?, ?, ?, ?)', [
+        (
+            uuid.uuid4().hex, hubs[i % len(hubs)], f'{rng.choice(WORDS)} {rng.choice(WORDS)} {i}',
+            'ak_' + ''.join(rng.choices(string.ascii_lowercase, k=7)),
+        )
+        for i in range(rows)
+    ])
+    db.execute('ANALYZE')
+    return db, hubs[0]
+
+
+def measure(db, sql, params, rounds):
+    """Return (median ms, matches on the page)."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        page = db.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), len(page)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--hubs', type=int, default=1)
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args(argv)
+    if not SQLITE_TRIGRAM:
+        parser.exit(1, f'SQLite {sqlite3.sqlite_version} has no trigram tokenizer (3.34+ needed)\n')
+
+    db, hub = build(args.rows, args.hubs)
+    print(f'{args.rows} keys, {args.hubs} hub(s), SQLite {sqlite3.sqlite_version}')
+    print(f'{"term":>12s} {"like ms":>9s} {"fts ms":>9s} {"rows":>5s}')
+    for term in TERMS:
+        pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        phrase = '"' + term.replace('"', '""') + '"'
+        like, _ = measure(db, LIKE, (hub, pattern, pattern), args.rounds)
+        fts, found = measure(db, FTS, (pattern, len(term), pattern, len(term), hub, phrase), args.rounds)
+        print(f'{term:>12s} {like:9.2f} {fts:9.2f} {found:5d}')
+
+
+if __name__ == '__main__':
+    main()
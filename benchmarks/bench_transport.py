@@ -0,0 +1,44 @@
+"""
+Deliveries per second with and without connection pooling.
+
+Run from the directory containing the ``api_connect`` package::
+
+    python -m api_connect.benchmarks.bench_transport [--requests 2000] [--workers 8]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api_connect.delivery.transport import Transport
+from api_connect.benchmarks.server import BenchServer
+
+PAYLOAD = json.dumps({'event': 'sale.created', 'data': {'id': 1, 'total': '10.00'}}).encode()
+
+
+def run(transport, url, requests, workers):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(executor.map(lambda _: transport.post(url, PAYLOAD).status, range(requests)))
+    elapsed = time.perf_counter() - start
+    assert all(status == 200 for status in statuses)
+    return requests / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    with BenchServer() as server:
+        for label, pooled in (('new connection per request', False), ('pooled keep-alive', True)):
+            server.reset()
+            transport = Transport(pooled=pooled, max_per_host=args.workers)
+            rate = run(transport, server.url, args.requests, args.workers)
+            transport.close()
+            print(f'{label:28s} {rate:10.0f} deliveries/s  {server.connections:6d} connections')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Deliveries per second as worker processes are added to one outbox.
+
+Runs the code the ``deliver_webhooks`` command runs: each process drains the
+outbox with ``DeliveryWorkerPool`` (fair scheduling across hubs, ordering
+partitions, the window-function claim query and lease, with SKIP LOCKED on
+PostgreSQL) and ``--threads`` senders. The database is a throwaway test
+database created and migrated from the Hub's settings, so the run exercises
+the same backend the Hub uses; on SQLite it is a file the processes share.
+
+``--rows`` events are published round-robin to ``--hubs`` hubs with one
+webhook each, all pointing at a local subscriber that answers after
+``--delay`` seconds. The outbox is then drained by 1, 2 and 4 processes.
+Throughput is bounded by senders in flight and should grow about linearly
+with processes until the database or the single-process subscriber
+saturates. The run fails if any delivery is sent twice or not at all.
+
+Run from the Hub project with its ``DJANGO_SETTINGS_MODULE`` set::
+
+    python -m api_connect.benchmarks.bench_workers [--rows 2000] [--hubs 4] [--delay 0.05] [--threads 8]
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+
+import django
+
+from api_connect.benchmarks.server import BenchServer
+
+BATCH_SIZE = 50
+
+
+def setup(database_name=None):
+    """Configure Django in this process, pointed at ``database_name`` if given."""
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+
+    settings.API_CONNECT_DELIVERY_AUTOSTART = False
+    if connection.vendor == 'sqlite':
+        # Processes writing the same file queue for its lock instead of failing.
+        connection.settings_dict['OPTIONS'].setdefault('timeout', 60)
+    if database_name:
+        settings.DATABASES['default']['NAME'] = database_name
+        connection.settings_dict['NAME'] = database_name
+    return connection
+
+
+def create_database(connection, tmp):
+    if connection.vendor == 'sqlite':
+        # The default in-memory test database can't be shared between processes.
+        connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'outbox.sqlite3')
+    return connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+
+def seed(url, rows, hubs):
+    """Publish ``rows`` events, one delivery each, over ``hubs`` hubs."""
+    from api_connect.delivery.outbox import publish
+    from api_connect.models import Webhook, WebhookEvent
+    from api_connect.routing import sync_subscriptions
+
+    WebhookEvent.all_objects.all().delete()
+    Webhook.all_objects.all().delete()
+    webhooks = [
+        Webhook.objects.create(hub_id=uuid.uuid4(), name=f'Bench {i}', url=url, events=['sale.created'])
+        for i in range(hubs)
+    ]
+    sync_subscriptions(webhooks)
+    for i in range(rows):
+        publish(webhooks[i % hubs].hub_id, 'sale.created', {'n': i})
+
+
+def work(database_name, threads):
+    setup(database_name)
+    from api_connect.delivery.worker import DeliveryWorkerPool
+
+    DeliveryWorkerPool(workers=threads, batch_size=BATCH_SIZE).drain()
+
+
+def run(server, database_name, rows, hubs, processes, threads):
+    from django.db import connection
+    from api_connect.models import WebhookDelivery
+
+    seed(server.url, rows, hubs)
+    # Children open their own connections; don't share this one's socket.
+    connection.close()
+    server.reset()
+    start = time.perf_counter()
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=work, args=(database_name, threads)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    assert all(worker.exitcode == 0 for worker in workers)
+    delivered = WebhookDelivery.objects.filter(status='delivered', attempts=1).count()
+    assert delivered == rows and server.httpd.requests == rows, 'deliveries lost or sent twice'
+    return rows / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--hubs', type=int, default=4)
+    parser.add_argument('--delay', type=float, default=0.05)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    connection = setup()
+    with tempfile.TemporaryDirectory() as tmp:
+        old_name = connection.settings_dict['NAME']
+        database_name = create_database(connection, tmp)
+        try:
+            with BenchServer(delay=args.delay) as server:
+                baseline = None
+                for processes in (1, 2, 4):
+                    rate = run(server, database_name, args.rows, args.hubs, processes, args.threads)
+                    baseline = baseline or rate
+                    print(f'{processes} process{"es" if processes > 1 else "  "} {rate:10.0f} deliveries/s  {rate / baseline:5.2f}x')
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
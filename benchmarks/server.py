@@ -0,0 +1,65 @@
+"""Local stand-in subscriber used by the benchmarks."""
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this Nagle's
+        # algorithm stalls every keep-alive response on a delayed ACK.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with self.server.lock:
+            self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Several benchmark processes may open their connections at once.
+    request_queue_size = 128
+
+
+class BenchServer:
+    """Threaded HTTP/1.1 server that counts connections and requests."""
+
+    def __init__(self, delay=0.0):
+        self.httpd = _Server(('127.0.0.1', 0), _Handler)
+        self.httpd.lock = threading.Lock()
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+        self.httpd.delay = delay
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/hook'
+
+    @property
+    def connections(self):
+        return self.httpd.connections
+
+    def reset(self):
+        self.httpd.connections = 0
+        self.httpd.requests = 0
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,61 @@
+"""
+Chunked bulk actions.
+
+A bulk action applies field changes to a *selection*: a queryset such as the
+hub's list filtered by the selected ids or by the list's search, rather than
+one ``UPDATE ... WHERE id IN (...)`` over every id the browser sent.
+``apply_bulk`` walks the selection in primary key order, ``chunk_size`` rows at
+a time. Each chunk is locked and updated in its own transaction, then
+announced with a single ``signals.rows_updated`` carrying the chunk's ids,
+so cache invalidation and subscription sync run once per chunk instead of
+being skipped by ``QuerySet.update()``.
+
+A call stops once ``time_budget`` seconds have passed and returns the primary
+key to resume after, so a view can spread a large selection over several
+requests and report progress in between.
+"""
+import time
+from typing import Any, NamedTuple
+
+from django.db import transaction
+
+from .signals import rows_updated
+
+BULK_CHUNK_SIZE = 500
+# Seconds of work per request before handing progress back to the browser.
+BULK_STEP_SECONDS = 2.0
+
+
+class BulkStep(NamedTuple):
+    """Outcome of one ``apply_bulk`` call."""
+
+    processed: int
+    after: Any
+    done: bool
+
+
+def apply_bulk(selection, changes, hub_id, after=None, chunk_size=BULK_CHUNK_SIZE, time_budget=BULK_STEP_SECONDS):
+    """Apply ``changes`` to the rows of ``selection`` past primary key ``after``.
+
+    Runs chunks until the selection is exhausted or ``time_budget`` seconds
+    (``None`` for no limit) have passed. Rows the changes take out of the
+    selection are not revisited, since the walk only moves forward.
+    """
+    model = selection.model
+    ordered = selection.order_by('pk')
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    processed = 0
+    while True:
+        chunk = ordered if after is None else ordered.filter(pk__gt=after)
+        with transaction.atomic():
+            ids = list(chunk.select_for_update().values_list('pk', flat=True)[:chunk_size])
+            if ids:
+                model.objects.filter(pk__in=ids).update(**changes)
+        if ids:
+            rows_updated.send(sender=model, hub_ids=[hub_id], ids=ids)
+        processed += len(ids)
+        if len(ids) < chunk_size:
+            return BulkStep(processed, None, True)
+        after = ids[-1]
+        if deadline is not None and time.monotonic() >= deadline:
+            return BulkStep(processed, after, False)
@@ -0,0 +1 @@
+"""Webhook delivery subsystem: transactional outbox, worker pool and transport."""
@@ -0,0 +1,125 @@
+"""
+Per-webhook circuit breaker.
+
+State lives on the ``Webhook`` row (``circuit_state`` / ``circuit_opened_at``)
+so every worker process agrees on it; the recent error-rate window is kept in
+memory per process.
+
+- ``closed``: deliveries flow. The circuit opens after ``failure_threshold``
+  consecutive failures (``failure_count``) or when the error rate over the
+  last ``window`` attempts reaches ``error_rate_threshold``.
+- ``open``: no socket is opened; due deliveries are pushed back to
+  ``circuit_opened_at + open_seconds`` without consuming an attempt.
+- ``half_open``: after the cool-down a single trial delivery is sent. Success
+  closes the circuit, failure opens it again. The move to ``half_open`` is a
+  conditional UPDATE, so only one process gets the trial; it restamps
+  ``circuit_opened_at``, and a trial lost with its worker is handed out again
+  after another cool-down.
+
+The failure streak is updated relative to the stored value and re-read
+before deciding on transitions, so workers recording outcomes for the same
+webhook at once don't overwrite each other's counts.
+
+A webhook that reaches ``disable_after`` consecutive failures is switched off
+(``is_active=False``) until an operator re-enables it.
+"""
+import threading
+from collections import deque
+from datetime import timedelta
+
+from django.db.models import F, Q
+
+from ..models import Webhook
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Decides whether a webhook may be called and updates its circuit state."""
+
+    def __init__(self, failure_threshold=5, error_rate_threshold=0.5, window=20, min_samples=10,
+                 open_seconds=60, disable_after=100):
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window = window
+        self.min_samples = min_samples
+        self.open_seconds = open_seconds
+        self.disable_after = disable_after
+        self._windows = {}  # webhook id -> deque of bools (True = failed)
+        self._lock = threading.Lock()
+
+    def retry_at(self, webhook):
+        """When an open circuit lets its next trial through."""
+        return webhook.circuit_opened_at + timedelta(seconds=self.open_seconds)
+
+    def allow(self, webhook, now):
+        """Whether a delivery to ``webhook`` may open a socket at ``now``.
+
+        Once the cool-down of an ``open`` circuit (or of a ``half_open`` trial
+        that never reported back) has passed, the first caller moves it to
+        ``half_open`` in the database and gets the trial; everyone else is
+        told to wait. The instance is updated either way.
+        """
+        if webhook.circuit_state == CLOSED:
+            return True
+        if webhook.circuit_opened_at and now < self.retry_at(webhook):
+            return False
+        cool_down_over = Q(circuit_opened_at__isnull=True) | Q(
+            circuit_opened_at__lte=now - timedelta(seconds=self.open_seconds),
+        )
+        if Webhook.objects.filter(cool_down_over, pk=webhook.pk, circuit_state__in=[OPEN, HALF_OPEN]).update(
+            circuit_state=HALF_OPEN, circuit_opened_at=now,
+        ):
+            webhook.circuit_state, webhook.circuit_opened_at = HALF_OPEN, now
+            return True
+        # Another process took the trial, or the circuit moved on since this copy was loaded.
+        webhook.circuit_state, webhook.circuit_opened_at = Webhook.objects.values_list(
+            'circuit_state', 'circuit_opened_at',
+        ).get(pk=webhook.pk)
+        return webhook.circuit_state == CLOSED
+
+    def error_rate(self, webhook_id):
+        with self._lock:
+            window = self._windows.get(webhook_id)
+            if not window or len(window) < self.min_samples:
+                return 0.0
+            return sum(window) / len(window)
+
+    def record(self, webhook, results, now):
+        """Apply ordered delivery outcomes (True = delivered) to ``webhook``.
+
+        Persists the new streak and any state transition, updates the
+        instance and returns the changed fields.
+        """
+        with self._lock:
+            window = self._windows.setdefault(webhook.pk, deque(maxlen=self.window))
+            window.extend(not ok for ok in results)
+        fields = {}
+        if True in results:
+            # A success resets the streak; only the failures after the last one count.
+            fields.update(failure_count=results[::-1].index(True), last_triggered_at=now)
+        else:
+            fields['failure_count'] = F('failure_count') + len(results)
+        Webhook.objects.filter(pk=webhook.pk).update(**fields)
+        failure_count, circuit_state = Webhook.objects.values_list('failure_count', 'circuit_state').get(pk=webhook.pk)
+        changes = {**fields, 'failure_count': failure_count}
+        transitions = {}
+        if results[-1]:
+            if circuit_state != CLOSED:
+                transitions.update(circuit_state=CLOSED, circuit_opened_at=None)
+                with self._lock:
+                    window.clear()
+        elif circuit_state != OPEN and (circuit_state == HALF_OPEN
+                                        or failure_count >= self.failure_threshold
+                                        or self.error_rate(webhook.pk) >= self.error_rate_threshold):
+            transitions.update(circuit_state=OPEN, circuit_opened_at=now)
+        if failure_count >= self.disable_after:
+            transitions['is_active'] = False
+        if transitions:
+            Webhook.objects.filter(pk=webhook.pk).update(**transitions)
+        changes.update(transitions)
+        for field, value in changes.items():
+            setattr(webhook, field, value)
+        return changes
@@ -0,0 +1,94 @@
+"""
+Adaptive concurrency limit per subscriber host.
+
+A fixed number of requests in flight either underuses a fast cloud API or
+overloads a small server in a shop's back office. Each host pool therefore
+sizes itself by AIMD (additive increase, multiplicative decrease), the scheme
+TCP congestion control uses:
+
+- Every successful response adds ``1 / limit``, so a host that keeps up gains
+  about one slot per round trip of a full window. Growth stops at the
+  ceiling (the hub's "Max Connections per Host" setting) and while the pool
+  is not using the slots it already has.
+- An error (connection failure, timeout, 429 or 5xx) halves the limit.
+- A smoothed latency above ``latency_tolerance`` times the host's baseline
+  (its best recent latency) cuts the limit by ``latency_backoff``. Queueing
+  at the subscriber shows up as latency before it shows up as errors.
+
+After a decrease, further decreases wait one smoothed round trip, so the
+responses of requests sent before the cut don't shrink the limit again. The
+baseline drifts slowly towards recent latencies, so a lasting change in a
+host's speed is eventually taken as normal.
+"""
+import threading
+import time
+
+MIN_LIMIT = 1
+ERROR_BACKOFF = 0.5
+LATENCY_BACKOFF = 0.8
+LATENCY_TOLERANCE = 2.0
+# Latency above the baseline below which jitter is never read as overload.
+LATENCY_SLACK_SECONDS = 0.05
+SMOOTHING = 0.2
+BASELINE_DRIFT = 0.01
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit of one host, fed with the outcome of each request."""
+
+    def __init__(self, initial, ceiling, min_limit=MIN_LIMIT, error_backoff=ERROR_BACKOFF,
+                 latency_backoff=LATENCY_BACKOFF, latency_tolerance=LATENCY_TOLERANCE, clock=time.monotonic):
+        self.ceiling = max(min_limit, ceiling)
+        self.min_limit = min_limit
+        self.error_backoff = error_backoff
+        self.latency_backoff = latency_backoff
+        self.latency_tolerance = latency_tolerance
+        self.baseline = None
+        self.smoothed = None
+        self._limit = float(min(max(initial, min_limit), self.ceiling))
+        self._hold_until = 0.0
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    def set_ceiling(self, ceiling):
+        with self._lock:
+            self.ceiling = max(self.min_limit, ceiling)
+            self._limit = min(self._limit, self.ceiling)
+
+    def record(self, latency, ok, in_flight):
+        """Adjust the limit for one response; return the new limit.
+
+        ``latency`` is None when no response arrived. ``in_flight`` is the
+        number of requests to the host still running, this one included.
+        """
+        with self._lock:
+            now = self._clock()
+            if latency is not None:
+                self.smoothed = latency if self.smoothed is None else self.smoothed + SMOOTHING * (latency - self.smoothed)
+                if self.baseline is None or latency < self.baseline:
+                    self.baseline = latency
+                else:
+                    self.baseline += BASELINE_DRIFT * (latency - self.baseline)
+            if not ok:
+                self._decrease(self.error_backoff, now)
+            elif self._overloaded():
+                self._decrease(self.latency_backoff, now)
+            elif in_flight >= self.limit:
+                self._limit = min(self.ceiling, self._limit + 1 / self._limit)
+            return self.limit
+
+    def _overloaded(self):
+        if self.smoothed is None or self.baseline is None:
+            return False
+        excess = self.smoothed - self.baseline
+        return excess > LATENCY_SLACK_SECONDS and self.smoothed > self.baseline * self.latency_tolerance
+
+    def _decrease(self, factor, now):
+        if now < self._hold_until:
+            return
+        self._limit = max(self.min_limit, self._limit * factor)
+        self._hold_until = now + (self.smoothed or 0.0)
@@ -0,0 +1,93 @@
+"""
+Serialize-once envelopes for webhook events.
+
+An ``EventEnvelope`` renders the JSON body of a ``WebhookEvent`` the first
+time it is asked for and keeps the resulting ``bytes``. Every delivery,
+retry and batch of that event sends the same buffer, so fanning an event out
+to N webhooks encodes it once instead of N times. ``bytes`` are immutable,
+so sender threads can share the buffer without copying or locking.
+
+``orjson`` is used when it is installed and the stdlib ``json`` module
+otherwise; both are set up to produce compact UTF-8 output.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+def _default(value):
+    return DjangoJSONEncoder().default(value)
+
+
+def dumps(data):
+    """Encode ``data`` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+class EventEnvelope:
+    """The wire form of one event, encoded lazily and at most once."""
+    __slots__ = ('event_id', 'event', 'created_at', 'payload', '_body', '_lock')
+
+    def __init__(self, event_id, event, created_at, payload):
+        self.event_id = event_id
+        self.event = event
+        self.created_at = created_at
+        self.payload = payload
+        self._body = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_event(cls, event):
+        return cls(event.id, event.event, event.created_at, event.payload)
+
+    @property
+    def body(self):
+        if self._body is None:
+            with self._lock:
+                if self._body is None:
+                    self._body = dumps({
+                        'id': str(self.event_id),
+                        'event': self.event,
+                        'created_at': self.created_at.isoformat(),
+                        'data': self.payload,
+                    })
+        return self._body
+
+
+def batch_body(envelopes):
+    """JSON array of several envelopes, built from their cached bodies."""
+    return b'[' + b','.join(envelope.body for envelope in envelopes) + b']'
+
+
+class EnvelopeCache:
+    """Recently used envelopes by event id, so retries reuse their bytes."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._envelopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._envelopes)
+
+    def get(self, event):
+        with self._lock:
+            envelope = self._envelopes.get(event.id)
+            if envelope is not None:
+                self._envelopes.move_to_end(event.id)
+                return envelope
+            envelope = self._envelopes[event.id] = EventEnvelope.from_event(event)
+            if len(self._envelopes) > self.maxsize:
+                self._envelopes.popitem(last=False)
+            return envelope
@@ -0,0 +1,65 @@
+"""
+Delivery attempts log.
+
+The worker writes one ``WebhookDeliveryAttempt`` per POST (a batched POST is
+one row) in the same bulk pass that records delivery outcomes. Rows carry the
+UTC ``day`` they were written, and pruning removes whole expired days with a
+single set-based DELETE per retention window: no rows are loaded, and no
+per-row cascades or signals run.
+
+Each hub keeps its log for ``APIConnectSettings.delivery_log_retention_days``.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import APIConnectSettings, WebhookDeliveryAttempt
+
+RESPONSE_BODY_LENGTH = 1000
+DEFAULT_RETENTION_DAYS = APIConnectSettings._meta.get_field('delivery_log_retention_days').default
+
+
+def build_attempt(deliveries, status, error, latency, body, now):
+    """Unsaved log row for one POST of ``deliveries`` (several when batched)."""
+    delivery = deliveries[0]
+    batched = delivery.webhook.batch_enabled
+    return WebhookDeliveryAttempt(
+        hub_id=delivery.hub_id,
+        webhook_id=delivery.webhook_id,
+        delivery=None if batched else delivery,
+        event_name='batch' if batched else delivery.event.event,
+        attempt=delivery.attempts,
+        batch_size=len(deliveries),
+        response_status=status,
+        latency_ms=None if latency is None else round(latency * 1000),
+        response_body=body.decode('utf-8', 'replace')[:RESPONSE_BODY_LENGTH] if body else '',
+        error=error,
+        day=now.date(),
+    )
+
+
+def prune_attempts(today=None):
+    """Drop log days older than each hub's retention; return rows deleted."""
+    today = today or timezone.now().date()
+    windows = defaultdict(list)  # retention days -> hub ids with a custom value
+    for hub_id, days in APIConnectSettings.all_objects.exclude(
+        delivery_log_retention_days=DEFAULT_RETENTION_DAYS,
+    ).values_list('hub_id', 'delivery_log_retention_days'):
+        windows[days].append(hub_id)
+
+    deleted = 0
+    qs = WebhookDeliveryAttempt.all_objects
+    custom = [hub_id for hub_ids in windows.values() for hub_id in hub_ids]
+    deleted += _drop_days(qs.exclude(hub_id__in=custom), today, DEFAULT_RETENTION_DAYS)
+    for days, hub_ids in windows.items():
+        deleted += _drop_days(qs.filter(hub_id__in=hub_ids), today, days)
+    return deleted
+
+
+def _drop_days(qs, today, days):
+    # A retention of N days keeps today and the N - 1 days before it.
+    cutoff = today - timedelta(days=days - 1)
+    # Nothing references the log, so Django issues this as one
+    # DELETE ... WHERE day < cutoff without loading the rows.
+    return qs.filter(day__lt=cutoff).delete()[0]
@@ -0,0 +1,36 @@
+"""
+Transactional outbox for webhook events.
+
+Other modules call ``publish()`` inside the transaction that performs the
+business change (e.g. creating a sale). The event and one delivery row per
+subscribed webhook commit or roll back together with that change, and the
+worker pool is only woken once the transaction has committed, so request
+handlers never wait on outbound HTTP.
+"""
+from django.db import transaction
+
+from ..models import WebhookDelivery, WebhookEvent
+from ..routing import resolve_webhook_ids
+from .worker import wake_workers
+
+
+def publish(hub_id, event, payload=None, ordering_key=''):
+    """Queue ``event`` for every subscribed webhook of ``hub_id``.
+
+    Events given the same ``ordering_key`` (typically the id of the entity
+    they describe) reach each webhook in publish order; events without one
+    are delivered as soon as possible. Returns the created ``WebhookEvent`` or
+    ``None`` when nobody listens.
+    """
+    webhook_ids = resolve_webhook_ids(hub_id, event)
+    if not webhook_ids:
+        return None
+    with transaction.atomic():
+        webhook_event = WebhookEvent.objects.create(hub_id=hub_id, event=event, payload=payload or {})
+        WebhookDelivery.objects.bulk_create([
+            # Cutting a long key can only merge partitions, which keeps them ordered.
+            WebhookDelivery(hub_id=hub_id, webhook_id=webhook_id, event=webhook_event, ordering_key=str(ordering_key)[:100])
+            for webhook_id in webhook_ids
+        ])
+        transaction.on_commit(wake_workers)
+    return webhook_event
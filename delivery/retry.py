@@ -0,0 +1,68 @@
+"""
+Retry policy and dead-letter handling for failed deliveries.
+
+A failed delivery is rescheduled with exponential backoff and "equal jitter"
+(half the delay fixed, half random) so retries from one outage don't all hit
+the subscriber at the same instant. Once ``webhook.max_attempts`` is reached
+the delivery is marked ``failed`` and copied to ``WebhookDeadLetter``, from
+where it can be replayed.
+"""
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import WebhookDeadLetter, WebhookDelivery
+
+BASE_DELAY_SECONDS = 10
+MAX_DELAY_SECONDS = 6 * 3600
+# Share of each claimed batch reserved for retries; the rest goes to first
+# attempts so a backlog of retries can never starve fresh events (and vice versa).
+RETRY_SHARE = 0.25
+
+
+def backoff_delay(attempt, base=BASE_DELAY_SECONDS, cap=MAX_DELAY_SECONDS, rand=random.random):
+    """Seconds to wait before retry number ``attempt`` (1-based)."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + rand() * delay / 2
+
+
+def schedule_retry(delivery, now=None):
+    """Reschedule ``delivery`` or dead-letter it; return True if it will be retried."""
+    now = now or timezone.now()
+    if delivery.attempts >= delivery.webhook.max_attempts:
+        delivery.status = 'failed'
+        return False
+    delivery.status = 'pending'
+    delivery.next_attempt_at = now + timedelta(seconds=backoff_delay(delivery.attempts))
+    return True
+
+
+def build_dead_letter(delivery):
+    return WebhookDeadLetter(
+        hub_id=delivery.hub_id,
+        webhook_id=delivery.webhook_id,
+        event_id=delivery.event_id,
+        delivery_id=delivery.pk,
+        attempts=delivery.attempts,
+        response_status=delivery.response_status,
+        last_error=delivery.last_error,
+    )
+
+
+def replay_dead_letters(dead_letters):
+    """Queue the deliveries behind ``dead_letters`` again from attempt zero."""
+    from .worker import wake_workers
+
+    dead_letters = list(dead_letters)
+    if not dead_letters:
+        return 0
+    now = timezone.now()
+    with transaction.atomic():
+        WebhookDelivery.objects.filter(pk__in=[d.delivery_id for d in dead_letters]).update(
+            status='pending', attempts=0, next_attempt_at=now, last_error='', updated_at=now,
+        )
+        WebhookDeadLetter.objects.filter(pk__in=[d.pk for d in dead_letters]).update(replayed_at=now, updated_at=now)
+        transaction.on_commit(wake_workers)
+    return len(dead_letters)
@@ -0,0 +1,94 @@
+"""
+Fair sharing of delivery batches across hubs and endpoints.
+
+The outbox is shared by every hub, so claiming strictly by
+``next_attempt_at`` lets one hub's bulk import fill every batch while quiet
+hubs wait behind it. Instead each claim splits its slots by deficit
+round-robin (DRR): first across the hubs with due deliveries, then, within a
+hub's share, across its endpoints. Every visit adds ``quantum`` deliveries of
+credit to a queue, which spends it on its waiting rows; credit a queue could
+not use because the batch filled up carries over to the next claim, and the
+next claim starts after the last queue served. An empty queue drops its
+credit, as in classic DRR.
+
+A quiet hub therefore waits at most one round for its share however deep a
+noisy hub's backlog is, while spare slots still go to whoever has work. A
+hub's ``delivery_max_in_flight`` setting caps how many of its deliveries may be
+leased at once across all workers; the worker clamps the hub's backlog to that
+room before scheduling.
+"""
+import threading
+
+DEFAULT_QUANTUM = 1
+
+
+def deficit_round_robin(backlog, slots, deficits, start=None, quantum=DEFAULT_QUANTUM):
+    """Split ``slots`` over the queues of ``backlog`` (``{key: waiting}``).
+
+    Queues are visited in key order starting after ``start``. ``deficits`` is
+    updated in place with the credit each queue carries into the next call.
+    Returns ``(granted, last)``: ``{key: slots}`` for every queue served and the
+    key of the last queue visited, to pass back as ``start``.
+    """
+    keys = sorted(key for key, waiting in backlog.items() if waiting > 0)
+    for key in [key for key in deficits if key not in keys]:
+        del deficits[key]
+    if start is not None:
+        split = sum(1 for key in keys if key <= start)
+        keys = keys[split:] + keys[:split]
+    granted, last = {}, start
+    while slots > 0 and keys:
+        for key in list(keys):
+            if slots <= 0:
+                break
+            last = key
+            credit = deficits.get(key, 0) + quantum
+            take = min(credit, backlog[key] - granted.get(key, 0), slots)
+            granted[key] = granted.get(key, 0) + take
+            slots -= take
+            if granted[key] >= backlog[key]:
+                keys.remove(key)
+                deficits.pop(key, None)
+            else:
+                deficits[key] = credit - take
+    return {key: n for key, n in granted.items() if n}, last
+
+
+class FairScheduler:
+    """Keeps the DRR state of one worker pool between claims."""
+
+    def __init__(self, quantum=DEFAULT_QUANTUM):
+        self.quantum = quantum
+        self._hub_deficits = {}
+        self._hub_cursor = None
+        self._endpoint_deficits = {}  # hub id -> {webhook id: credit}
+        self._endpoint_cursors = {}  # hub id -> last webhook id served
+        self._lock = threading.Lock()
+
+    def allocate(self, backlog, slots, room=None):
+        """Slots per endpoint for one batch.
+
+        ``backlog`` maps hub id -> ``{webhook id: due deliveries}``; ``room``
+        maps hub id -> deliveries it may still lease (missing: unlimited).
+        Returns ``{webhook id: slots}``.
+        """
+        room = room or {}
+        totals = {}
+        for hub_id, endpoints in backlog.items():
+            total = sum(endpoints.values())
+            totals[hub_id] = min(total, room[hub_id]) if hub_id in room else total
+        with self._lock:
+            shares, self._hub_cursor = deficit_round_robin(
+                totals, slots, self._hub_deficits, self._hub_cursor, self.quantum,
+            )
+            for hub_id in [hub_id for hub_id in self._endpoint_deficits if hub_id not in backlog]:
+                del self._endpoint_deficits[hub_id]
+                self._endpoint_cursors.pop(hub_id, None)
+            allocation = {}
+            for hub_id, share in shares.items():
+                granted, self._endpoint_cursors[hub_id] = deficit_round_robin(
+                    backlog[hub_id], share, self._endpoint_deficits.setdefault(hub_id, {}),
+                    self._endpoint_cursors.get(hub_id), self.quantum,
+                )
+                allocation.update(granted)
+        return allocation
@@ -0,0 +1,77 @@
+"""
+HMAC-SHA256 signatures for webhook payloads.
+
+Each POST to a webhook with a ``secret`` carries two headers:
+
+- ``X-Webhook-Timestamp``: Unix time the request was signed.
+- ``X-Webhook-Signature``: ``sha256=`` + hex HMAC of ``"<timestamp>." + body``.
+
+Subscribers recompute the HMAC with their copy of the secret, compare it in
+constant time and reject timestamps outside a tolerance window to stop
+replays (see ``verify_signature``).
+
+Keying an HMAC hashes the padded secret twice. ``Signer`` does that once per
+secret and keeps the keyed object; each signature starts from a ``copy()`` of
+it, so signing only pays for hashing the body itself.
+"""
+import hashlib
+import hmac
+import threading
+import time
+
+SIGNATURE_HEADER = 'X-Webhook-Signature'
+TIMESTAMP_HEADER = 'X-Webhook-Timestamp'
+SIGNATURE_PREFIX = 'sha256='
+DEFAULT_TOLERANCE_SECONDS = 300
+MAX_CACHED_KEYS = 1024
+
+
+def _message(timestamp, body):
+    return str(timestamp).encode() + b'.' + body
+
+
+class Signer:
+    """Signs payloads, reusing the keyed HMAC state for each secret."""
+
+    def __init__(self, max_keys=MAX_CACHED_KEYS):
+        self.max_keys = max_keys
+        self._keyed = {}
+        self._lock = threading.Lock()
+
+    def _keyed_hmac(self, secret):
+        keyed = self._keyed.get(secret)
+        if keyed is None:
+            keyed = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+            with self._lock:
+                if len(self._keyed) >= self.max_keys:
+                    self._keyed.clear()
+                self._keyed[secret] = keyed
+        return keyed
+
+    def sign(self, secret, body, timestamp):
+        mac = self._keyed_hmac(secret).copy()
+        mac.update(_message(timestamp, body))
+        return SIGNATURE_PREFIX + mac.hexdigest()
+
+    def headers(self, secret, body, timestamp=None):
+        """Signature headers for ``body``, or ``{}`` when the webhook has no secret."""
+        if not secret:
+            return {}
+        timestamp = int(time.time()) if timestamp is None else timestamp
+        return {
+            TIMESTAMP_HEADER: str(timestamp),
+            SIGNATURE_HEADER: self.sign(secret, body, timestamp),
+        }
+
+
+def verify_signature(secret, body, timestamp, signature, tolerance=DEFAULT_TOLERANCE_SECONDS, now=None):
+    """Check a received signature the way a subscriber should."""
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        return False
+    now = time.time() if now is None else now
+    if abs(now - timestamp) > tolerance:
+        return False
+    mac = hmac.new(secret.encode(), _message(timestamp, body), hashlib.sha256)
+    return hmac.compare_digest(SIGNATURE_PREFIX + mac.hexdigest(), signature or '')
@@ -0,0 +1,278 @@
+"""
+HTTP transport used to POST webhook payloads to subscribers.
+
+Connections are pooled per ``(scheme, host, port)`` and kept alive between
+deliveries, so consecutive POSTs to the same subscriber skip the TCP and TLS
+handshakes. Each host pool caps the number of requests in flight to that
+host; callers block until a slot frees up. The cap adapts to how the host
+copes (see ``concurrency.AdaptiveLimit``), up to the configured maximum.
+Callers posting for several hubs pass ``hub_id``: every hub then gets its own
+pools, so one hub's maximum never overrides another's for a shared host.
+Callers that must not be held up by one slow host pass ``wait``: if no slot
+frees up within that many seconds, ``post()`` raises ``HostBusy`` instead of
+blocking. Pools left idle for ``IDLE_POOL_SECONDS`` are dropped.
+
+Only HTTP/1.1 keep-alive is used. Pipelining is unsafe for non-idempotent
+POSTs and rarely supported by servers, and HTTP/2 would need a third-party
+client the module does not depend on.
+"""
+import http.client
+import ssl
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from .concurrency import AdaptiveLimit
+
+USER_AGENT = 'ERPlora-Webhooks/1.0'
+RESPONSE_EXCERPT_BYTES = 1024
+# Bodies larger than this are not drained; the connection is dropped instead.
+MAX_DRAIN_BYTES = 64 * 1024
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 10
+DEFAULT_MAX_PER_HOST = 8
+DEFAULT_MAX_IDLE_PER_HOST = 8
+# Pools unused this long are closed and forgotten, checked when a pool is created.
+IDLE_POOL_SECONDS = 300
+
+
+def _origin(parts):
+    return parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80)
+
+
+class TransportError(Exception):
+    """The payload could not be sent (DNS, connection refused, timeout...)."""
+
+
+class HostBusy(TransportError):
+    """The host stayed at its concurrency limit for longer than the caller would wait."""
+
+
+class _StaleConnection(Exception):
+    """A reused keep-alive connection turned out to be closed by the server."""
+
+
+class Response:
+    """Outcome of a POST: status code, truncated body and elapsed seconds."""
+    __slots__ = ('status', 'body', 'elapsed')
+
+    def __init__(self, status, body=b'', elapsed=0.0):
+        self.status = status
+        self.body = body
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+
+class HostPool:
+    """Keep-alive connections to one origin with at most ``limit`` in use.
+
+    An ``adaptive`` pool moves ``limit`` between 1 and ``max_limit`` from the
+    outcomes passed to ``record()``; otherwise it stays at ``max_limit``.
+    """
+
+    def __init__(self, scheme, host, port, limit=DEFAULT_MAX_PER_HOST, max_idle=DEFAULT_MAX_IDLE_PER_HOST,
+                 ssl_context=None, adaptive=False):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.max_limit = limit
+        self.limiter = AdaptiveLimit(limit, limit) if adaptive else None
+        self.max_idle = max_idle
+        self.ssl_context = ssl_context
+        self.connections_opened = 0
+        self._idle = deque()
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.last_used = time.monotonic()
+
+    @property
+    def in_use(self):
+        return self._in_use
+
+    @property
+    def limit(self):
+        """Requests allowed in flight right now."""
+        return self.limiter.limit if self.limiter else self.max_limit
+
+    def set_max_limit(self, limit):
+        with self._cond:
+            if limit == self.max_limit:
+                return
+            self.max_limit = limit
+            if self.limiter:
+                self.limiter.set_ceiling(limit)
+            self._cond.notify_all()
+
+    def record(self, latency, ok):
+        """Feed the outcome of a finished request to the adaptive limit."""
+        if self.limiter is None:
+            return
+        before = self.limiter.limit
+        if self.limiter.record(latency, ok, self._in_use + 1) > before:
+            with self._cond:
+                self._cond.notify_all()
+
+    @property
+    def idle(self):
+        return self._in_use == 0
+
+    def acquire(self, connect_timeout, fresh=False, wait=None):
+        """Return ``(connection, reused)``, blocking while the host is at its limit.
+
+        With ``wait``, gives up after that many seconds and raises ``HostBusy``.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._in_use < self.limit, wait):
+                raise HostBusy(f'{self.host} is at its limit of {self.limit} requests in flight')
+            self._in_use += 1
+            self.last_used = time.monotonic()
+            conn = self._idle.pop() if self._idle and not fresh else None
+        if conn is not None:
+            return conn, True
+        try:
+            return self._connect(connect_timeout), False
+        except BaseException:
+            self.release(None)
+            raise
+
+    def release(self, conn, reusable=False):
+        with self._cond:
+            self._in_use -= 1
+            self.last_used = time.monotonic()
+            if conn is not None:
+                if reusable and len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+
+    def _connect(self, connect_timeout):
+        if self.scheme == 'https':
+            conn = http.client.HTTPSConnection(
+                self.host, self.port, timeout=connect_timeout, context=self.ssl_context or ssl.create_default_context(),
+            )
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=connect_timeout)
+        conn.connect()
+        self.connections_opened += 1
+        return conn
+
+
+class Transport:
+    """Sends POSTs over pooled keep-alive connections.
+
+    With ``pooled=False`` every request opens and closes its own connection,
+    which is only useful as a baseline for benchmarks.
+    """
+
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT, read_timeout=DEFAULT_READ_TIMEOUT,
+                 max_per_host=DEFAULT_MAX_PER_HOST, max_idle_per_host=DEFAULT_MAX_IDLE_PER_HOST, pooled=True,
+                 adaptive=True):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_per_host = max_per_host
+        self.adaptive = adaptive
+        self.max_idle_per_host = max_idle_per_host if pooled else 0
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def get_pool(self, scheme, host, port, hub_id=None, limit=None):
+        """The pool of one origin (per hub, if given), created with ``limit`` or the default maximum."""
+        key = (hub_id, scheme, host, port)
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    self._evict_idle()
+                    pool = self._pools[key] = HostPool(
+                        scheme, host, port, limit=limit or self.max_per_host, max_idle=self.max_idle_per_host,
+                        adaptive=self.adaptive,
+                    )
+        return pool
+
+    def _evict_idle(self):
+        """Drop pools unused for ``IDLE_POOL_SECONDS``; called with ``self._lock`` held."""
+        now = time.monotonic()
+        if now - self._last_sweep < IDLE_POOL_SECONDS:
+            return
+        self._last_sweep = now
+        for key, pool in list(self._pools.items()):
+            if pool.idle and now - pool.last_used >= IDLE_POOL_SECONDS:
+                del self._pools[key]
+                pool.close()
+
+    def host_limit(self, url, hub_id=None):
+        """Current concurrency limit of ``url``'s host, or None before its first request."""
+        parts = urlsplit(url)
+        pool = self._pools.get((hub_id, *_origin(parts)))
+        return pool.limit if pool else None
+
+    def post(self, url, body, headers=None, connect_timeout=None, read_timeout=None, max_per_host=None,
+             hub_id=None, wait=None):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise TransportError(f'Unsupported URL: {url}')
+        pool = self.get_pool(*_origin(parts), hub_id=hub_id, limit=max_per_host)
+        if max_per_host:
+            pool.set_max_limit(max_per_host)
+        path = parts.path or '/'
+        if parts.query:
+            path = f'{path}?{parts.query}'
+        request_headers = {'Content-Type': 'application/json', 'User-Agent': USER_AGENT}
+        if not self.max_idle_per_host:
+            request_headers['Connection'] = 'close'
+        request_headers.update(headers or {})
+        timeouts = (connect_timeout or self.connect_timeout, read_timeout or self.read_timeout)
+
+        start = time.monotonic()
+        try:
+            try:
+                status, data = self._send(pool, path, body, request_headers, timeouts, wait=wait)
+            except _StaleConnection:
+                # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                status, data = self._send(pool, path, body, request_headers, timeouts, fresh=True, wait=wait)
+        except (OSError, http.client.HTTPException) as e:
+            pool.record(None, False)
+            raise TransportError(str(e) or e.__class__.__name__) from e
+        elapsed = time.monotonic() - start
+        # 429 and 5xx mean the subscriber is struggling; other codes say nothing about load.
+        pool.record(elapsed, status != 429 and status < 500)
+        return Response(status, data, elapsed)
+
+    def _send(self, pool, path, body, headers, timeouts, fresh=False, wait=None):
+        conn, reused = pool.acquire(timeouts[0], fresh=fresh, wait=wait)
+        try:
+            conn.sock.settimeout(timeouts[1])
+            conn.request('POST', path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read(RESPONSE_EXCERPT_BYTES)
+            if not resp.isclosed():
+                resp.read(MAX_DRAIN_BYTES)
+            # http.client closes the connection itself when the server asked to.
+            reusable = resp.isclosed() and conn.sock is not None
+        except ConnectionError as e:
+            pool.release(conn)
+            if reused:
+                raise _StaleConnection() from e
+            raise
+        except BaseException:
+            pool.release(conn)
+            raise
+        pool.release(conn, reusable=reusable)
+        return resp.status, data
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
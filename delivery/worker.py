@@ -0,0 +1,463 @@
+"""
+Worker pool that drains the webhook delivery outbox.
+
+Database access stays on the draining thread: due rows are read in batches
+from the ``(status, next_attempt_at)`` index, the POSTs run concurrently on a
+fixed pool of sender threads and the results are written back in bulk.
+Throughput therefore scales with the number of workers while the outbox sees
+a handful of queries per batch. Which due rows make up a batch is decided by
+``scheduler.FairScheduler``, so no hub or endpoint can crowd out the others.
+Deliveries sharing an ordering key (see ``outbox.publish``) are sent one at a
+time, oldest first; different keys still go out in parallel.
+
+Several pools, in any number of processes and hosts, can drain the same
+outbox. A batch is claimed by leasing its rows: candidates are locked with
+``SELECT ... FOR UPDATE SKIP LOCKED`` where the database supports it, then
+stamped with a per-claim token and ``leased_until`` by an UPDATE that only
+matches rows nobody else holds, so each row goes to exactly one pool even
+without row locks (SQLite). Writing the outcome releases the lease. Rows of a
+pool that dies keep their lease until it expires and are then claimed again
+without losing an attempt. ``manage.py deliver_webhooks`` runs a pool as a
+standalone worker process.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+from time import monotonic
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from ..models import APIConnectSettings, Webhook, WebhookDeadLetter, WebhookDelivery, WebhookDeliveryAttempt
+from ..routing import sync_subscriptions
+from ..signals import rows_updated
+from .circuit import HALF_OPEN, CircuitBreaker
+from .envelope import EnvelopeCache, batch_body
+from .log import build_attempt, prune_attempts
+from .retry import RETRY_SHARE, build_dead_letter, schedule_retry
+from .scheduler import FairScheduler
+from .signing import Signer
+from .transport import HostBusy, Transport, TransportError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 100
+IDLE_POLL_SECONDS = 5
+MAX_ERROR_LENGTH = 1000
+# Deliveries held back while a half-open circuit's trial is in flight.
+HALF_OPEN_RETRY_SECONDS = 5
+# A sender waits this long for a slot at a host at its concurrency limit; the
+# delivery is then pushed back by HOST_BUSY_RETRY_SECONDS without using an
+# attempt, so one slow host can't hold every sender thread.
+HOST_BUSY_WAIT_SECONDS = 1
+HOST_BUSY_RETRY_SECONDS = 2
+LOG_PRUNE_INTERVAL = timedelta(hours=1)
+# Seconds a claimed delivery is reserved for its worker; must outlast a batch.
+DEFAULT_LEASE_SECONDS = 300
+# Claim attempts per batch when concurrent workers take every candidate.
+CLAIM_ROUNDS = 3
+
+
+def _unleased(now):
+    return Q(leased_until__isnull=True) | Q(leased_until__lte=now)
+
+
+def _in_order():
+    """Unordered rows and the head (oldest pending row) of each ordering partition."""
+    older = WebhookDelivery.objects.filter(
+        webhook_id=OuterRef('webhook_id'), ordering_key=OuterRef('ordering_key'), status='pending',
+    ).filter(Q(created_at__lt=OuterRef('created_at')) | Q(created_at=OuterRef('created_at'), pk__lt=OuterRef('pk')))
+    return Q(ordering_key='') | ~Exists(older)
+
+
+def _dashboard_state(webhook):
+    """The webhook fields the cached dashboard counts are built from."""
+    return webhook.is_active, webhook.circuit_state, webhook.failure_count > 0
+
+
+class DeliveryWorkerPool:
+    """Delivers pending outbox rows with ``workers`` concurrent senders."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, batch_size=DEFAULT_BATCH_SIZE, transport=None, breaker=None,
+                 signer=None, lease_seconds=None, scheduler=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        if lease_seconds is None:
+            lease_seconds = getattr(settings, 'API_CONNECT_DELIVERY_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+        self.lease = timedelta(seconds=lease_seconds)
+        self.worker_id = f'{socket.gethostname()[:60]}:{os.getpid()}'
+        # Shared by all sender threads: keep-alive connections are pooled per host.
+        self.transport = transport or Transport()
+        self.breaker = breaker or CircuitBreaker()
+        self.signer = signer or Signer()
+        self.scheduler = scheduler or FairScheduler()
+        # Endpoints whose single slot goes to a retry on their next claim.
+        self._retry_turns = set()
+        # Encoded event bodies, shared by every delivery, retry and batch of an event.
+        self.envelopes = EnvelopeCache()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='webhook-sender')
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_prune = None
+
+    # -- Draining ---------------------------------------------------------
+
+    def claim(self, hub_id=None):
+        """Lease due deliveries for the next batch, shared fairly across hubs and endpoints.
+
+        The scheduler splits the batch over the hubs with due rows, within
+        each hub's in-flight cap, and then over their endpoints. Within an
+        endpoint's slots, retries get at most ``RETRY_SHARE`` (but at least
+        one) while first attempts are waiting, and any capacity first attempts
+        leave unused; an endpoint granted a single slot alternates it between
+        the two from one claim to the next.
+        Of each ordering partition only the head is a candidate, so a head
+        waiting for its retry holds back its own partition and nothing else.
+        If other workers won every candidate, the claim is retried on the rows
+        left.
+        """
+        for _ in range(CLAIM_ROUNDS):
+            now = timezone.now()
+            due = WebhookDelivery.objects.filter(
+                _unleased(now), _in_order(), status='pending', next_attempt_at__lte=now,
+            )
+            if hub_id:
+                due = due.filter(hub_id=hub_id)
+            counts = list(due.values('hub_id', 'webhook_id').annotate(
+                first=Count('pk', filter=Q(attempts=0)), retries=Count('pk', filter=Q(attempts__gt=0)),
+            ).order_by())
+            backlog = {}
+            for row in counts:
+                backlog.setdefault(row['hub_id'], {})[row['webhook_id']] = row['first'] + row['retries']
+            allocation = self.scheduler.allocate(backlog, self.batch_size, self._room(backlog, now))
+            ids = self._pick(due, counts, allocation)
+            claimed = self._lease(ids, now)
+            if claimed or not ids:
+                return claimed
+        return []
+
+    def _room(self, backlog, now):
+        """Deliveries each capped hub of ``backlog`` may still lease."""
+        caps = dict(APIConnectSettings.all_objects.filter(
+            hub_id__in=list(backlog), delivery_max_in_flight__gt=0,
+        ).values_list('hub_id', 'delivery_max_in_flight'))
+        if not caps:
+            return {}
+        leased = dict(WebhookDelivery.objects.filter(
+            hub_id__in=list(caps), status='pending', leased_until__gt=now,
+        ).values('hub_id').annotate(n=Count('pk')).order_by().values_list('hub_id', 'n'))
+        return {hub_id: max(0, cap - leased.get(hub_id, 0)) for hub_id, cap in caps.items()}
+
+    def _pick(self, due, counts, allocation):
+        """Ids of the ``due`` rows ``allocation`` grants, oldest first within each endpoint."""
+        quotas = {}  # (webhook id, is retry) -> rows
+        for row in counts:
+            slots = allocation.get(row['webhook_id'])
+            if not slots:
+                continue
+            if slots == 1 and row['first'] and row['retries']:
+                # A single slot can't be split, so the kinds take turns.
+                retries = int(row['webhook_id'] in self._retry_turns)
+                self._retry_turns ^= {row['webhook_id']}
+            else:
+                retries = min(row['retries'], max(1, int(slots * RETRY_SHARE)))
+            first = min(row['first'], slots - retries)
+            quotas[row['webhook_id'], False] = first
+            quotas[row['webhook_id'], True] = min(row['retries'], slots - first)
+        if not quotas:
+            return []
+        is_retry = ExpressionWrapper(Q(attempts__gt=0), output_field=BooleanField())
+        rows = due.filter(webhook_id__in=list(allocation)).annotate(
+            is_retry=is_retry,
+            rank=Window(RowNumber(), partition_by=[F('webhook_id'), is_retry], order_by=[F('next_attempt_at'), F('pk')]),
+        ).filter(rank__lte=max(quotas.values())).values_list('pk', 'webhook_id', 'is_retry', 'rank', 'next_attempt_at')
+        picked = [row for row in rows if row[3] <= quotas.get((row[1], bool(row[2])), 0)]
+        return [row[0] for row in sorted(picked, key=lambda row: row[4])]
+
+    def _lease(self, ids, now):
+        """Lease the deliveries in ``ids`` no other worker holds and return them, in ``ids`` order."""
+        if not ids:
+            return []
+        token = f'{self.worker_id}/{uuid.uuid4().hex[:12]}'
+        locking = connection.features.has_select_for_update_skip_locked
+        # Without row locks (SQLite) a read-then-write transaction only adds
+        # lock upgrade conflicts; the lease UPDATE is safe on its own.
+        with transaction.atomic() if locking else nullcontext():
+            free = ids
+            if locking:
+                # Rows another worker is claiming right now are skipped, not waited for.
+                free = list(WebhookDelivery.objects.filter(pk__in=ids).select_for_update(
+                    skip_locked=True,
+                ).values_list('pk', flat=True))
+            # The lease filter makes this a compare-and-set: a row leased by a
+            # concurrent claim since it was read is left alone.
+            WebhookDelivery.objects.filter(_unleased(now), pk__in=free).update(
+                claimed_by=token, leased_until=now + self.lease, updated_at=now,
+            )
+        claimed = WebhookDelivery.objects.filter(pk__in=ids, claimed_by=token).select_related('webhook', 'event')
+        claimed = {d.pk: d for d in claimed}
+        return [claimed[pk] for pk in ids if pk in claimed]
+
+    def drain(self, hub_id=None):
+        """Deliver due rows until none are left or ``stop()`` is called; return how many were processed."""
+        total = 0
+        while not self._stopping.is_set():
+            batch = self.claim(hub_id)
+            if not batch:
+                self.prune_log()
+                break
+            self.process(batch)
+            total += len(batch)
+        return total
+
+    def process(self, deliveries):
+        now = timezone.now()
+        webhooks, shown = {}, {}
+        sendable, deferred, trials = [], [], set()
+        for delivery in deliveries:
+            if delivery.webhook_id not in webhooks:
+                shown[delivery.webhook_id] = _dashboard_state(delivery.webhook)
+            # Share one Webhook instance per endpoint so circuit changes stay consistent.
+            webhook = delivery.webhook = webhooks.setdefault(delivery.webhook_id, delivery.webhook)
+            if webhook.is_active and not webhook.is_deleted:
+                if not self.breaker.allow(webhook, now) or webhook.pk in trials:
+                    deferred.append(delivery)
+                    continue
+                if webhook.circuit_state == HALF_OPEN:
+                    trials.add(webhook.pk)
+            sendable.append(delivery)
+        jobs = self._coalesce(sendable, now)
+        envelopes = {}
+        for job in jobs:
+            for delivery in job:
+                if delivery.event_id not in envelopes:
+                    envelopes[delivery.event_id] = self.envelopes.get(delivery.event)
+        hub_settings = self._hub_settings({job[0].hub_id for job in jobs})
+        results = list(self._executor.map(
+            lambda job: self._send(job, envelopes, hub_settings[job[0].hub_id]), jobs,
+        ))
+        busy = [delivery for job, result in zip(jobs, results) if result is None for delivery in job]
+        sent = [(job, result) for job, result in zip(jobs, results) if result is not None]
+        self._defer(deferred, now)
+        self._defer(busy, now, until=now + timedelta(seconds=HOST_BUSY_RETRY_SECONDS))
+        self._record([job for job, _ in sent], [result for _, result in sent], now)
+        # Attempt counts are left to the stats TTL; only drop cached dashboards
+        # whose webhook counts (active, failing, circuit states) moved.
+        changed = {webhook.hub_id for pk, webhook in webhooks.items() if _dashboard_state(webhook) != shown[pk]}
+        if changed:
+            rows_updated.send(sender=Webhook, hub_ids=changed)
+
+    def _hub_settings(self, hub_ids):
+        """Settings of each hub in ``hub_ids`` in one query; unsaved defaults for hubs without a row."""
+        loaded = {obj.hub_id: obj for obj in APIConnectSettings.all_objects.filter(hub_id__in=list(hub_ids))}
+        return {hub_id: loaded.get(hub_id) or APIConnectSettings(hub_id=hub_id) for hub_id in hub_ids}
+
+    def _coalesce(self, deliveries, now):
+        """Group deliveries into POSTs and return them as a list of delivery lists.
+
+        Deliveries of a batching webhook are merged with its pending rows that
+        are still lingering, then sent ``batch_max_size`` at a time. A partial
+        batch waits until its oldest event has lingered ``batch_linger_seconds``
+        (retries never wait); its rows are pushed back to that moment.
+        """
+        jobs, groups = [], {}
+        for delivery in deliveries:
+            webhook = delivery.webhook
+            if webhook.batch_enabled and webhook.is_active and not webhook.is_deleted:
+                groups.setdefault(webhook.pk, []).append(delivery)
+            else:
+                jobs.append([delivery])
+        for webhook_id, group in groups.items():
+            webhook = group[0].webhook
+            size = max(1, webhook.batch_max_size)
+            lingering = self._lease(list(WebhookDelivery.objects.filter(
+                _unleased(now), _in_order(), webhook_id=webhook_id, status='pending', attempts=0, next_attempt_at__gt=now,
+            ).exclude(pk__in=[d.pk for d in group]).order_by('created_at').values_list('pk', flat=True)[:size]), now)
+            for delivery in lingering:
+                delivery.webhook = webhook
+                group.append(delivery)
+            group.sort(key=lambda d: d.created_at)
+            chunks = [group[i:i + size] for i in range(0, len(group), size)]
+            tail = chunks[-1]
+            flush_at = tail[0].created_at + timedelta(seconds=webhook.batch_linger_seconds)
+            if len(tail) < size and flush_at > now and not any(d.attempts for d in tail):
+                chunks.pop()
+                WebhookDelivery.objects.filter(pk__in=[d.pk for d in tail]).update(
+                    next_attempt_at=flush_at, claimed_by='', leased_until=None, updated_at=now,
+                )
+            jobs.extend(chunks)
+        return jobs
+
+    def _send(self, deliveries, envelopes, hub_settings):
+        """POST one delivery, or a batch as a JSON array.
+
+        Returns ``(status_code, error, counts_as_failure, elapsed, body)``.
+        A disabled webhook is not a delivery failure; ``counts_as_failure`` is
+        False, nothing is sent and the rows go straight to the dead-letter table.
+        Returns None when the host stayed at its limit; the rows are pushed back.
+        """
+        webhook = deliveries[0].webhook
+        if not webhook.is_active or webhook.is_deleted:
+            return None, 'Webhook is disabled', False, None, b''
+        if webhook.batch_enabled:
+            body = batch_body(envelopes[d.event_id] for d in deliveries)
+            headers = {'X-Webhook-Event': 'batch', 'X-Webhook-Batch-Size': str(len(deliveries))}
+        else:
+            delivery = deliveries[0]
+            body = envelopes[delivery.event_id].body
+            headers = {'X-Webhook-Event': delivery.event.event, 'X-Webhook-Delivery': str(delivery.id)}
+            if delivery.ordering_key:
+                headers['X-Webhook-Ordering-Key'] = delivery.ordering_key
+        headers.update(self.signer.headers(webhook.secret, body))
+        start = monotonic()
+        try:
+            response = self.transport.post(
+                webhook.url, body, headers,
+                connect_timeout=hub_settings.connect_timeout,
+                read_timeout=hub_settings.read_timeout,
+                max_per_host=hub_settings.max_connections_per_host,
+                hub_id=webhook.hub_id,
+                wait=HOST_BUSY_WAIT_SECONDS,
+            )
+        except HostBusy:
+            return None
+        except TransportError as e:
+            return None, str(e) or e.__class__.__name__, True, monotonic() - start, b''
+        if response.ok:
+            return response.status, '', False, response.elapsed, response.body
+        return response.status, f'HTTP {response.status}', True, response.elapsed, response.body
+
+    def prune_log(self, now=None):
+        """Drop expired delivery log days, at most once per ``LOG_PRUNE_INTERVAL``."""
+        now = now or timezone.now()
+        if self._last_prune and now - self._last_prune < LOG_PRUNE_INTERVAL:
+            return 0
+        self._last_prune = now
+        return prune_attempts(now.date())
+
+    def _defer(self, deliveries, now, until=None):
+        """Push back deliveries without using an attempt: to ``until``, or past their open circuit."""
+        for delivery in deliveries:
+            webhook = delivery.webhook
+            if until is not None:
+                delivery.next_attempt_at = until
+            elif webhook.circuit_state == HALF_OPEN:
+                delivery.next_attempt_at = now + timedelta(seconds=HALF_OPEN_RETRY_SECONDS)
+            else:
+                delivery.next_attempt_at = self.breaker.retry_at(webhook)
+            delivery.claimed_by, delivery.leased_until = '', None
+            delivery.updated_at = now
+        if deliveries:
+            WebhookDelivery.objects.bulk_update(
+                deliveries, ['next_attempt_at', 'claimed_by', 'leased_until', 'updated_at'],
+            )
+
+    def _record(self, jobs, results, now):
+        outcome = {}  # webhook_id -> ordered list of delivered (True) / failed (False), one per POST
+        deliveries, dead_letters, log = [], [], []
+        for job, (status, error, failure, elapsed, body) in zip(jobs, results):
+            for delivery in job:
+                delivery.attempts += 1
+                delivery.response_status = status
+                delivery.last_error = error[:MAX_ERROR_LENGTH]
+                delivery.claimed_by, delivery.leased_until = '', None
+                delivery.updated_at = now
+                if not error:
+                    delivery.status = 'delivered'
+                    delivery.delivered_at = now
+                elif not failure or not schedule_retry(delivery, now):
+                    delivery.status = 'failed'
+                    dead_letters.append(build_dead_letter(delivery))
+                deliveries.append(delivery)
+            if elapsed is not None:
+                log.append(build_attempt(job, status, error[:MAX_ERROR_LENGTH], elapsed, body, now))
+            if not error or failure:
+                outcome.setdefault(job[0].webhook_id, []).append(not error)
+        if not deliveries:
+            return
+        WebhookDelivery.objects.bulk_update(
+            deliveries,
+            [
+                'status', 'attempts', 'next_attempt_at', 'response_status', 'last_error', 'delivered_at',
+                'claimed_by', 'leased_until', 'updated_at',
+            ],
+        )
+        if dead_letters:
+            WebhookDeadLetter.objects.bulk_create(dead_letters)
+        if log:
+            WebhookDeliveryAttempt.objects.bulk_create(log)
+        webhooks = {d.webhook_id: d.webhook for d in deliveries}
+        disabled = []
+        for webhook_id, results in outcome.items():
+            webhook = webhooks[webhook_id]
+            changes = self.breaker.record(webhook, results, now)
+            limit = self.transport.host_limit(webhook.url, webhook.hub_id)
+            if limit and limit != webhook.concurrency_limit:
+                webhook.concurrency_limit = limit
+                Webhook.objects.filter(pk=webhook_id).update(concurrency_limit=limit)
+            if changes.get('is_active') is False:
+                logger.warning('Webhook %s disabled after %s consecutive failures', webhook_id, webhook.failure_count)
+                disabled.append(webhook)
+        sync_subscriptions(disabled)
+
+    # -- Background dispatcher ---------------------------------------------
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='webhook-dispatcher', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(IDLE_POLL_SECONDS)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Webhook outbox drain failed')
+            finally:
+                close_old_connections()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide worker pool, sized by ``API_CONNECT_DELIVERY_WORKERS``."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DeliveryWorkerPool(workers=getattr(settings, 'API_CONNECT_DELIVERY_WORKERS', DEFAULT_WORKERS))
+        return _pool
+
+
+def wake_workers():
+    """Signal the pool that new deliveries were committed."""
+    if getattr(settings, 'API_CONNECT_DELIVERY_AUTOSTART', True):
+        get_pool().wake()
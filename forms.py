@@ -6,20 +6,21 @@ from .models import APIKey, Webhook
 class APIKeyForm(forms.ModelForm):
     class Meta:
         model = APIKey
-        fields = ['name', 'key_prefix', 'key_hash', 'is_active', 'expires_at', 'last_used_at']
+        fields = ['name', 'is_active', 'expires_at', 'last_used_at', 'rate_limit_per_second', 'rate_limit_burst']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
-            'key_prefix': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
-            'key_hash': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
             'is_active': forms.CheckboxInput(attrs={'class': 'toggle'}),
             'expires_at': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'datetime-local'}),
             'last_used_at': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'datetime-local'}),
+            'rate_limit_per_second': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number'}),
+            'rate_limit_burst': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number'}),
         }
 
 class WebhookForm(forms.ModelForm):
     class Meta:
         model = Webhook
-        fields = ['name', 'url', 'events', 'is_active', 'secret', 'last_triggered_at', 'failure_count']
+        fields = ['name', 'url', 'events', 'is_active', 'secret', 'last_triggered_at', 'failure_count', 'max_attempts',
+                  'batch_enabled', 'batch_max_size', 'batch_linger_seconds']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
             'url': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'url'}),
@@ -28,5 +29,9 @@ class WebhookForm(forms.ModelForm):
             'secret': forms.TextInput(attrs={'class': 'input input-sm w-full'}),
             'last_triggered_at': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'datetime-local'}),
             'failure_count': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number'}),
+            'max_attempts': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number'}),
+            'batch_enabled': forms.CheckboxInput(attrs={'class': 'toggle'}),
+            'batch_max_size': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number'}),
+            'batch_linger_seconds': forms.TextInput(attrs={'class': 'input input-sm w-full', 'type': 'number'}),
         }
 
@@ -0,0 +1,64 @@
+"""
+Run a webhook delivery worker process.
+
+Any number of these can run side by side, on one host or many: each batch is
+claimed with leases, so no delivery is sent by two workers. Web processes
+should then set ``API_CONNECT_DELIVERY_AUTOSTART = False`` so they only queue
+events.
+"""
+import logging
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api_connect.delivery.worker import (
+    DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, IDLE_POLL_SECONDS, DeliveryWorkerPool,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued webhook events until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Concurrent sender threads')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Deliveries claimed per batch')
+        parser.add_argument('--lease', type=int, default=None, help='Seconds a claimed batch stays reserved')
+        parser.add_argument('--poll', type=float, default=IDLE_POLL_SECONDS, help='Seconds to sleep when idle')
+        parser.add_argument('--hub', default=None, help='Only deliver events of this hub')
+        parser.add_argument('--once', action='store_true', help='Exit once no delivery is due')
+
+    def handle(self, *args, **options):
+        pool = DeliveryWorkerPool(
+            workers=options['workers'], batch_size=options['batch_size'], lease_seconds=options['lease'],
+        )
+        stopping = threading.Event()
+
+        def stop(*_):
+            stopping.set()
+            pool.stop()  # the current batch finishes, no new one is claimed
+
+        previous = {signum: signal.signal(signum, stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        self.stdout.write(f'Delivery worker {pool.worker_id} started')
+        total = 0
+        try:
+            while not stopping.is_set():
+                close_old_connections()
+                try:
+                    processed = pool.drain(options['hub'])
+                except Exception:
+                    logger.exception('Webhook outbox drain failed')
+                    processed = 0
+                total += processed
+                if options['once']:
+                    break
+                if not processed:
+                    stopping.wait(options['poll'])
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+            pool.transport.close()
+        self.stdout.write(f'Delivery worker {pool.worker_id} stopped after {total} deliveries')
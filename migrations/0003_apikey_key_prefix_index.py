@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0002_webhook_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='apikey',
+            name='key_prefix',
+            field=models.CharField(db_index=True, max_length=10, verbose_name='Key Prefix'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+import re
+import uuid
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def parse_event_names(events):
+    if isinstance(events, str):
+        events = re.split(r'[\s,]+', events.strip('[]'))
+    elif isinstance(events, dict):
+        events = list(events.keys())
+    elif not isinstance(events, (list, tuple)):
+        return []
+    return [str(e).strip().strip('\'"') for e in events if str(e).strip().strip('\'"')]
+
+
+def backfill_subscriptions(apps, schema_editor):
+    Webhook = apps.get_model('api_connect', 'Webhook')
+    WebhookSubscription = apps.get_model('api_connect', 'WebhookSubscription')
+    rows = []
+    for webhook in Webhook.objects.filter(is_active=True, is_deleted=False).iterator():
+        for event in dict.fromkeys(parse_event_names(webhook.events)):
+            rows.append(WebhookSubscription(hub_id=webhook.hub_id, webhook_id=webhook.pk, event=event[:100]))
+    WebhookSubscription.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0003_apikey_key_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookSubscription',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('event', models.CharField(max_length=100, verbose_name='Event')),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to='api_connect.webhook', verbose_name='Webhook')),
+            ],
+            options={
+                'db_table': 'api_connect_webhooksubscription',
+                'abstract': False,
+                'indexes': [models.Index(fields=['hub_id', 'event'], name='api_connect_sub_route_idx')],
+                'constraints': [models.UniqueConstraint(fields=('webhook', 'event'), name='api_connect_sub_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_subscriptions, migrations.RunPython.noop),
+    ]
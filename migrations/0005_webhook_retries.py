@@ -0,0 +1,56 @@
+import uuid
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0004_webhooksubscription'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='max_attempts',
+            field=models.PositiveIntegerField(default=8, verbose_name='Max Attempts'),
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt At'),
+        ),
+        migrations.RemoveIndex(
+            model_name='webhookdelivery',
+            name='api_connect_dlv_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='api_connect_dlv_due_idx'),
+        ),
+        migrations.CreateModel(
+            name='WebhookDeadLetter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('response_status', models.PositiveIntegerField(blank=True, null=True, verbose_name='Response Status')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('replayed_at', models.DateTimeField(blank=True, null=True, verbose_name='Replayed At')),
+                ('delivery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='api_connect.webhookdelivery', verbose_name='Delivery')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='api_connect.webhookevent', verbose_name='Event')),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dead_letters', to='api_connect.webhook', verbose_name='Webhook')),
+            ],
+            options={
+                'db_table': 'api_connect_webhookdeadletter',
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0005_webhook_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='circuit_state',
+            field=models.CharField(choices=[('closed', 'Closed'), ('open', 'Open'), ('half_open', 'Half-open')], default='closed', max_length=20, verbose_name='Circuit State'),
+        ),
+        migrations.AddField(
+            model_name='webhook',
+            name='circuit_opened_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Circuit Opened At'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0006_webhook_circuit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIConnectSettings',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('connect_timeout', models.PositiveIntegerField(default=5, verbose_name='Connect Timeout (s)')),
+                ('read_timeout', models.PositiveIntegerField(default=10, verbose_name='Read Timeout (s)')),
+                ('max_connections_per_host', models.PositiveIntegerField(default=8, verbose_name='Max Connections per Host')),
+            ],
+            options={
+                'db_table': 'api_connect_settings',
+                'abstract': False,
+                'unique_together': {('hub_id',)},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0007_apiconnectsettings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='batch_enabled',
+            field=models.BooleanField(default=False, verbose_name='Batch Enabled'),
+        ),
+        migrations.AddField(
+            model_name='webhook',
+            name='batch_max_size',
+            field=models.PositiveIntegerField(default=100, verbose_name='Batch Max Size'),
+        ),
+        migrations.AddField(
+            model_name='webhook',
+            name='batch_linger_seconds',
+            field=models.PositiveIntegerField(default=5, verbose_name='Batch Linger Seconds'),
+        ),
+    ]
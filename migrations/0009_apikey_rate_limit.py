@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0008_webhook_batching'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apikey',
+            name='rate_limit_per_second',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rate Limit Per Second'),
+        ),
+        migrations.AddField(
+            model_name='apikey',
+            name='rate_limit_burst',
+            field=models.PositiveIntegerField(default=0, verbose_name='Rate Limit Burst'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+import uuid
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0009_apikey_rate_limit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIKeyUsage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('granularity', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour')], max_length=10, verbose_name='Granularity')),
+                ('period_start', models.DateTimeField(verbose_name='Period Start')),
+                ('request_count', models.PositiveIntegerField(default=0, verbose_name='Requests')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Errors')),
+                ('latency_total_ms', models.PositiveBigIntegerField(default=0, verbose_name='Total Latency (ms)')),
+                ('latency_histogram', models.JSONField(default=list, verbose_name='Latency Histogram')),
+                ('api_key', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='api_connect.apikey', verbose_name='API Key')),
+            ],
+            options={
+                'db_table': 'api_connect_apikeyusage',
+                'abstract': False,
+                'indexes': [models.Index(fields=['hub_id', 'granularity', 'period_start'], name='api_connect_usage_period_idx')],
+                'constraints': [models.UniqueConstraint(fields=('api_key', 'granularity', 'period_start'), name='api_connect_usage_unique')],
+            },
+        ),
+    ]
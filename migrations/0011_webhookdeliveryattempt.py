@@ -0,0 +1,46 @@
+import uuid
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0010_apikeyusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiconnectsettings',
+            name='delivery_log_retention_days',
+            field=models.PositiveIntegerField(default=14, verbose_name='Delivery Log Retention (days)'),
+        ),
+        migrations.CreateModel(
+            name='WebhookDeliveryAttempt',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('hub_id', models.UUIDField(blank=True, db_index=True, editable=False, help_text='Hub this record belongs to (for multi-tenancy)', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.UUIDField(blank=True, help_text='UUID of the user who created this record', null=True)),
+                ('updated_by', models.UUIDField(blank=True, help_text='UUID of the user who last updated this record', null=True)),
+                ('is_deleted', models.BooleanField(db_index=True, default=False, help_text='Soft delete flag - record is hidden but not removed')),
+                ('deleted_at', models.DateTimeField(blank=True, help_text='Timestamp when record was soft deleted', null=True)),
+                ('event_name', models.CharField(max_length=100, verbose_name='Event')),
+                ('attempt', models.PositiveIntegerField(default=1, verbose_name='Attempt')),
+                ('batch_size', models.PositiveIntegerField(default=1, verbose_name='Batch Size')),
+                ('response_status', models.PositiveIntegerField(blank=True, null=True, verbose_name='Response Status')),
+                ('latency_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Latency (ms)')),
+                ('response_body', models.TextField(blank=True, verbose_name='Response Body')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('delivery', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt_log', to='api_connect.webhookdelivery', verbose_name='Delivery')),
+                ('webhook', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_attempts', to='api_connect.webhook', verbose_name='Webhook')),
+            ],
+            options={
+                'db_table': 'api_connect_webhookdeliveryattempt',
+                'abstract': False,
+                'indexes': [models.Index(fields=['webhook', 'created_at', 'id'], name='api_connect_att_hist_idx'), models.Index(fields=['day', 'hub_id'], name='api_connect_att_day_idx')],
+            },
+        ),
+    ]
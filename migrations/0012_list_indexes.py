@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0011_webhookdeliveryattempt'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apikey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'name', 'id'], name='api_connect_key_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apikey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='api_connect_key_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apikey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'expires_at', 'id'], name='api_connect_key_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='apikey',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'last_used_at', 'id'], name='api_connect_key_used_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhook',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'name', 'id'], name='api_connect_hook_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='webhook',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['hub_id', 'created_at', 'id'], name='api_connect_hook_created_idx'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+import sqlite3
+
+from django.db import migrations
+
+# PostgreSQL: pg_trgm GIN indexes that serve icontains on these columns.
+POSTGRESQL_CREATE = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS api_connect_apikey_name_trgm ON api_connect_apikey '
+    'USING gin (UPPER(name::text) gin_trgm_ops) WHERE NOT is_deleted',
+    'CREATE INDEX IF NOT EXISTS api_connect_apikey_key_prefix_trgm ON api_connect_apikey '
+    'USING gin (UPPER(key_prefix::text) gin_trgm_ops) WHERE NOT is_deleted',
+    'CREATE INDEX IF NOT EXISTS api_connect_webhook_name_trgm ON api_connect_webhook '
+    'USING gin (UPPER(name::text) gin_trgm_ops) WHERE NOT is_deleted',
+    'CREATE INDEX IF NOT EXISTS api_connect_webhook_url_trgm ON api_connect_webhook '
+    'USING gin (UPPER(url::text) gin_trgm_ops) WHERE NOT is_deleted',
+]
+POSTGRESQL_DROP = [
+    'DROP INDEX IF EXISTS api_connect_apikey_name_trgm',
+    'DROP INDEX IF EXISTS api_connect_apikey_key_prefix_trgm',
+    'DROP INDEX IF EXISTS api_connect_webhook_name_trgm',
+    'DROP INDEX IF EXISTS api_connect_webhook_url_trgm',
+]
+
+# SQLite 3.34+: external-content FTS5 trigram tables kept in sync by
+# triggers. The update triggers fire only for the searched columns.
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS api_connect_apikey_fts USING fts5("
+    "name, key_prefix, content='api_connect_apikey', content_rowid='rowid', tokenize='trigram')",
+    'CREATE TRIGGER api_connect_apikey_fts_ai AFTER INSERT ON api_connect_apikey BEGIN '
+    'INSERT INTO api_connect_apikey_fts(rowid, name, key_prefix) VALUES (new.rowid, new.name, new.key_prefix); END',
+    'CREATE TRIGGER api_connect_apikey_fts_ad AFTER DELETE ON api_connect_apikey BEGIN '
+    "INSERT INTO api_connect_apikey_fts(api_connect_apikey_fts, rowid, name, key_prefix) "
+    "VALUES ('delete', old.rowid, old.name, old.key_prefix); END",
+    'CREATE TRIGGER api_connect_apikey_fts_au AFTER UPDATE OF name, key_prefix ON api_connect_apikey BEGIN '
+    "INSERT INTO api_connect_apikey_fts(api_connect_apikey_fts, rowid, name, key_prefix) "
+    "VALUES ('delete', old.rowid, old.name, old.key_prefix); "
+    'INSERT INTO api_connect_apikey_fts(rowid, name, key_prefix) VALUES (new.rowid, new.name, new.key_prefix); END',
+    "INSERT INTO api_connect_apikey_fts(api_connect_apikey_fts) VALUES ('rebuild')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS api_connect_webhook_fts USING fts5("
+    "name, url, content='api_connect_webhook', content_rowid='rowid', tokenize='trigram')",
+    'CREATE TRIGGER api_connect_webhook_fts_ai AFTER INSERT ON api_connect_webhook BEGIN '
+    'INSERT INTO api_connect_webhook_fts(rowid, name, url) VALUES (new.rowid, new.name, new.url); END',
+    'CREATE TRIGGER api_connect_webhook_fts_ad AFTER DELETE ON api_connect_webhook BEGIN '
+    "INSERT INTO api_connect_webhook_fts(api_connect_webhook_fts, rowid, name, url) "
+    "VALUES ('delete', old.rowid, old.name, old.url); END",
+    'CREATE TRIGGER api_connect_webhook_fts_au AFTER UPDATE OF name, url ON api_connect_webhook BEGIN '
+    "INSERT INTO api_connect_webhook_fts(api_connect_webhook_fts, rowid, name, url) "
+    "VALUES ('delete', old.rowid, old.name, old.url); "
+    'INSERT INTO api_connect_webhook_fts(rowid, name, url) VALUES (new.rowid, new.name, new.url); END',
+    "INSERT INTO api_connect_webhook_fts(api_connect_webhook_fts) VALUES ('rebuild')",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER IF EXISTS api_connect_apikey_fts_ai',
+    'DROP TRIGGER IF EXISTS api_connect_apikey_fts_ad',
+    'DROP TRIGGER IF EXISTS api_connect_apikey_fts_au',
+    'DROP TABLE IF EXISTS api_connect_apikey_fts',
+    'DROP TRIGGER IF EXISTS api_connect_webhook_fts_ai',
+    'DROP TRIGGER IF EXISTS api_connect_webhook_fts_ad',
+    'DROP TRIGGER IF EXISTS api_connect_webhook_fts_au',
+    'DROP TABLE IF EXISTS api_connect_webhook_fts',
+]
+
+
+def _statements(schema_editor, postgresql, sqlite):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        return postgresql
+    # The trigram tokenizer needs SQLite 3.34+; older versions search unindexed.
+    if vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0):
+        return sqlite
+    return []
+
+
+def create(apps, schema_editor):
+    for statement in _statements(schema_editor, POSTGRESQL_CREATE, SQLITE_CREATE):
+        schema_editor.execute(statement)
+
+
+def drop(apps, schema_editor):
+    for statement in _statements(schema_editor, POSTGRESQL_DROP, SQLITE_DROP):
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0012_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create, drop),
+    ]
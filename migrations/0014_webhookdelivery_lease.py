@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0013_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='claimed_by',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Claimed By'),
+        ),
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='leased_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Leased Until'),
+        ),
+    ]
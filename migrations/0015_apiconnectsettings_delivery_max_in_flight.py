@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0014_webhookdelivery_lease'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apiconnectsettings',
+            name='delivery_max_in_flight',
+            field=models.PositiveIntegerField(default=0, verbose_name='Max Deliveries in Flight'),
+        ),
+    ]
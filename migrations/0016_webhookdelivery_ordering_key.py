@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0015_apiconnectsettings_delivery_max_in_flight'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookdelivery',
+            name='ordering_key',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Ordering Key'),
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(condition=models.Q(('status', 'pending'), models.Q(('ordering_key', ''), _negated=True)), fields=['webhook', 'ordering_key', 'created_at'], name='api_connect_dlv_order_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+import sqlite3
+
+from django.db import migrations, models
+
+# Adding the column rebuilds the table on SQLite, dropping the FTS triggers
+# from 0013 and changing rowids; recreate them and repopulate the index.
+SQLITE_RECREATE_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS api_connect_webhook_fts_ai',
+    'DROP TRIGGER IF EXISTS api_connect_webhook_fts_ad',
+    'DROP TRIGGER IF EXISTS api_connect_webhook_fts_au',
+    'CREATE TRIGGER api_connect_webhook_fts_ai AFTER INSERT ON api_connect_webhook BEGIN '
+    'INSERT INTO api_connect_webhook_fts(rowid, name, url) VALUES (new.rowid, new.name, new.url); END',
+    'CREATE TRIGGER api_connect_webhook_fts_ad AFTER DELETE ON api_connect_webhook BEGIN '
+    "INSERT INTO api_connect_webhook_fts(api_connect_webhook_fts, rowid, name, url) "
+    "VALUES ('delete', old.rowid, old.name, old.url); END",
+    'CREATE TRIGGER api_connect_webhook_fts_au AFTER UPDATE OF name, url ON api_connect_webhook BEGIN '
+    "INSERT INTO api_connect_webhook_fts(api_connect_webhook_fts, rowid, name, url) "
+    "VALUES ('delete', old.rowid, old.name, old.url); "
+    'INSERT INTO api_connect_webhook_fts(rowid, name, url) VALUES (new.rowid, new.name, new.url); END',
+    "INSERT INTO api_connect_webhook_fts(api_connect_webhook_fts) VALUES ('rebuild')",
+]
+
+
+def recreate_search_index(apps, schema_editor):
+    # PostgreSQL adds the column in place and keeps its trigram indexes.
+    if schema_editor.connection.vendor == 'sqlite' and sqlite3.sqlite_version_info >= (3, 34, 0):
+        for statement in SQLITE_RECREATE_SEARCH_INDEX:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_connect', '0016_webhookdelivery_ordering_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhook',
+            name='concurrency_limit',
+            field=models.PositiveIntegerField(default=0, verbose_name='Concurrency Limit'),
+        ),
+        migrations.RunPython(recreate_search_index, migrations.RunPython.noop),
+    ]
@@ -1,24 +1,111 @@
+import re
+
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from apps.core.models.base import HubBaseModel
 
+class APIConnectSettings(HubBaseModel):
+    """Per-hub configuration for the API & Webhooks module."""
+    connect_timeout = models.PositiveIntegerField(default=5, verbose_name=_('Connect Timeout (s)'))
+    read_timeout = models.PositiveIntegerField(default=10, verbose_name=_('Read Timeout (s)'))
+    max_connections_per_host = models.PositiveIntegerField(default=8, verbose_name=_('Max Connections per Host'))
+    delivery_log_retention_days = models.PositiveIntegerField(default=14, verbose_name=_('Delivery Log Retention (days)'))
+    # Deliveries of the hub leased at once across all workers; 0 = no cap.
+    delivery_max_in_flight = models.PositiveIntegerField(default=0, verbose_name=_('Max Deliveries in Flight'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_settings'
+        unique_together = [('hub_id',)]
+
+    def __str__(self):
+        return f'API & Webhooks settings ({self.hub_id})'
+
+    @classmethod
+    def get_settings(cls, hub_id):
+        settings, _ = cls.all_objects.get_or_create(hub_id=hub_id)
+        return settings
+
+
 class APIKey(HubBaseModel):
     name = models.CharField(max_length=255, verbose_name=_('Name'))
-    key_prefix = models.CharField(max_length=10, verbose_name=_('Key Prefix'))
+    key_prefix = models.CharField(max_length=10, db_index=True, verbose_name=_('Key Prefix'))
     key_hash = models.CharField(max_length=255, verbose_name=_('Key Hash'))
     is_active = models.BooleanField(default=True, verbose_name=_('Is Active'))
     expires_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Expires At'))
     last_used_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Last Used At'))
+    rate_limit_per_second = models.PositiveIntegerField(default=0, verbose_name=_('Rate Limit Per Second'))
+    rate_limit_burst = models.PositiveIntegerField(default=0, verbose_name=_('Rate Limit Burst'))
 
     class Meta(HubBaseModel.Meta):
         db_table = 'api_connect_apikey'
+        # One partial index per list sort column, matching the hub_id filter
+        # and the (sort column, id) keyset order of the views.
+        indexes = [
+            models.Index(fields=['hub_id', 'name', 'id'], name='api_connect_key_name_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='api_connect_key_created_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'expires_at', 'id'], name='api_connect_key_expires_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'last_used_at', 'id'], name='api_connect_key_used_idx', condition=models.Q(is_deleted=False)),
+        ]
 
     def __str__(self):
         return self.name
 
 
+# Upper bounds (ms) of the request latency histogram; one more slot counts slower requests.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class APIKeyUsage(HubBaseModel):
+    """Request metrics of one API key over one minute or one hour."""
+    GRANULARITY_CHOICES = [
+        ('minute', _('Minute')),
+        ('hour', _('Hour')),
+    ]
+
+    api_key = models.ForeignKey(APIKey, on_delete=models.CASCADE, related_name='usage', verbose_name=_('API Key'))
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES, verbose_name=_('Granularity'))
+    period_start = models.DateTimeField(verbose_name=_('Period Start'))
+    request_count = models.PositiveIntegerField(default=0, verbose_name=_('Requests'))
+    error_count = models.PositiveIntegerField(default=0, verbose_name=_('Errors'))
+    latency_total_ms = models.PositiveBigIntegerField(default=0, verbose_name=_('Total Latency (ms)'))
+    latency_histogram = models.JSONField(default=list, verbose_name=_('Latency Histogram'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_apikeyusage'
+        indexes = [
+            models.Index(fields=['hub_id', 'granularity', 'period_start'], name='api_connect_usage_period_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['api_key', 'granularity', 'period_start'], name='api_connect_usage_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.api_key_id} {self.granularity} {self.period_start:%Y-%m-%d %H:%M}'
+
+    @property
+    def avg_latency_ms(self):
+        return self.latency_total_ms / self.request_count if self.request_count else None
+
+    def latency_percentile(self, q):
+        """Upper bound (ms) of the histogram bucket holding the ``q`` quantile."""
+        target = q * sum(self.latency_histogram)
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS + (None,), self.latency_histogram):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return None
+
+
 class Webhook(HubBaseModel):
+    CIRCUIT_STATE_CHOICES = [
+        ('closed', _('Closed')),
+        ('open', _('Open')),
+        ('half_open', _('Half-open')),
+    ]
+
     name = models.CharField(max_length=255, verbose_name=_('Name'))
     url = models.URLField(verbose_name=_('Url'))
     events = models.JSONField(default=list, verbose_name=_('Events'))
@@ -26,10 +113,168 @@ class Webhook(HubBaseModel):
     secret = models.CharField(max_length=255, blank=True, verbose_name=_('Secret'))
     last_triggered_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Last Triggered At'))
     failure_count = models.PositiveIntegerField(default=0, verbose_name=_('Failure Count'))
+    # Adaptive limit of concurrent POSTs to the URL's host as last seen by a worker; 0 = not measured yet.
+    concurrency_limit = models.PositiveIntegerField(default=0, verbose_name=_('Concurrency Limit'))
+    max_attempts = models.PositiveIntegerField(default=8, verbose_name=_('Max Attempts'))
+    circuit_state = models.CharField(max_length=20, choices=CIRCUIT_STATE_CHOICES, default='closed', verbose_name=_('Circuit State'))
+    circuit_opened_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Circuit Opened At'))
+    batch_enabled = models.BooleanField(default=False, verbose_name=_('Batch Enabled'))
+    batch_max_size = models.PositiveIntegerField(default=100, verbose_name=_('Batch Max Size'))
+    batch_linger_seconds = models.PositiveIntegerField(default=5, verbose_name=_('Batch Linger Seconds'))
 
     class Meta(HubBaseModel.Meta):
         db_table = 'api_connect_webhook'
+        indexes = [
+            models.Index(fields=['hub_id', 'name', 'id'], name='api_connect_hook_name_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['hub_id', 'created_at', 'id'], name='api_connect_hook_created_idx', condition=models.Q(is_deleted=False)),
+        ]
 
     def __str__(self):
         return self.name
 
+    def get_event_names(self):
+        """Return the subscribed event names as a list of strings.
+
+        ``events`` is edited as free text in the UI, so it may hold a JSON
+        list, a comma/whitespace separated string or (legacy) a dict.
+        """
+        events = self.events
+        if isinstance(events, str):
+            events = re.split(r'[\s,]+', events.strip('[]'))
+        elif isinstance(events, dict):
+            events = list(events.keys())
+        elif not isinstance(events, (list, tuple)):
+            return []
+        return [str(e).strip().strip('\'"') for e in events if str(e).strip().strip('\'"')]
+
+    def is_subscribed(self, event):
+        from .routing import event_patterns
+        return not set(event_patterns(event)).isdisjoint(self.get_event_names())
+
+
+class WebhookSubscription(HubBaseModel):
+    """Normalized ``Webhook.events`` entry used to route events to webhooks.
+
+    Rows only exist for active, non-deleted webhooks and are rebuilt by
+    ``routing.sync_subscriptions()`` from a ``post_save`` receiver whenever a
+    webhook is saved; ``QuerySet.update()`` callers send ``rows_updated``.
+    """
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='subscriptions', verbose_name=_('Webhook'))
+    event = models.CharField(max_length=100, verbose_name=_('Event'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_webhooksubscription'
+        indexes = [
+            models.Index(fields=['hub_id', 'event'], name='api_connect_sub_route_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['webhook', 'event'], name='api_connect_sub_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.event} -> {self.webhook_id}'
+
+
+class WebhookEvent(HubBaseModel):
+    """An event written to the delivery outbox, shared by all its deliveries."""
+    event = models.CharField(max_length=100, verbose_name=_('Event'))
+    payload = models.JSONField(default=dict, blank=True, verbose_name=_('Payload'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_webhookevent'
+
+    def __str__(self):
+        return self.event
+
+
+class WebhookDelivery(HubBaseModel):
+    """Outbox row: one pending or completed POST of an event to a webhook.
+
+    Failed attempts stay ``pending`` with a backed-off ``next_attempt_at``
+    until ``webhook.max_attempts`` is reached; the delivery is then marked
+    ``failed`` and copied to the dead-letter table. A worker sending the row
+    holds a lease on it (``claimed_by``/``leased_until``) so no other worker
+    picks it up; a lease left behind by a crashed worker simply expires.
+    Deliveries of one webhook sharing an ``ordering_key`` form a partition
+    that is sent strictly in ``created_at`` order.
+    """
+    STATUS_CHOICES = [
+        ('pending', _('Pending')),
+        ('delivered', _('Delivered')),
+        ('failed', _('Failed')),
+    ]
+
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='deliveries', verbose_name=_('Webhook'))
+    event = models.ForeignKey(WebhookEvent, on_delete=models.CASCADE, related_name='deliveries', verbose_name=_('Event'))
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name=_('Status'))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('Attempts'))
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name=_('Next Attempt At'))
+    response_status = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Response Status'))
+    last_error = models.TextField(blank=True, verbose_name=_('Last Error'))
+    delivered_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Delivered At'))
+    claimed_by = models.CharField(max_length=100, blank=True, default='', verbose_name=_('Claimed By'))
+    leased_until = models.DateTimeField(null=True, blank=True, verbose_name=_('Leased Until'))
+    ordering_key = models.CharField(max_length=100, blank=True, default='', verbose_name=_('Ordering Key'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_webhookdelivery'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='api_connect_dlv_due_idx'),
+            # Finds the head of a partition: its oldest pending delivery.
+            models.Index(
+                fields=['webhook', 'ordering_key', 'created_at'], name='api_connect_dlv_order_idx',
+                condition=models.Q(status='pending') & ~models.Q(ordering_key=''),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.event_id} -> {self.webhook_id} ({self.status})'
+
+
+class WebhookDeliveryAttempt(HubBaseModel):
+    """One POST to a webhook: what was sent and what the subscriber answered.
+
+    Rows are bucketed by ``day`` so expired days are dropped with one
+    set-based DELETE per retention window.
+    """
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='delivery_attempts', verbose_name=_('Webhook'))
+    delivery = models.ForeignKey(
+        WebhookDelivery, on_delete=models.SET_NULL, null=True, blank=True, related_name='attempt_log',
+        verbose_name=_('Delivery'),
+    )
+    event_name = models.CharField(max_length=100, verbose_name=_('Event'))
+    attempt = models.PositiveIntegerField(default=1, verbose_name=_('Attempt'))
+    batch_size = models.PositiveIntegerField(default=1, verbose_name=_('Batch Size'))
+    response_status = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Response Status'))
+    latency_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Latency (ms)'))
+    response_body = models.TextField(blank=True, verbose_name=_('Response Body'))
+    error = models.TextField(blank=True, verbose_name=_('Error'))
+    day = models.DateField(verbose_name=_('Day'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_webhookdeliveryattempt'
+        indexes = [
+            models.Index(fields=['webhook', 'created_at', 'id'], name='api_connect_att_hist_idx'),
+            models.Index(fields=['day', 'hub_id'], name='api_connect_att_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.event_name} -> {self.webhook_id} #{self.attempt}'
+
+
+class WebhookDeadLetter(HubBaseModel):
+    """A delivery that exhausted its attempts, kept for inspection and replay."""
+    webhook = models.ForeignKey(Webhook, on_delete=models.CASCADE, related_name='dead_letters', verbose_name=_('Webhook'))
+    event = models.ForeignKey(WebhookEvent, on_delete=models.CASCADE, related_name='dead_letters', verbose_name=_('Event'))
+    delivery = models.ForeignKey(WebhookDelivery, on_delete=models.CASCADE, related_name='dead_letters', verbose_name=_('Delivery'))
+    attempts = models.PositiveIntegerField(default=0, verbose_name=_('Attempts'))
+    response_status = models.PositiveIntegerField(null=True, blank=True, verbose_name=_('Response Status'))
+    last_error = models.TextField(blank=True, verbose_name=_('Last Error'))
+    replayed_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Replayed At'))
+
+    class Meta(HubBaseModel.Meta):
+        db_table = 'api_connect_webhookdeadletter'
+
+    def __str__(self):
+        return f'{self.event_id} -> {self.webhook_id}'
+
@@ -0,0 +1,184 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with ``WHERE (sort columns) < (last row's values)`` on an
+index instead of ``OFFSET``, so the cost of a page does not grow with its
+depth and no COUNT query is needed. The cursor is an opaque, URL-safe token
+holding the sort values of the last row shown.
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import F, Q
+
+
+def encode_cursor(values):
+    raw = json.dumps([None if v is None else str(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size, model_fields=None):
+    """Return the list of values in ``cursor``, or ``None`` if it is malformed.
+
+    With ``model_fields`` (one model field, or ``None`` to leave the value as
+    is, per sort column) each value is converted with ``to_python()``; a value
+    the field rejects makes the cursor malformed too.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    if model_fields:
+        try:
+            values = [
+                value if field is None or value is None else field.to_python(value)
+                for field, value in zip(model_fields, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+    return values
+
+
+def _after(field, value, descending, nullable):
+    """``Q`` for rows whose ``field`` sorts strictly after ``value``.
+
+    NULLs always sort last in ascending order (first when descending), the
+    way ``paginate_keyset`` orders them. ``None`` means no row can follow.
+    """
+    if value is None:
+        return Q(**{f'{field}__isnull': False}) if descending else None
+    if descending:
+        return Q(**{f'{field}__lt': value})
+    condition = Q(**{f'{field}__gt': value})
+    if nullable:
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+def _equal(field, value):
+    return Q(**{f'{field}__isnull': True}) if value is None else Q(**{field: value})
+
+
+def _bound(field, value, descending, nullable):
+    """Redundant range on the leading sort column, so the index can seek to it."""
+    if value is None:
+        return Q() if descending else Q(**{f'{field}__isnull': True})
+    if descending:
+        return Q(**{f'{field}__lte': value})
+    return Q() if nullable else Q(**{f'{field}__gte': value})
+
+
+def keyset_filter(fields, values, descending, nullable=()):
+    """``Q`` matching rows strictly after ``values`` in ``fields`` order."""
+    condition = Q(pk__in=[])
+    for i, field in enumerate(fields):
+        step = _after(field, values[i], descending, field in nullable)
+        if step is None:
+            continue
+        for prev_field, prev_value in zip(fields[:i], values[:i]):
+            step &= _equal(prev_field, prev_value)
+        condition |= step
+    return _bound(fields[0], values[0], descending, fields[0] in nullable) & condition
+
+
+def _model_field(qs, field):
+    """Model field behind sort column ``field``, or ``None`` for annotations."""
+    if field == 'pk':
+        return qs.model._meta.pk
+    try:
+        return qs.model._meta.get_field(field)
+    except FieldDoesNotExist:
+        return None
+
+
+def _nullable_fields(qs, fields):
+    nullable = set()
+    for field in fields:
+        model_field = _model_field(qs, field)
+        if model_field is None or model_field.null:
+            nullable.add(field)  # annotations may be NULL
+    return nullable
+
+
+def _ordering(fields, descending, nullable):
+    # Only nullable columns get an explicit NULLS placement: on some backends
+    # (SQLite) it stops an index from providing the order.
+    if descending:
+        return [F(f).desc(nulls_first=True) if f in nullable else F(f).desc() for f in fields]
+    return [F(f).asc(nulls_last=True) if f in nullable else F(f).asc() for f in fields]
+
+
+def keyset_queryset(qs, fields, values=None, descending=True):
+    """``qs`` ordered by ``fields`` and limited to rows after ``values``, if given."""
+    nullable = _nullable_fields(qs, fields)
+    if values is not None:
+        qs = qs.filter(keyset_filter(fields, values, descending, nullable))
+    return qs.order_by(*_ordering(fields, descending, nullable))
+
+
+def _row_values(row, fields):
+    # Rows are model instances, or dicts from ``values()`` querysets.
+    if isinstance(row, dict):
+        return [row[f] for f in fields]
+    return [getattr(row, f) for f in fields]
+
+
+class KeysetPage:
+    """One page of rows plus the cursors of its neighbours, if any."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def paginate_keyset(qs, fields, cursor=None, per_page=24, descending=True, before=None):
+    """Return the ``KeysetPage`` of ``qs`` ordered by ``fields``.
+
+    The page starts after ``cursor``, or ends before ``before`` when paging
+    backwards. ``fields`` must end with a unique column (usually ``id``) so
+    the order is total, and should match an index for the page query to stay
+    cheap. ``values()`` querysets work too, as long as they select ``fields``.
+    No COUNT query is run. A cursor that can't be decoded, or whose values
+    don't fit the sort columns, gives the first page.
+    """
+    model_fields = [_model_field(qs, field) for field in fields]
+    backwards = before is not None and decode_cursor(before, len(fields), model_fields) is not None
+    values = decode_cursor(before if backwards else cursor, len(fields), model_fields)
+    rows = list(keyset_queryset(qs, fields, values, descending != backwards)[:per_page + 1])
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return KeysetPage(rows)
+    first = encode_cursor(_row_values(rows[0], fields))
+    last = encode_cursor(_row_values(rows[-1], fields))
+    if backwards:
+        return KeysetPage(rows, next_cursor=last, previous_cursor=first if more else None)
+    return KeysetPage(rows, next_cursor=last if more else None, previous_cursor=first if values is not None else None)
@@ -0,0 +1,120 @@
+"""
+Per-API-key rate limiting with token buckets.
+
+Each key has a bucket that holds up to ``burst`` tokens and refills at
+``rate`` tokens per second; a request takes one token or is rejected with the
+time until the next token is available. The limits travel with the cached
+``AuthenticatedKey``, so a check is a dictionary lookup and a little
+arithmetic, with no database round trip.
+
+Bucket state lives in a backend:
+
+- ``LocalBackend`` (default) keeps buckets in process memory. Limits apply
+  per worker process.
+- ``CacheBackend`` keeps them in a Django cache (e.g. Redis or Memcached)
+  shared by all processes. The read-modify-write is not atomic, so
+  concurrent requests for one key may overshoot the limit slightly.
+
+Set ``API_CONNECT_RATE_LIMIT_BACKEND`` to the dotted path of a backend class
+to swap it out.
+"""
+import threading
+from time import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = 'api_connect.ratelimit.LocalBackend'
+DEFAULT_MAX_BUCKETS = 100_000
+
+
+def take_token(state, rate, burst, now):
+    """Take one token from a bucket.
+
+    ``state`` is ``(tokens, updated_at)`` or ``None`` for a full bucket.
+    Returns ``(new_state, retry_after)`` where ``retry_after`` is ``None``
+    when the request is allowed, else the seconds until a token is free.
+    """
+    if state is None:
+        tokens = burst
+    else:
+        tokens, updated_at = state
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), None
+    return (tokens, now), (1 - tokens) / rate
+
+
+class LocalBackend:
+    """Buckets in process memory, guarded by one lock."""
+
+    def __init__(self, max_buckets=DEFAULT_MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        with self._lock:
+            state, retry_after = take_token(self._buckets.get(key), rate, burst, now)
+            if key not in self._buckets and len(self._buckets) >= self.max_buckets:
+                # Idle buckets are full again after burst / rate seconds;
+                # dropping them all only forgets recent spending.
+                self._buckets.clear()
+            self._buckets[key] = state
+        return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBackend:
+    """Buckets in a Django cache shared by every process."""
+
+    key_prefix = 'api_connect:ratelimit:'
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or getattr(settings, 'API_CONNECT_RATE_LIMIT_CACHE', 'default')]
+
+    def take(self, key, rate, burst, now):
+        cache_key = self.key_prefix + key
+        state, retry_after = take_token(self.cache.get(cache_key), rate, burst, now)
+        # Once the bucket has had time to refill completely the entry is moot.
+        self.cache.set(cache_key, state, timeout=int(burst / rate) + 1)
+        return retry_after
+
+    def clear(self):
+        self.cache.clear()
+
+
+class RateLimiter:
+    """Applies per-key ``rate``/``burst`` limits using a bucket backend."""
+
+    def __init__(self, backend=None):
+        self.backend = backend or LocalBackend()
+
+    def check(self, key_id, rate, burst=0):
+        """Return ``None`` if the request may proceed, else seconds to wait.
+
+        A ``rate`` of 0 disables the limit; a ``burst`` of 0 defaults to one
+        second worth of requests.
+        """
+        if not rate:
+            return None
+        return self.backend.take(str(key_id), rate, burst or max(rate, 1), time())
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Process-wide limiter using ``API_CONNECT_RATE_LIMIT_BACKEND``."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                backend = import_string(getattr(settings, 'API_CONNECT_RATE_LIMIT_BACKEND', DEFAULT_BACKEND))
+                _limiter = RateLimiter(backend())
+    return _limiter
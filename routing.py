@@ -0,0 +1,50 @@
+"""
+Event-to-webhook routing.
+
+``Webhook.events`` is free-form JSON, so subscriptions are normalized into
+``WebhookSubscription`` rows indexed on ``(hub_id, event)``. Resolving an
+event is a single index lookup over its exact name plus the wildcard
+patterns that cover it (``sale.created`` -> ``sale.*`` -> ``*``), so the cost
+stays flat however many webhooks a hub has.
+"""
+from django.db import transaction
+
+from .models import Webhook, WebhookSubscription
+
+
+def event_patterns(event):
+    """Subscription patterns matching ``event``, most specific first."""
+    parts = event.split('.')
+    return [event] + ['.'.join(parts[:i]) + '.*' for i in range(len(parts) - 1, 0, -1)] + ['*']
+
+
+def sync_subscriptions(webhooks):
+    """Rebuild the subscription rows of ``webhooks`` from their ``events``."""
+    webhooks = list(webhooks)
+    if not webhooks:
+        return
+    with transaction.atomic():
+        WebhookSubscription.all_objects.filter(webhook__in=[w.pk for w in webhooks]).delete()
+        WebhookSubscription.objects.bulk_create([
+            WebhookSubscription(hub_id=w.hub_id, webhook_id=w.pk, event=event)
+            for w in webhooks if w.is_active and not w.is_deleted
+            for event in dict.fromkeys(w.get_event_names())
+        ])
+
+
+def sync_webhook_ids(hub_id, ids):
+    """Rebuild subscriptions for webhooks changed through ``QuerySet.update()``."""
+    sync_subscriptions(Webhook.all_objects.filter(hub_id=hub_id, id__in=ids).only(
+        'id', 'hub_id', 'events', 'is_active', 'is_deleted',
+    ))
+
+
+def resolve_webhook_ids(hub_id, event):
+    """IDs of the active webhooks of ``hub_id`` subscribed to ``event``."""
+    return list(
+        WebhookSubscription.objects
+        .filter(hub_id=hub_id, event__in=event_patterns(event))
+        .order_by()
+        .values_list('webhook_id', flat=True)
+        .distinct()
+    )
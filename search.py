@@ -0,0 +1,94 @@
+"""
+Indexed, ranked search for the API key and webhook lists.
+
+``search(qs, query, fields)`` filters ``qs`` to rows whose ``fields`` contain
+``query`` (case-insensitive substring, as ``icontains``) and annotates a
+``search_rank`` where higher is more relevant:
+
+- PostgreSQL: ``pg_trgm`` GIN indexes on ``UPPER(field)`` serve the
+  ``icontains`` filter; rank is the best ``similarity()`` over the fields.
+- SQLite: an FTS5 table with the ``trigram`` tokenizer (SQLite 3.34+) per
+  model, kept in sync by triggers; rank is the share of the matching
+  field(s) the query covers, so exact names come first.
+
+Trigram indexes cannot serve queries shorter than three characters, so those
+(and other databases) fall back to unranked ``icontains`` filters.
+
+The indexes, FTS tables and triggers are created by migration 0013. On
+SQLite, a later migration that makes Django rebuild one of these tables drops
+its triggers; such a migration must recreate them and rebuild the FTS table,
+as 0017 does for webhooks.
+"""
+import sqlite3
+
+from django.db import connections
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Length
+
+MIN_RANKED_LENGTH = 3
+SQLITE_TRIGRAM = sqlite3.sqlite_version_info >= (3, 34, 0)
+
+
+def _engine(vendor):
+    if vendor == 'postgresql':
+        return 'trigram'
+    if vendor == 'sqlite' and SQLITE_TRIGRAM:
+        return 'fts'
+    return None
+
+
+def _contains(query, fields):
+    condition = Q()
+    for field in fields:
+        condition |= Q(**{f'{field}__icontains': query})
+    return condition
+
+
+def search(qs, query, fields):
+    """Return ``(qs, ranked)``: ``qs`` filtered to ``query`` matches and whether it has a ``search_rank``."""
+    engine = _engine(connections[qs.db].vendor)
+    if engine is None or len(query) < MIN_RANKED_LENGTH:
+        return qs.filter(_contains(query, fields)), False
+    if engine == 'trigram':
+        return _trigram_search(qs, query, fields), True
+    return _fts_search(qs, query, fields), True
+
+
+def _trigram_search(qs, query, fields):
+    # Imported here: django.contrib.postgres needs psycopg installed.
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models.functions import Greatest
+
+    similarities = [TrigramSimilarity(field, query) for field in fields]
+    rank = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+    return qs.filter(_contains(query, fields)).annotate(search_rank=rank)
+
+
+def _coverage(query, fields):
+    """Share of each matching field taken up by ``query``, summed over ``fields``."""
+    terms = [
+        Case(
+            When(**{f'{field}__icontains': query}, then=Value(float(len(query))) / Length(field)),
+            default=Value(0.0), output_field=FloatField(),
+        )
+        for field in fields
+    ]
+    return sum(terms[1:], terms[0])
+
+
+def _fts_search(qs, query, fields):
+    table = qs.model._meta.db_table
+    fts = f'{table}_fts'
+    # A column filter keeps matches in other indexed columns (say, a URL when
+    # only names are searched) out of the result.
+    phrase = '{%s} : "%s"' % (' '.join(fields), query.replace('"', '""'))
+    # rowid IN (...) lets SQLite look each match up by rowid instead of
+    # walking every row of the hub and probing the match list.
+    matches = RawSQL(
+        f'{table}.rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)', (phrase,), output_field=BooleanField(),
+    )
+    # bm25() would rerun the MATCH for every row; the share of the field the
+    # query covers ranks exact and near-exact names first for a fraction of that.
+    return qs.filter(matches).annotate(search_rank=_coverage(query, fields))
+
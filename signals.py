@@ -0,0 +1,57 @@
+"""
+Signal receivers, connected in ``ApiConnectConfig.ready()``.
+
+``rows_updated`` stands in for ``post_save`` where rows are written with
+``QuerySet.update()``, which sends no model signals. Send it with the model
+class as ``sender``, the ``hub_ids`` whose rows changed and, when known, the
+changed primary keys as ``ids``.
+
+Saving a ``Webhook`` (views, the admin, the assistant or any other caller)
+rebuilds its routing rows, so callers don't sync subscriptions themselves.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .authentication import invalidate_api_keys
+from .models import APIKey, Webhook
+from .routing import sync_subscriptions, sync_webhook_ids
+from .stats import invalidate_stats
+
+rows_updated = Signal()
+
+# Webhook fields the subscription rows are built from.
+ROUTING_FIELDS = {'events', 'is_active', 'is_deleted'}
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+@receiver(post_save, sender=Webhook)
+@receiver(post_delete, sender=Webhook)
+def invalidate_stats_on_save(sender, instance, **kwargs):
+    invalidate_stats([instance.hub_id])
+
+
+@receiver(post_save, sender=Webhook)
+def sync_subscriptions_on_save(sender, instance, update_fields=None, **kwargs):
+    # Deleting a webhook cascades to its subscriptions, so only saves resync.
+    if update_fields is None or not ROUTING_FIELDS.isdisjoint(update_fields):
+        sync_subscriptions([instance])
+
+
+@receiver(rows_updated, sender=APIKey)
+@receiver(rows_updated, sender=Webhook)
+def invalidate_stats_on_update(sender, hub_ids, **kwargs):
+    invalidate_stats(hub_ids)
+
+
+@receiver(rows_updated, sender=APIKey)
+def invalidate_api_keys_on_update(sender, ids=None, **kwargs):
+    if ids:
+        invalidate_api_keys(ids)
+
+
+@receiver(rows_updated, sender=Webhook)
+def sync_subscriptions_on_update(sender, hub_ids, ids=None, **kwargs):
+    if ids:
+        for hub_id in hub_ids:
+            sync_webhook_ids(hub_id, ids)
@@ -0,0 +1,109 @@
+"""
+Cached dashboard statistics.
+
+``dashboard_stats(hub_id)`` computes every dashboard number with one
+aggregate query per model (API keys, webhooks, usage rollups and delivery
+attempts) and caches the result per hub, so a dashboard view on a warm cache
+runs no queries.
+
+The cache entry is dropped whenever a hub's API keys or webhooks change:
+``post_save``/``post_delete`` cover model saves, and code that writes through
+``QuerySet.update()`` (bulk actions, the delivery worker) sends
+``signals.rows_updated``. The 24h usage and delivery figures come from rows
+written in bulk by background flushes, so instead of invalidating on every
+flush the entry expires after ``API_CONNECT_STATS_TTL`` seconds (default 60,
+the usage flush interval), or sooner when an API key expires in the meantime.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import APIKey, APIKeyUsage, Webhook, WebhookDeliveryAttempt
+
+DEFAULT_TTL = 60
+# Usage and delivery figures cover the last day.
+STATS_WINDOW = timedelta(hours=24)
+KEY_PREFIX = 'api_connect:stats:'
+
+
+def _cache():
+    return caches[getattr(settings, 'API_CONNECT_STATS_CACHE', 'default')]
+
+
+def _ttl():
+    return getattr(settings, 'API_CONNECT_STATS_TTL', DEFAULT_TTL)
+
+
+def compute_stats(hub_id, now=None):
+    """Dashboard statistics of ``hub_id``, straight from the database."""
+    now = now or timezone.now()
+    since = now - STATS_WINDOW
+    keys = APIKey.objects.filter(hub_id=hub_id, is_deleted=False).aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True) & (Q(expires_at__isnull=True) | Q(expires_at__gt=now))),
+        expired=Count('id', filter=Q(expires_at__lte=now)),
+        next_expiry=Min('expires_at', filter=Q(expires_at__gt=now)),
+    )
+    webhooks = Webhook.objects.filter(hub_id=hub_id, is_deleted=False).aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        failing=Count('id', filter=Q(failure_count__gt=0)),
+        circuits_open=Count('id', filter=Q(circuit_state='open')),
+        circuits_half_open=Count('id', filter=Q(circuit_state='half_open')),
+    )
+    usage = APIKeyUsage.objects.filter(
+        hub_id=hub_id, granularity='hour', period_start__gte=since,
+    ).aggregate(
+        requests=Coalesce(Sum('request_count'), 0),
+        errors=Coalesce(Sum('error_count'), 0),
+        latency=Coalesce(Sum('latency_total_ms'), 0),
+    )
+    attempts = WebhookDeliveryAttempt.objects.filter(
+        hub_id=hub_id, day__gte=since.date(), created_at__gte=since,
+    ).aggregate(
+        total=Count('id'),
+        succeeded=Count('id', filter=Q(response_status__gte=200, response_status__lt=300)),
+    )
+    return {
+        'total_api_keys': keys['total'],
+        'active_api_keys': keys['active'],
+        'expired_api_keys': keys['expired'],
+        'next_key_expiry': keys['next_expiry'],
+        'total_webhooks': webhooks['total'],
+        'active_webhooks': webhooks['active'],
+        'failing_webhooks': webhooks['failing'],
+        'circuits_open': webhooks['circuits_open'],
+        'circuits_half_open': webhooks['circuits_half_open'],
+        'requests_24h': usage['requests'],
+        'errors_24h': usage['errors'],
+        'avg_latency_24h': usage['latency'] / usage['requests'] if usage['requests'] else None,
+        'deliveries_24h': attempts['total'],
+        'delivery_success_rate': 100 * attempts['succeeded'] / attempts['total'] if attempts['total'] else None,
+    }
+
+
+def dashboard_stats(hub_id):
+    """Cached ``compute_stats(hub_id)``."""
+    cache = _cache()
+    key = f'{KEY_PREFIX}{hub_id}'
+    stats = cache.get(key)
+    if stats is None:
+        now = timezone.now()
+        stats = compute_stats(hub_id, now)
+        timeout = _ttl()
+        if stats['next_key_expiry'] is not None:
+            # The active/expired split changes when the next key expires.
+            timeout = min(timeout, max(1, int((stats['next_key_expiry'] - now).total_seconds()) + 1))
+        cache.set(key, stats, timeout)
+    return stats
+
+
+def invalidate_stats(hub_ids):
+    """Drop the cached statistics of ``hub_ids``."""
+    keys = [f'{KEY_PREFIX}{hub_id}' for hub_id in set(hub_ids) if hub_id is not None]
+    if keys:
+        _cache().delete_many(keys)
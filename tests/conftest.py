@@ -1,5 +1,10 @@
 """Pytest fixtures for api_connect module tests."""
+import socket
+import threading
+import time
 import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 from decimal import Decimal
 from django.utils import timezone
@@ -92,3 +97,65 @@ def webhook(db, hub_id):
         last_triggered_at=timezone.now(),
     )
 
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """Stand-in subscriber endpoint that records every POST."""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.received.append((self.path, dict(self.headers), body))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'ok')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def webhook_server():
+    """Local HTTP server receiving webhook deliveries."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _WebhookHandler)
+    server.daemon_threads = True
+    server.received = []
+    server.connections = 0
+    server.delay = 0
+    server.status = 200
+    server.url = f'http://127.0.0.1:{server.server_port}/hook'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_autostart(settings):
+    """Tests drain the outbox themselves; no background delivery pool."""
+    settings.API_CONNECT_DELIVERY_AUTOSTART = False
+
+
+@pytest.fixture
+def make_subscriber(db, webhook_server):
+    """Factory for webhooks subscribed to ``sale.created`` on the local server."""
+    def make(hub_id, name='Subscriber', **fields):
+        # Saving the webhook syncs its routing rows.
+        return Webhook.objects.create(
+            hub_id=hub_id, name=name, url=webhook_server.url, events=['sale.created'], **fields,
+        )
+    return make
+
+
+@pytest.fixture
+def subscriber(make_subscriber, hub_id):
+    """Active webhook in ``hub_id`` pointing at the local server."""
+    return make_subscriber(hub_id)
@@ -0,0 +1,86 @@
+"""Tests for the assistant tools."""
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api_connect.ai_tools import MAX_LIMIT, CreateWebhook, ListAPIKeys, ListWebhooks
+from api_connect.models import APIKey, Webhook
+from api_connect.routing import sync_subscriptions
+
+
+@pytest.fixture
+def request_(hub_id):
+    return SimpleNamespace(session={'hub_id': str(hub_id)})
+
+
+def _webhook(hub_id, name, events, **kwargs):
+    webhook = Webhook.objects.create(hub_id=hub_id, name=name, url='https://example.com', events=events, **kwargs)
+    sync_subscriptions([webhook])
+    return webhook
+
+
+@pytest.mark.django_db
+class TestListAPIKeys:
+    """``list_api_keys``."""
+
+    def test_scoped_to_hub(self, hub_id, request_):
+        APIKey.objects.create(hub_id=hub_id, name='Mine', key_prefix='ak_mine000', key_hash='x')
+        APIKey.objects.create(hub_id=hub_id, name='Deleted', key_prefix='ak_del0000', key_hash='x', is_deleted=True)
+        APIKey.objects.create(hub_id=uuid.uuid4(), name='Theirs', key_prefix='ak_other00', key_hash='x')
+        result = ListAPIKeys().execute({}, request_)
+        assert [k['name'] for k in result['keys']] == ['Mine']
+        assert set(result['keys'][0]) == {'id', 'name', 'key_prefix', 'is_active', 'expires_at', 'last_used_at'}
+        assert result['next_cursor'] is None
+
+    def test_pages_with_cursor(self, hub_id, request_):
+        APIKey.objects.bulk_create([
+            APIKey(hub_id=hub_id, name=f'Key {i:02d}', key_prefix=f'ak_{i:07d}', key_hash='x') for i in range(5)
+        ])
+        first = ListAPIKeys().execute({'limit': 3}, request_)
+        second = ListAPIKeys().execute({'limit': 3, 'cursor': first['next_cursor']}, request_)
+        assert [k['name'] for k in first['keys'] + second['keys']] == [f'Key {i:02d}' for i in range(5)]
+        assert second['next_cursor'] is None
+
+    def test_limit_is_capped(self, hub_id, request_):
+        APIKey.objects.bulk_create([
+            APIKey(hub_id=hub_id, name=f'Key {i:03d}', key_prefix=f'ak_{i:07d}', key_hash='x')
+            for i in range(MAX_LIMIT + 5)
+        ])
+        with CaptureQueriesContext(connection) as ctx:
+            result = ListAPIKeys().execute({'limit': 10_000}, request_)
+        assert len(result['keys']) == MAX_LIMIT and result['next_cursor']
+        assert len(ctx.captured_queries) == 1
+
+    def test_name_filter(self, hub_id, request_):
+        for name in ('Shop sync', 'Payroll', 'Shop import'):
+            APIKey.objects.create(hub_id=hub_id, name=name, key_prefix=f'ak_{name[:7]}', key_hash='x')
+        result = ListAPIKeys().execute({'name': 'shop'}, request_)
+        assert [k['name'] for k in result['keys']] == ['Shop import', 'Shop sync']
+
+
+@pytest.mark.django_db
+class TestListWebhooks:
+    """``list_webhooks``."""
+
+    def test_event_filter(self, hub_id, request_):
+        _webhook(hub_id, 'Sales', ['sale.*'])
+        _webhook(hub_id, 'Stock', ['stock.changed'])
+        _webhook(uuid.uuid4(), 'Other hub', ['sale.created'])
+        result = ListWebhooks().execute({'event': 'sale.created'}, request_)
+        assert [w['name'] for w in result['webhooks']] == ['Sales']
+
+    def test_failing_filter(self, hub_id, request_):
+        _webhook(hub_id, 'Healthy', ['*'])
+        _webhook(hub_id, 'Erroring', ['*'], failure_count=2)
+        _webhook(hub_id, 'Tripped', ['*'], circuit_state='open')
+        result = ListWebhooks().execute({'failing': True}, request_)
+        assert [w['name'] for w in result['webhooks']] == ['Erroring', 'Tripped']
+
+
+@pytest.mark.django_db
+def test_create_webhook_in_session_hub(hub_id, request_):
+    result = CreateWebhook().execute({'name': 'Hook', 'url': 'https://example.com', 'events': ['sale.created']}, request_)
+    assert Webhook.objects.get(pk=result['id']).hub_id == hub_id
@@ -0,0 +1,108 @@
+"""Tests for API key authentication."""
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from api_connect import authentication
+from api_connect.authentication import (
+    APIKeyAuthenticationMiddleware, authenticate_api_key, generate_api_key, verified_keys,
+)
+from api_connect.models import APIKey
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    verified_keys.clear()
+    yield
+    verified_keys.clear()
+
+
+@pytest.fixture
+def raw_key(db, hub_id):
+    """Raw key of a freshly created APIKey."""
+    raw, prefix, key_hash = generate_api_key()
+    APIKey.objects.create(hub_id=hub_id, name='Integration', key_prefix=prefix, key_hash=key_hash)
+    return raw
+
+
+@pytest.fixture
+def hash_calls(monkeypatch):
+    calls = []
+    original = authentication.check_password
+
+    def counting_check_password(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(authentication, 'check_password', counting_check_password)
+    return calls
+
+
+@pytest.mark.django_db
+class TestAuthenticateAPIKey:
+    """Key verification and caching."""
+
+    def test_valid_key(self, raw_key, hub_id):
+        key = authenticate_api_key(raw_key)
+        assert key is not None
+        assert key.hub_id == hub_id
+
+    def test_prefix_is_mostly_random(self):
+        raw, prefix, _ = generate_api_key()
+        assert prefix == raw[:10] and prefix.startswith('erp_')
+
+    def test_legacy_prefix_still_authenticates(self, hub_id):
+        raw, _, key_hash = generate_api_key()
+        APIKey.objects.create(hub_id=hub_id, name='Old', key_prefix=raw[:8], key_hash=key_hash)
+        assert authenticate_api_key(raw).hub_id == hub_id
+
+    def test_wrong_key(self, raw_key):
+        assert authenticate_api_key(raw_key[:-1] + ('x' if raw_key[-1] != 'x' else 'y')) is None
+
+    def test_hash_runs_once_per_window(self, raw_key, hash_calls):
+        for _ in range(5):
+            assert authenticate_api_key(raw_key) is not None
+        assert len(hash_calls) == 1
+
+    def test_expired_key(self, raw_key):
+        APIKey.objects.update(expires_at=timezone.now() - timezone.timedelta(minutes=1))
+        assert authenticate_api_key(raw_key) is None
+
+    def test_inactive_key(self, raw_key):
+        APIKey.objects.update(is_active=False)
+        assert authenticate_api_key(raw_key) is None
+
+    def test_toggle_invalidates_cache(self, auth_client, raw_key):
+        assert authenticate_api_key(raw_key) is not None
+        api_key = APIKey.objects.get()
+        auth_client.post(reverse('api_connect:api_key_toggle_status', args=[api_key.pk]))
+        assert authenticate_api_key(raw_key) is None
+
+    def test_bulk_action_invalidates_cache(self, auth_client, raw_key):
+        assert authenticate_api_key(raw_key) is not None
+        api_key = APIKey.objects.get()
+        auth_client.post(reverse('api_connect:api_keys_bulk_action'), {'ids': str(api_key.pk), 'action': 'deactivate'})
+        assert authenticate_api_key(raw_key) is None
+
+
+@pytest.mark.django_db
+class TestMiddleware:
+    """APIKeyAuthenticationMiddleware."""
+
+    def _call(self, **headers):
+        request = RequestFactory().get('/api/', **headers)
+        response = APIKeyAuthenticationMiddleware(lambda r: HttpResponse(str(r.api_key and r.api_key.name)))(request)
+        return response
+
+    def test_bearer_key(self, raw_key):
+        response = self._call(HTTP_AUTHORIZATION=f'Bearer {raw_key}')
+        assert response.status_code == 200
+        assert response.content == b'Integration'
+
+    def test_invalid_key_rejected(self, raw_key):
+        assert self._call(HTTP_X_API_KEY='erp_invalid-key').status_code == 401
+
+    def test_no_key_passes_through(self):
+        assert self._call().status_code == 200
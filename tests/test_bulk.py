@@ -0,0 +1,120 @@
+"""Tests for chunked bulk actions."""
+import uuid
+from functools import partial
+
+import pytest
+from django.urls import reverse
+
+from api_connect.bulk import apply_bulk
+from api_connect.models import APIKey, Webhook, WebhookSubscription
+from api_connect.routing import sync_subscriptions
+from api_connect.signals import rows_updated
+
+
+@pytest.fixture
+def keys(db, hub_id):
+    return APIKey.objects.bulk_create([
+        APIKey(hub_id=hub_id, name=f'Key {i:03d}', key_prefix=f'ak_{i:07d}', key_hash='x') for i in range(25)
+    ])
+
+
+@pytest.fixture
+def events():
+    received = []
+
+    def receiver(sender, **kwargs):
+        received.append(kwargs['ids'])
+
+    rows_updated.connect(receiver, sender=APIKey)
+    yield received
+    rows_updated.disconnect(receiver, sender=APIKey)
+
+
+@pytest.mark.django_db
+class TestApplyBulk:
+    """``apply_bulk`` over a selection."""
+
+    def test_chunks_announce_their_ids(self, keys, hub_id, events):
+        selection = APIKey.objects.filter(hub_id=hub_id)
+        step = apply_bulk(selection, {'is_active': False}, hub_id, chunk_size=10, time_budget=None)
+        assert step == (25, None, True)
+        assert [len(ids) for ids in events] == [10, 10, 5]
+        assert sorted(i for ids in events for i in ids) == sorted(k.pk for k in keys)
+        assert not APIKey.objects.filter(is_active=True).exists()
+
+    def test_resumes_after_time_budget(self, keys, hub_id):
+        selection = APIKey.objects.filter(hub_id=hub_id, is_active=True)
+        step = apply_bulk(selection, {'is_active': False}, hub_id, chunk_size=10, time_budget=0)
+        assert (step.processed, step.done) == (10, False)
+        step = apply_bulk(selection, {'is_active': False}, hub_id, after=step.after, chunk_size=10, time_budget=0)
+        assert step.processed == 10
+        step = apply_bulk(selection, {'is_active': False}, hub_id, after=step.after, chunk_size=10, time_budget=0)
+        assert step == (5, None, True)
+        assert APIKey.objects.filter(is_active=False).count() == 25
+
+    def test_other_hubs_untouched(self, keys, hub_id):
+        other = APIKey.objects.create(hub_id=uuid.uuid4(), name='Other', key_prefix='ak_other00', key_hash='x')
+        apply_bulk(APIKey.objects.filter(hub_id=hub_id), {'is_active': False}, hub_id)
+        other.refresh_from_db()
+        assert other.is_active is True
+
+
+@pytest.mark.django_db
+class TestBulkViews:
+    """Bulk bar requests."""
+
+    @pytest.fixture(autouse=True)
+    def small_steps(self, monkeypatch):
+        monkeypatch.setattr('api_connect.views.apply_bulk', partial(apply_bulk, chunk_size=10, time_budget=0))
+
+    def test_select_all_matching_steps_until_done(self, auth_client, keys):
+        url = reverse('api_connect:api_keys_bulk_action')
+        data = {'scope': 'all', 'action': 'deactivate', 'q': 'Key 01'}
+        response = auth_client.post(url, data)
+        assert response.context['total'] == 10
+        assert response.context['done'] is False
+        while not response.context['done']:
+            data.update(after=response.context['after'], total=response.context['total'],
+                        processed=response.context['processed'])
+            response = auth_client.post(url, data)
+        assert response['HX-Trigger'] == 'bulk-complete'
+        assert response.context['processed'] == 10
+        assert sorted(APIKey.objects.filter(is_active=False).values_list('name', flat=True)) == [
+            f'Key {i:03d}' for i in range(10, 20)
+        ]
+
+    def test_progress_posts_next_step(self, auth_client, keys):
+        response = auth_client.post(reverse('api_connect:api_keys_bulk_action'), {'scope': 'all', 'action': 'delete'})
+        content = response.content.decode()
+        assert response.context['done'] is False
+        assert 'hx-trigger="load"' in content
+        assert f'name="after" value="{response.context["after"]}"' in content
+        assert APIKey.all_objects.filter(is_deleted=True).count() == 10
+
+    def test_page_selection_swaps_rows(self, auth_client, keys):
+        ids = ','.join(str(k.pk) for k in keys[:3])
+        response = auth_client.post(reverse('api_connect:api_keys_bulk_action'), {'ids': ids, 'action': 'deactivate'})
+        assert response['HX-Reswap'] == 'none'
+        assert response.content.decode().count('hx-swap-oob="outerHTML"') == 3
+
+    def test_page_selection_delete_removes_rows(self, auth_client, keys):
+        ids = ','.join(str(k.pk) for k in keys[:3])
+        response = auth_client.post(reverse('api_connect:api_keys_bulk_action'), {'ids': ids, 'action': 'delete'})
+        content = response.content.decode()
+        for key in keys[:3]:
+            assert f'<tr id="api-key-{key.pk}" hx-swap-oob="delete"></tr>' in content
+
+    def test_webhook_page_selection_delete_removes_rows(self, auth_client, hub_id):
+        webhook = Webhook.objects.create(hub_id=hub_id, name='Hook', url='https://example.com', events=['sale.created'])
+        response = auth_client.post(reverse('api_connect:webhooks_bulk_action'), {'ids': str(webhook.pk), 'action': 'delete'})
+        assert f'<tr id="webhook-{webhook.pk}" hx-swap-oob="delete"></tr>' in response.content.decode()
+
+    def test_unknown_action(self, auth_client, keys):
+        response = auth_client.post(reverse('api_connect:api_keys_bulk_action'), {'scope': 'all', 'action': 'explode'})
+        assert response.status_code == 400
+
+    def test_webhook_select_all_resyncs_subscriptions(self, auth_client, hub_id):
+        webhook = Webhook.objects.create(hub_id=hub_id, name='Hook', url='https://example.com', events=['sale.created'])
+        sync_subscriptions([webhook])
+        auth_client.post(reverse('api_connect:webhooks_bulk_action'), {'scope': 'all', 'action': 'deactivate'})
+        assert not WebhookSubscription.objects.filter(webhook=webhook).exists()
@@ -0,0 +1,90 @@
+"""Tests for the per-webhook circuit breaker."""
+import pytest
+from django.utils import timezone
+
+from api_connect.delivery.circuit import CircuitBreaker
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.worker import DeliveryWorkerPool
+from api_connect.models import Webhook, WebhookDelivery
+from api_connect.routing import resolve_webhook_ids
+
+
+@pytest.mark.django_db
+class TestCircuitBreaker:
+    """State transitions."""
+
+    def test_opens_after_consecutive_failures(self, webhook):
+        breaker = CircuitBreaker(failure_threshold=3)
+        now = timezone.now()
+        breaker.record(webhook, [False, False], now)
+        assert webhook.circuit_state == 'closed'
+        breaker.record(webhook, [False], now)
+        assert webhook.circuit_state == 'open'
+        assert not breaker.allow(webhook, now)
+
+    def test_opens_on_error_rate(self, webhook):
+        breaker = CircuitBreaker(failure_threshold=100, window=10, min_samples=10, error_rate_threshold=0.5)
+        breaker.record(webhook, [False, True] * 5, timezone.now())
+        assert webhook.circuit_state == 'closed'
+        breaker.record(webhook, [False], timezone.now())
+        assert webhook.circuit_state == 'open'
+
+    def test_half_open_trial(self, webhook):
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=60)
+        opened = timezone.now()
+        breaker.record(webhook, [False], opened)
+        later = opened + timezone.timedelta(seconds=61)
+        assert breaker.allow(webhook, later)
+        assert webhook.circuit_state == 'half_open'
+        breaker.record(webhook, [True], later)
+        assert webhook.circuit_state == 'closed'
+        assert webhook.failure_count == 0
+
+    def test_single_half_open_trial(self, webhook):
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=60)
+        opened = timezone.now()
+        breaker.record(webhook, [False], opened)
+        stale = Webhook.objects.get(pk=webhook.pk)
+        later = opened + timezone.timedelta(seconds=61)
+        assert breaker.allow(webhook, later)
+        assert not breaker.allow(stale, later)
+        assert stale.circuit_state == 'half_open'
+        assert Webhook.objects.get(pk=webhook.pk).circuit_state == 'half_open'
+
+    def test_concurrent_failures_add_up(self, webhook):
+        breaker = CircuitBreaker(failure_threshold=100)
+        stale = Webhook.objects.get(pk=webhook.pk)
+        breaker.record(webhook, [False, False], timezone.now())
+        breaker.record(stale, [False], timezone.now())
+        assert stale.failure_count == 3
+
+    def test_disables_webhook(self, webhook):
+        changes = CircuitBreaker(disable_after=3).record(webhook, [False] * 3, timezone.now())
+        assert changes['is_active'] is False
+
+
+@pytest.mark.django_db
+class TestWorkerCircuit:
+    """Worker pool integration."""
+
+    def test_open_circuit_skips_socket(self, hub_id, subscriber, webhook_server):
+        Webhook.objects.filter(pk=subscriber.pk).update(circuit_state='open', circuit_opened_at=timezone.now())
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        assert webhook_server.received == []
+        delivery = WebhookDelivery.objects.get()
+        assert delivery.status == 'pending'
+        assert delivery.attempts == 0
+        assert delivery.next_attempt_at > timezone.now()
+
+    def test_failures_open_circuit_and_disable(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        pool = DeliveryWorkerPool(workers=1, breaker=CircuitBreaker(failure_threshold=2, disable_after=3))
+        pool.drain()
+        subscriber.refresh_from_db()
+        assert subscriber.circuit_state == 'open'
+        assert subscriber.failure_count == 3
+        assert subscriber.is_active is False
+        assert resolve_webhook_ids(hub_id, 'sale.created') == []
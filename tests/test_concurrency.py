@@ -0,0 +1,116 @@
+"""Tests for the adaptive per-host concurrency limit."""
+import pytest
+
+from api_connect.delivery.concurrency import AdaptiveLimit
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.transport import Transport
+from api_connect.delivery.worker import DeliveryWorkerPool
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+class TestAdaptiveLimit:
+    """AIMD adjustments."""
+
+    def test_grows_while_saturated_up_to_ceiling(self, clock):
+        limit = AdaptiveLimit(2, 4, clock=clock)
+        for _ in range(50):
+            limit.record(0.01, True, in_flight=limit.limit)
+        assert limit.limit == 4
+
+    def test_idle_slots_do_not_grow(self, clock):
+        limit = AdaptiveLimit(4, 16, clock=clock)
+        for _ in range(50):
+            limit.record(0.01, True, in_flight=1)
+        assert limit.limit == 4
+
+    def test_error_halves_once_per_round_trip(self, clock):
+        limit = AdaptiveLimit(8, 8, clock=clock)
+        limit.record(0.1, True, in_flight=1)
+        limit.record(None, False, in_flight=8)
+        assert limit.limit == 4
+        limit.record(None, False, in_flight=8)
+        assert limit.limit == 4
+        clock.now += 0.2
+        limit.record(None, False, in_flight=8)
+        assert limit.limit == 2
+
+    def test_latency_rise_backs_off(self, clock):
+        limit = AdaptiveLimit(10, 10, clock=clock)
+        for _ in range(5):
+            limit.record(0.1, True, in_flight=1)
+        for _ in range(10):
+            clock.now += 1
+            limit.record(0.5, True, in_flight=10)
+        assert limit.limit < 10
+
+    def test_jitter_is_not_overload(self, clock):
+        limit = AdaptiveLimit(10, 10, clock=clock)
+        for latency in (0.001, 0.02, 0.004, 0.03) * 5:
+            clock.now += 1
+            limit.record(latency, True, in_flight=10)
+        assert limit.limit == 10
+
+    def test_never_below_one(self, clock):
+        limit = AdaptiveLimit(2, 8, clock=clock)
+        for _ in range(10):
+            clock.now += 1
+            limit.record(None, False, in_flight=1)
+        assert limit.limit == 1
+
+    def test_ceiling_change_clamps(self, clock):
+        limit = AdaptiveLimit(8, 8, clock=clock)
+        limit.set_ceiling(3)
+        assert limit.limit == 3
+
+
+class TestTransportLimit:
+    """The limit as seen through the transport."""
+
+    def test_server_errors_shrink_host_limit(self, webhook_server):
+        webhook_server.status = 503
+        transport = Transport(max_per_host=8)
+        transport.post(webhook_server.url, b'{}')
+        assert transport.host_limit(webhook_server.url) == 4
+
+    def test_client_errors_are_not_overload(self, webhook_server):
+        webhook_server.status = 404
+        transport = Transport(max_per_host=8)
+        transport.post(webhook_server.url, b'{}')
+        assert transport.host_limit(webhook_server.url) == 8
+
+    def test_fixed_limit(self, webhook_server):
+        webhook_server.status = 503
+        transport = Transport(max_per_host=8, adaptive=False)
+        transport.post(webhook_server.url, b'{}')
+        assert transport.host_limit(webhook_server.url) == 8
+
+    def test_hubs_keep_their_own_ceiling(self, webhook_server):
+        transport = Transport()
+        transport.post(webhook_server.url, b'{}', max_per_host=2, hub_id='small')
+        transport.post(webhook_server.url, b'{}', max_per_host=16, hub_id='large')
+        assert transport.host_limit(webhook_server.url, 'small') == 2
+        assert transport.host_limit(webhook_server.url, 'large') == 16
+
+    def test_unknown_host(self):
+        assert Transport().host_limit('https://example.com/hook') is None
+
+
+@pytest.mark.django_db
+def test_worker_records_limit_on_webhook(hub_id, subscriber, webhook_server):
+    webhook_server.status = 500
+    publish(hub_id, 'sale.created', {})
+    DeliveryWorkerPool(workers=1).drain()
+    subscriber.refresh_from_db()
+    assert (subscriber.failure_count, subscriber.concurrency_limit) == (1, 4)
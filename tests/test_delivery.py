@@ -0,0 +1,326 @@
+"""Tests for the webhook delivery outbox and worker pool."""
+import json
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from django.urls import reverse
+from django.utils import timezone
+
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.retry import backoff_delay, replay_dead_letters
+from api_connect.delivery.transport import HostBusy, Transport
+from api_connect.delivery.worker import DeliveryWorkerPool
+from api_connect.models import APIConnectSettings, Webhook, WebhookDeadLetter, WebhookDelivery, WebhookEvent
+from api_connect.routing import sync_subscriptions
+
+
+@pytest.mark.django_db
+class TestOutbox:
+    """Outbox writes."""
+
+    def test_publish_creates_delivery_per_subscriber(self, hub_id, subscriber):
+        other = Webhook.objects.create(hub_id=hub_id, name='Other', url='https://example.com', events='customer.updated')
+        sync_subscriptions([other])
+        event = publish(hub_id, 'sale.created', {'total': '10.00'})
+        assert event is not None
+        deliveries = WebhookDelivery.objects.filter(event=event)
+        assert [d.webhook_id for d in deliveries] == [subscriber.pk]
+        assert deliveries[0].status == 'pending'
+
+    def test_publish_without_subscribers(self, hub_id, subscriber):
+        assert publish(hub_id, 'inventory.low_stock') is None
+        assert not WebhookEvent.objects.exists()
+
+    def test_publish_rolls_back_with_business_transaction(self, hub_id, subscriber):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                publish(hub_id, 'sale.created', {})
+                raise RuntimeError('business change failed')
+        assert not WebhookDelivery.objects.exists()
+
+    def test_event_names_from_free_text(self, webhook):
+        webhook.events = 'sale.created, customer.updated\ninventory.low_stock'
+        assert webhook.get_event_names() == ['sale.created', 'customer.updated', 'inventory.low_stock']
+
+
+@pytest.mark.django_db
+class TestWorkerPool:
+    """Draining the outbox against a local server."""
+
+    def test_drain_delivers(self, hub_id, subscriber, webhook_server):
+        event = publish(hub_id, 'sale.created', {'total': '10.00'})
+        assert DeliveryWorkerPool(workers=2).drain() == 1
+        delivery = WebhookDelivery.objects.get(event=event)
+        assert delivery.status == 'delivered'
+        assert delivery.response_status == 200
+        _, headers, body = webhook_server.received[0]
+        assert headers['X-Webhook-Event'] == 'sale.created'
+        assert json.loads(body)['data'] == {'total': '10.00'}
+        subscriber.refresh_from_db()
+        assert subscriber.last_triggered_at is not None
+
+    def test_failure_increments_failure_count(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        subscriber.refresh_from_db()
+        assert subscriber.failure_count == 1
+
+    def test_throughput_scales_with_workers(self, hub_id, subscriber, webhook_server):
+        webhook_server.delay = 0.05
+        timings = {}
+        for workers in (1, 8):
+            for _ in range(16):
+                publish(hub_id, 'sale.created', {})
+            start = time.monotonic()
+            assert DeliveryWorkerPool(workers=workers).drain() == 16
+            timings[workers] = time.monotonic() - start
+        assert timings[8] < timings[1] / 3
+
+
+@pytest.mark.django_db
+class TestLeases:
+    """Claiming batches across several pools."""
+
+    def test_claim_leases_rows(self, hub_id, subscriber):
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        pool = DeliveryWorkerPool(workers=1)
+        batch = pool.claim()
+        assert len(batch) == 3
+        assert all(d.claimed_by.startswith(pool.worker_id) and d.leased_until for d in batch)
+        assert DeliveryWorkerPool(workers=1).claim() == []
+
+    def test_pools_claim_disjoint_batches(self, hub_id, subscriber):
+        for _ in range(10):
+            publish(hub_id, 'sale.created', {})
+        first = DeliveryWorkerPool(workers=1, batch_size=4).claim()
+        second = DeliveryWorkerPool(workers=1, batch_size=4).claim()
+        assert len(first) == len(second) == 4
+        assert not {d.pk for d in first} & {d.pk for d in second}
+
+    def test_expired_lease_is_reclaimed(self, hub_id, subscriber, webhook_server):
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1, lease_seconds=60).claim()
+        WebhookDelivery.objects.update(leased_until=timezone.now() - timezone.timedelta(seconds=1))
+        assert DeliveryWorkerPool(workers=1).drain() == 1
+        delivery = WebhookDelivery.objects.get()
+        assert (delivery.status, delivery.attempts) == ('delivered', 1)
+
+    def test_outcome_releases_lease(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        delivery = WebhookDelivery.objects.get()
+        assert delivery.status == 'pending'
+        assert (delivery.claimed_by, delivery.leased_until) == ('', None)
+
+    def test_command_drains_once(self, hub_id, subscriber, webhook_server):
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        call_command('deliver_webhooks', '--once', '--workers=2')
+        assert WebhookDelivery.objects.filter(status='delivered').count() == 3
+        assert len(webhook_server.received) == 3
+
+
+@pytest.mark.django_db
+class TestOrdering:
+    """Ordered delivery within an ordering key."""
+
+    def test_partition_delivered_in_order(self, hub_id, subscriber, webhook_server):
+        for n in range(4):
+            for key in ('customer-1', 'customer-2'):
+                publish(hub_id, 'sale.created', {'n': n}, ordering_key=key)
+        assert DeliveryWorkerPool(workers=4).drain() == 8
+        received = {}
+        for _, headers, body in webhook_server.received:
+            received.setdefault(headers['X-Webhook-Ordering-Key'], []).append(json.loads(body)['data']['n'])
+        assert received == {'customer-1': [0, 1, 2, 3], 'customer-2': [0, 1, 2, 3]}
+
+    def test_one_head_per_partition_per_claim(self, hub_id, subscriber):
+        for key in ('a', 'b', 'c'):
+            for _ in range(3):
+                publish(hub_id, 'sale.created', {}, ordering_key=key)
+        publish(hub_id, 'sale.created', {})
+        batch = DeliveryWorkerPool(workers=1).claim()
+        assert sorted(d.ordering_key for d in batch) == ['', 'a', 'b', 'c']
+
+    def test_retrying_head_blocks_only_its_partition(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        head = publish(hub_id, 'sale.created', {}, ordering_key='a')
+        DeliveryWorkerPool(workers=1).drain()
+        webhook_server.status = 200
+        publish(hub_id, 'sale.created', {}, ordering_key='a')
+        publish(hub_id, 'sale.created', {}, ordering_key='b')
+        publish(hub_id, 'sale.created', {})
+        assert DeliveryWorkerPool(workers=1).drain() == 2
+        pending = WebhookDelivery.objects.filter(status='pending')
+        assert sorted(d.ordering_key for d in pending) == ['a', 'a']
+        assert pending.get(attempts=1).event_id == head.pk
+
+    def test_dead_lettered_head_releases_partition(self, hub_id, subscriber, webhook_server):
+        subscriber.max_attempts = 1
+        subscriber.save()
+        webhook_server.status = 500
+        publish(hub_id, 'sale.created', {}, ordering_key='a')
+        DeliveryWorkerPool(workers=1).drain()
+        webhook_server.status = 200
+        publish(hub_id, 'sale.created', {}, ordering_key='a')
+        assert DeliveryWorkerPool(workers=1).drain() == 1
+        assert WebhookDelivery.objects.filter(status='delivered').count() == 1
+
+
+@pytest.mark.django_db
+class TestBatching:
+    """Coalescing events into one POST for batching webhooks."""
+
+    @pytest.fixture
+    def batching(self, subscriber):
+        subscriber.batch_enabled = True
+        subscriber.batch_max_size = 10
+        subscriber.batch_linger_seconds = 60
+        subscriber.save()
+        return subscriber
+
+    def test_partial_batch_lingers(self, hub_id, batching, webhook_server):
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        assert webhook_server.received == []
+        delivery = WebhookDelivery.objects.get()
+        assert delivery.status == 'pending'
+        assert delivery.next_attempt_at > timezone.now()
+
+    def test_full_batch_is_one_post(self, hub_id, batching, webhook_server):
+        for i in range(25):
+            publish(hub_id, 'sale.created', {'n': i})
+            DeliveryWorkerPool(workers=1).drain()
+        assert len(webhook_server.received) == 2
+        _, headers, body = webhook_server.received[0]
+        assert headers['X-Webhook-Batch-Size'] == '10'
+        assert [item['data']['n'] for item in json.loads(body)] == list(range(10))
+        assert WebhookDelivery.objects.filter(status='delivered').count() == 20
+        assert WebhookDelivery.objects.filter(status='pending').count() == 5
+
+    def test_lingered_batch_flushes(self, hub_id, batching, webhook_server):
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        WebhookDelivery.objects.update(created_at=timezone.now() - timezone.timedelta(minutes=5))
+        assert DeliveryWorkerPool(workers=1).drain() == 3
+        assert len(webhook_server.received) == 1
+        assert len(json.loads(webhook_server.received[0][2])) == 3
+
+    def test_failed_batch_counts_once(self, hub_id, batching, webhook_server):
+        webhook_server.status = 500
+        batching.batch_linger_seconds = 0
+        batching.save()
+        for _ in range(5):
+            publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        batching.refresh_from_db()
+        assert batching.failure_count == 1
+        assert WebhookDelivery.objects.filter(status='pending', attempts=1).count() == 5
+
+
+def test_backoff_grows_with_jitter():
+    assert backoff_delay(1, base=10, rand=lambda: 0) == 5
+    assert backoff_delay(3, base=10, rand=lambda: 1) == 40
+    assert backoff_delay(30, base=10, cap=100, rand=lambda: 1) == 100
+
+
+@pytest.mark.django_db
+class TestRetries:
+    """Retry scheduling and dead letters."""
+
+    def test_failure_is_rescheduled(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 503
+        publish(hub_id, 'sale.created', {})
+        assert DeliveryWorkerPool(workers=1).drain() == 1
+        delivery = WebhookDelivery.objects.get()
+        assert delivery.status == 'pending'
+        assert delivery.attempts == 1
+        assert delivery.next_attempt_at > timezone.now()
+
+    def test_due_retry_is_delivered(self, hub_id, subscriber, webhook_server):
+        publish(hub_id, 'sale.created', {})
+        WebhookDelivery.objects.update(attempts=1, next_attempt_at=timezone.now())
+        DeliveryWorkerPool(workers=1).drain()
+        assert WebhookDelivery.objects.get().status == 'delivered'
+
+    def test_max_attempts_dead_letters(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        subscriber.max_attempts = 1
+        subscriber.save()
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        assert WebhookDelivery.objects.get().status == 'failed'
+        dead_letter = WebhookDeadLetter.objects.get()
+        assert dead_letter.response_status == 500
+
+    def test_busy_host_pushes_back_without_attempt(self, hub_id, subscriber):
+        class BusyTransport(Transport):
+            def post(self, *args, **kwargs):
+                raise HostBusy('busy')
+
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1, transport=BusyTransport()).drain()
+        delivery = WebhookDelivery.objects.get()
+        assert (delivery.status, delivery.attempts, delivery.leased_until) == ('pending', 0, None)
+        assert delivery.next_attempt_at > timezone.now()
+
+    def test_hub_without_settings_uses_defaults(self, hub_id, subscriber, webhook_server):
+        publish(hub_id, 'sale.created', {})
+        assert DeliveryWorkerPool(workers=1).drain() == 1
+        assert len(webhook_server.received) == 1
+        assert not APIConnectSettings.all_objects.filter(hub_id=hub_id).exists()
+
+    def test_retries_do_not_starve_first_attempts(self, hub_id, subscriber):
+        for _ in range(10):
+            publish(hub_id, 'sale.created', {})
+        WebhookDelivery.objects.update(attempts=1, next_attempt_at=timezone.now() - timezone.timedelta(hours=1))
+        for _ in range(10):
+            publish(hub_id, 'sale.created', {})
+        batch = DeliveryWorkerPool(workers=1, batch_size=8).claim()
+        assert sum(1 for d in batch if d.attempts == 0) == 6
+        assert sum(1 for d in batch if d.attempts > 0) == 2
+
+    def test_single_slot_alternates_retries_and_first_attempts(self, hub_id, subscriber):
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        WebhookDelivery.objects.update(attempts=1, next_attempt_at=timezone.now() - timezone.timedelta(hours=1))
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        pool = DeliveryWorkerPool(workers=1, batch_size=1)
+        kinds = []
+        for _ in range(4):
+            delivery, = pool.claim()
+            kinds.append(delivery.attempts > 0)
+            WebhookDelivery.objects.filter(pk=delivery.pk).update(status='delivered')
+        assert kinds == [False, True, False, True]
+
+    def test_replay(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        subscriber.max_attempts = 1
+        subscriber.save()
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        webhook_server.status = 200
+        assert replay_dead_letters(WebhookDeadLetter.objects.all()) == 1
+        DeliveryWorkerPool(workers=1).drain()
+        assert WebhookDelivery.objects.get().status == 'delivered'
+        assert WebhookDeadLetter.objects.get().replayed_at is not None
+
+    def test_replay_view(self, auth_client, hub_id, subscriber, webhook_server):
+        webhook_server.status = 500
+        subscriber.max_attempts = 1
+        subscriber.save()
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        dead_letter = WebhookDeadLetter.objects.get()
+        response = auth_client.get(reverse('api_connect:dead_letters_list'))
+        assert response.status_code == 200
+        response = auth_client.post(reverse('api_connect:dead_letter_replay', args=[dead_letter.pk]))
+        assert response.status_code == 200
+        assert WebhookDelivery.objects.get().status == 'pending'
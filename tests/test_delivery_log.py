@@ -0,0 +1,114 @@
+"""Tests for the webhook delivery attempts log."""
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from api_connect.delivery.log import prune_attempts
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.worker import DeliveryWorkerPool
+from api_connect.models import APIConnectSettings, WebhookDeliveryAttempt
+from api_connect.pagination import paginate_keyset
+
+
+def _attempt(hub_id, webhook, day, **kwargs):
+    return WebhookDeliveryAttempt.objects.create(
+        hub_id=hub_id, webhook=webhook, event_name='sale.created', day=day, **kwargs,
+    )
+
+
+@pytest.mark.django_db
+class TestDeliveryLog:
+    """Attempts written by the worker."""
+
+    def test_attempt_is_logged(self, hub_id, subscriber, webhook_server):
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        attempt = WebhookDeliveryAttempt.objects.get()
+        assert attempt.webhook_id == subscriber.pk
+        assert attempt.event_name == 'sale.created'
+        assert (attempt.attempt, attempt.response_status, attempt.response_body) == (1, 200, 'ok')
+        assert attempt.latency_ms is not None
+        assert attempt.day == timezone.now().date()
+
+    def test_failures_are_logged_per_attempt(self, hub_id, subscriber, webhook_server):
+        webhook_server.status = 503
+        publish(hub_id, 'sale.created', {})
+        pool = DeliveryWorkerPool(workers=1)
+        pool.drain()
+        subscriber.deliveries.update(next_attempt_at=timezone.now())
+        pool.drain()
+        attempts = WebhookDeliveryAttempt.objects.order_by('attempt')
+        assert [(a.attempt, a.response_status, a.error) for a in attempts] == [(1, 503, 'HTTP 503'), (2, 503, 'HTTP 503')]
+
+    def test_batch_is_one_row(self, hub_id, subscriber, webhook_server):
+        subscriber.batch_enabled = True
+        subscriber.batch_linger_seconds = 0
+        subscriber.save()
+        for _ in range(3):
+            publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        attempt = WebhookDeliveryAttempt.objects.get()
+        assert (attempt.event_name, attempt.batch_size, attempt.delivery_id) == ('batch', 3, None)
+
+
+@pytest.mark.django_db
+class TestPruning:
+    """Dropping expired days."""
+
+    def test_prune_uses_hub_retention(self, hub_id, subscriber):
+        today = timezone.now().date()
+        settings_obj = APIConnectSettings.get_settings(hub_id)
+        settings_obj.delivery_log_retention_days = 3
+        settings_obj.save()
+        for days_ago in (0, 2, 3, 10):
+            _attempt(hub_id, subscriber, today - timedelta(days=days_ago))
+        assert prune_attempts(today) == 2
+        assert sorted((today - a.day).days for a in WebhookDeliveryAttempt.objects.all()) == [0, 2]
+
+    def test_prune_default_retention(self, hub_id, subscriber):
+        today = timezone.now().date()
+        _attempt(hub_id, subscriber, today - timedelta(days=13))
+        _attempt(hub_id, subscriber, today - timedelta(days=15))
+        assert prune_attempts(today) == 1
+
+    def test_pool_prunes_at_most_hourly(self, hub_id, subscriber):
+        pool = DeliveryWorkerPool(workers=1)
+        now = timezone.now()
+        pool.prune_log(now)
+        _attempt(hub_id, subscriber, now.date() - timedelta(days=30))
+        assert pool.prune_log(now + timedelta(minutes=5)) == 0
+        assert pool.prune_log(now + timedelta(hours=2)) == 1
+
+
+@pytest.mark.django_db
+class TestHistoryView:
+    """Keyset-paginated history per webhook."""
+
+    def test_keyset_pages(self, hub_id, subscriber):
+        for _ in range(7):
+            _attempt(hub_id, subscriber, timezone.now().date())
+        qs = WebhookDeliveryAttempt.objects.filter(webhook=subscriber)
+        first = paginate_keyset(qs, ['created_at', 'id'], per_page=5)
+        second = paginate_keyset(qs, ['created_at', 'id'], first.next_cursor, per_page=5)
+        assert len(first) == 5 and first.has_next
+        assert len(second) == 2 and not second.has_next
+        expected = list(qs.order_by('-created_at', '-id').values_list('id', flat=True))
+        assert [a.id for a in first] + [a.id for a in second] == expected
+
+    def test_bad_cursor_starts_over(self, hub_id, subscriber):
+        _attempt(hub_id, subscriber, timezone.now().date())
+        page = paginate_keyset(WebhookDeliveryAttempt.objects.all(), ['created_at', 'id'], 'not-a-cursor')
+        assert len(page) == 1
+
+    def test_view(self, auth_client, hub_id, subscriber):
+        _attempt(hub_id, subscriber, timezone.now().date(), response_status=200, latency_ms=12)
+        url = reverse('api_connect:delivery_attempts_list', args=[subscriber.pk])
+        response = auth_client.get(url)
+        assert response.status_code == 200
+        assert len(response.context['attempts']) == 1
+
+    def test_edit_page_links_to_log(self, auth_client, subscriber):
+        response = auth_client.get(reverse('api_connect:webhook_edit', args=[subscriber.pk]))
+        assert reverse('api_connect:delivery_attempts_list', args=[subscriber.pk]).encode() in response.content
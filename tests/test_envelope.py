@@ -0,0 +1,59 @@
+"""Tests for serialize-once event envelopes."""
+import json
+
+import pytest
+
+from api_connect.delivery import envelope as envelope_module
+from api_connect.delivery.envelope import EnvelopeCache, EventEnvelope, batch_body
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.worker import DeliveryWorkerPool
+from api_connect.models import WebhookEvent
+
+
+@pytest.fixture
+def count_dumps(monkeypatch):
+    calls = []
+    original = envelope_module.dumps
+
+    def counting(data):
+        calls.append(data)
+        return original(data)
+
+    monkeypatch.setattr(envelope_module, 'dumps', counting)
+    return calls
+
+
+@pytest.mark.django_db
+class TestEventEnvelope:
+    """Lazy, cached encoding."""
+
+    def test_body_is_encoded_once(self, hub_id, count_dumps):
+        event = WebhookEvent.objects.create(hub_id=hub_id, event='sale.created', payload={'total': '10.00'})
+        envelope = EventEnvelope.from_event(event)
+        assert count_dumps == []
+        assert envelope.body is envelope.body
+        assert len(count_dumps) == 1
+        assert json.loads(envelope.body)['data'] == {'total': '10.00'}
+
+    def test_batch_body_is_json_array(self, hub_id):
+        events = [WebhookEvent.objects.create(hub_id=hub_id, event='sale.created', payload={'n': i}) for i in range(3)]
+        body = batch_body(EventEnvelope.from_event(e) for e in events)
+        assert [item['data']['n'] for item in json.loads(body)] == [0, 1, 2]
+
+    def test_cache_reuses_and_evicts(self, hub_id):
+        events = [WebhookEvent.objects.create(hub_id=hub_id, event='sale.created') for _ in range(3)]
+        cache = EnvelopeCache(maxsize=2)
+        first = cache.get(events[0])
+        assert cache.get(events[0]) is first
+        cache.get(events[1])
+        cache.get(events[2])
+        assert len(cache) == 2
+        assert cache.get(events[0]) is not first
+
+    def test_fan_out_encodes_once(self, hub_id, make_subscriber, webhook_server, count_dumps):
+        for i in range(5):
+            make_subscriber(hub_id, f'Hook {i}')
+        publish(hub_id, 'sale.created', {'total': '10.00'})
+        assert DeliveryWorkerPool(workers=2).drain() == 5
+        assert len(count_dumps) == 1
+        assert len({body for _, _, body in webhook_server.received}) == 1
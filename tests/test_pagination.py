@@ -0,0 +1,134 @@
+"""Tests for keyset pagination of the API key and webhook lists."""
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api_connect.models import APIKey, Webhook
+from api_connect.pagination import decode_cursor, encode_cursor, paginate_keyset
+
+
+def _keys(hub_id, count, **kwargs):
+    return [
+        APIKey.objects.create(hub_id=hub_id, name=f'Key {i:02d}', key_prefix=f'p{i:02d}', key_hash=f'h{i:02d}', **kwargs)
+        for i in range(count)
+    ]
+
+
+def _walk(qs, fields, descending, per_page=3):
+    rows, cursor = [], None
+    while True:
+        page = paginate_keyset(qs, fields, cursor, per_page, descending=descending)
+        rows += [obj.pk for obj in page]
+        if not page.has_next:
+            return rows
+        cursor = page.next_cursor
+
+
+class TestCursor:
+    """Cursor encoding."""
+
+    def test_round_trip(self):
+        assert decode_cursor(encode_cursor(['a', None, 3]), 3) == ['a', None, '3']
+
+    def test_malformed(self):
+        assert decode_cursor('???', 2) is None
+        assert decode_cursor(encode_cursor(['a']), 2) is None
+
+    def test_values_are_converted(self):
+        fields = [APIKey._meta.get_field('expires_at'), APIKey._meta.pk]
+        key = APIKey(expires_at=timezone.now())
+        assert decode_cursor(encode_cursor([key.expires_at, key.pk]), 2, fields) == [key.expires_at, key.pk]
+
+    def test_unconvertible_values(self):
+        fields = [APIKey._meta.get_field('expires_at'), APIKey._meta.pk]
+        assert decode_cursor(encode_cursor(['yesterday', 'x']), 2, fields) is None
+
+
+@pytest.mark.django_db
+class TestPaginateKeyset:
+    """Pages over a sort field plus ``id``."""
+
+    def test_pages_cover_every_row_once(self, hub_id):
+        _keys(hub_id, 8)
+        qs = APIKey.objects.filter(hub_id=hub_id)
+        for descending in (False, True):
+            expected = list(qs.order_by(*(['-name', '-id'] if descending else ['name', 'id'])).values_list('pk', flat=True))
+            assert _walk(qs, ['name', 'id'], descending) == expected
+
+    def test_ties_and_nulls(self, hub_id):
+        soon = timezone.now() + timedelta(days=1)
+        _keys(hub_id, 3, expires_at=soon)
+        _keys(hub_id, 4)  # never expire
+        qs = APIKey.objects.filter(hub_id=hub_id)
+        for descending in (False, True):
+            rows = _walk(qs, ['expires_at', 'id'], descending, per_page=2)
+            assert sorted(rows) == sorted(qs.values_list('pk', flat=True))
+            nulls = set(qs.filter(expires_at__isnull=True).values_list('pk', flat=True))
+            # NULL sorts as the greatest value: last ascending, first descending.
+            assert set(rows[:4] if descending else rows[3:]) == nulls
+
+    def test_previous_page(self, hub_id):
+        _keys(hub_id, 7)
+        qs = APIKey.objects.filter(hub_id=hub_id)
+        first = paginate_keyset(qs, ['name', 'id'], per_page=3, descending=False)
+        second = paginate_keyset(qs, ['name', 'id'], first.next_cursor, per_page=3, descending=False)
+        back = paginate_keyset(qs, ['name', 'id'], per_page=3, descending=False, before=second.previous_cursor)
+        assert [k.pk for k in back] == [k.pk for k in first]
+        assert not back.has_previous and back.next_cursor == first.next_cursor
+
+    def test_bad_cursor_values_start_over(self, hub_id):
+        _keys(hub_id, 3)
+        qs = APIKey.objects.filter(hub_id=hub_id)
+        page = paginate_keyset(qs, ['expires_at', 'id'], encode_cursor(['yesterday', 'x']), per_page=5)
+        assert len(page) == 3 and not page.has_previous
+
+    def test_values_rows(self, hub_id):
+        _keys(hub_id, 5)
+        qs = APIKey.objects.filter(hub_id=hub_id).values('id', 'name')
+        first = paginate_keyset(qs, ['name', 'id'], per_page=3, descending=False)
+        second = paginate_keyset(qs, ['name', 'id'], first.next_cursor, per_page=3, descending=False)
+        assert [row['name'] for row in first] + [row['name'] for row in second] == [f'Key {i:02d}' for i in range(5)]
+
+    def test_no_count_query(self, hub_id):
+        _keys(hub_id, 5)
+        with CaptureQueriesContext(connection) as ctx:
+            paginate_keyset(APIKey.objects.filter(hub_id=hub_id), ['name', 'id'], per_page=2)
+        assert len(ctx.captured_queries) == 1
+        assert 'COUNT' not in ctx.captured_queries[0]['sql'].upper()
+        assert 'OFFSET' not in ctx.captured_queries[0]['sql'].upper()
+
+
+@pytest.mark.django_db
+class TestListViews:
+    """Cursor links in the list partials."""
+
+    def test_api_keys_next_page_keeps_sort(self, auth_client, hub_id):
+        _keys(hub_id, 15)
+        url = reverse('api_connect:api_keys_list')
+        first = auth_client.get(url, {'sort': 'name', 'dir': 'desc'}, HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body')
+        page = first.context['page_obj']
+        assert [k.name for k in page] == [f'Key {i:02d}' for i in range(14, 2, -1)]
+        assert f'cursor={page.next_cursor}'.encode() in first.content
+        second = auth_client.get(
+            url, {'sort': 'name', 'dir': 'desc', 'cursor': page.next_cursor},
+            HTTP_HX_REQUEST='true', HTTP_HX_TARGET='datatable-body',
+        )
+        assert [k.name for k in second.context['page_obj']] == ['Key 02', 'Key 01', 'Key 00']
+        assert second.context['page_obj'].has_previous
+
+    def test_webhooks_paging(self, auth_client, hub_id):
+        for i in range(14):
+            Webhook.objects.create(hub_id=hub_id, name=f'Hook {i:02d}', url='https://example.com/hook')
+        url = reverse('api_connect:webhooks_list')
+        first = auth_client.get(url).context['page_obj']
+        second = auth_client.get(url, {'cursor': first.next_cursor}).context['page_obj']
+        assert len(first) == 12 and [w.name for w in second] == ['Hook 12', 'Hook 13']
+
+    def test_max_per_page(self, auth_client, hub_id):
+        _keys(hub_id, 15)
+        page = auth_client.get(reverse('api_connect:api_keys_list'), {'per_page': 0}).context['page_obj']
+        assert len(page) == 15 and not page.has_next
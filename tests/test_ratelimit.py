@@ -0,0 +1,90 @@
+"""Tests for per-API-key rate limiting."""
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from api_connect import authentication, ratelimit
+from api_connect.authentication import APIKeyAuthenticationMiddleware, generate_api_key, verified_keys
+from api_connect.models import APIKey
+from api_connect.ratelimit import CacheBackend, LocalBackend, RateLimiter, take_token
+from api_connect.usage import UsageMeter, UsageRecorder
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiter(monkeypatch):
+    verified_keys.clear()
+    monkeypatch.setattr(ratelimit, '_limiter', RateLimiter(LocalBackend()))
+    yield
+    verified_keys.clear()
+
+
+class TestTokenBucket:
+    """Bucket arithmetic."""
+
+    def test_burst_then_reject(self):
+        state = None
+        for _ in range(3):
+            state, retry_after = take_token(state, rate=1, burst=3, now=100.0)
+            assert retry_after is None
+        state, retry_after = take_token(state, rate=1, burst=3, now=100.0)
+        assert retry_after == pytest.approx(1.0)
+
+    def test_refills_over_time(self):
+        state, _ = take_token(None, rate=2, burst=1, now=100.0)
+        _, retry_after = take_token(state, rate=2, burst=1, now=100.25)
+        assert retry_after == pytest.approx(0.25)
+        _, retry_after = take_token(state, rate=2, burst=1, now=100.5)
+        assert retry_after is None
+
+    def test_refill_is_capped_at_burst(self):
+        state, _ = take_token(None, rate=10, burst=2, now=0.0)
+        state, _ = take_token(state, rate=10, burst=2, now=3600.0)
+        assert state[0] == 1
+
+
+class TestRateLimiter:
+    """Limiter with both backends."""
+
+    def test_zero_rate_is_unlimited(self):
+        limiter = RateLimiter()
+        assert all(limiter.check('k', 0) is None for _ in range(1000))
+
+    def test_keys_have_separate_buckets(self):
+        limiter = RateLimiter()
+        assert limiter.check('a', 1) is None
+        assert limiter.check('a', 1) is not None
+        assert limiter.check('b', 1) is None
+
+    def test_explicit_burst_below_rate(self):
+        limiter = RateLimiter()
+        assert limiter.check('a', 5, burst=1) is None
+        assert limiter.check('a', 5, burst=1) is not None
+
+    def test_cache_backend(self, settings):
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        limiter = RateLimiter(CacheBackend())
+        assert limiter.check('a', 1, burst=2) is None
+        assert limiter.check('a', 1, burst=2) is None
+        assert limiter.check('a', 1, burst=2) is not None
+
+
+@pytest.mark.django_db
+class TestMiddleware:
+    """429 responses from the authentication middleware."""
+
+    def test_rate_limited_request(self, hub_id, monkeypatch, django_assert_num_queries):
+        monkeypatch.setattr(authentication, 'usage_recorder', UsageRecorder(interval=3600))
+        monkeypatch.setattr(authentication, 'usage_meter', UsageMeter(interval=3600))
+        raw, prefix, key_hash = generate_api_key()
+        APIKey.objects.create(
+            hub_id=hub_id, name='Integration', key_prefix=prefix, key_hash=key_hash,
+            rate_limit_per_second=1, rate_limit_burst=2,
+        )
+        middleware = APIKeyAuthenticationMiddleware(lambda request: HttpResponse('ok'))
+        request = lambda: RequestFactory().get('/api/', HTTP_AUTHORIZATION=f'Bearer {raw}')
+        assert middleware(request()).status_code == 200
+        with django_assert_num_queries(0):
+            assert middleware(request()).status_code == 200
+            response = middleware(request())
+        assert response.status_code == 429
+        assert response['Retry-After'] == '1'
@@ -0,0 +1,73 @@
+"""Tests for event-to-webhook routing."""
+import pytest
+from django.urls import reverse
+
+from api_connect.models import Webhook, WebhookSubscription
+from api_connect.routing import event_patterns, resolve_webhook_ids, sync_subscriptions
+
+
+def _webhook(hub_id, events, **kwargs):
+    webhook = Webhook.objects.create(hub_id=hub_id, name='Hook', url='https://example.com', events=events, **kwargs)
+    sync_subscriptions([webhook])
+    return webhook
+
+
+def test_event_patterns():
+    assert event_patterns('sale.line.created') == ['sale.line.created', 'sale.line.*', 'sale.*', '*']
+
+
+@pytest.mark.django_db
+class TestRouting:
+    """Subscription index."""
+
+    def test_exact_and_wildcard(self, hub_id):
+        exact = _webhook(hub_id, ['sale.created'])
+        wildcard = _webhook(hub_id, 'sale.*')
+        catch_all = _webhook(hub_id, ['*'])
+        _webhook(hub_id, ['customer.updated'])
+        assert set(resolve_webhook_ids(hub_id, 'sale.created')) == {exact.pk, wildcard.pk, catch_all.pk}
+        assert set(resolve_webhook_ids(hub_id, 'sale.refunded')) == {wildcard.pk, catch_all.pk}
+
+    def test_scoped_to_hub(self, hub_id):
+        import uuid
+        _webhook(uuid.uuid4(), ['sale.created'])
+        assert resolve_webhook_ids(hub_id, 'sale.created') == []
+
+    def test_inactive_webhooks_not_routed(self, hub_id):
+        _webhook(hub_id, ['sale.created'], is_active=False)
+        assert resolve_webhook_ids(hub_id, 'sale.created') == []
+
+    def test_lookup_is_single_query(self, hub_id, django_assert_num_queries):
+        for i in range(200):
+            _webhook(hub_id, [f'event.{i}'])
+        with django_assert_num_queries(1):
+            assert len(resolve_webhook_ids(hub_id, 'event.7')) == 1
+
+    def test_plain_save_resyncs(self, hub_id):
+        webhook = Webhook.objects.create(hub_id=hub_id, name='Hook', url='https://example.com', events=['sale.created'])
+        assert resolve_webhook_ids(hub_id, 'sale.created') == [webhook.pk]
+        webhook.events = ['sale.refunded']
+        webhook.save()
+        assert resolve_webhook_ids(hub_id, 'sale.created') == []
+        assert resolve_webhook_ids(hub_id, 'sale.refunded') == [webhook.pk]
+
+    def test_unrelated_field_save_skips_resync(self, hub_id, django_assert_num_queries):
+        webhook = _webhook(hub_id, ['sale.created'])
+        webhook.failure_count = 1
+        with django_assert_num_queries(1):
+            webhook.save(update_fields=['failure_count'])
+
+    def test_edit_view_resyncs(self, auth_client, hub_id, webhook):
+        url = reverse('api_connect:webhook_edit', args=[webhook.pk])
+        auth_client.post(url, {'name': 'Hook', 'url': 'https://example.com', 'events': 'sale.created', 'is_active': 'on'})
+        assert resolve_webhook_ids(hub_id, 'sale.created') == [webhook.pk]
+
+    def test_toggle_view_resyncs(self, auth_client, hub_id):
+        webhook = _webhook(hub_id, ['sale.created'])
+        auth_client.post(reverse('api_connect:webhook_toggle_status', args=[webhook.pk]))
+        assert not WebhookSubscription.objects.filter(webhook=webhook).exists()
+
+    def test_bulk_action_resyncs(self, auth_client, hub_id):
+        webhook = _webhook(hub_id, ['sale.created'])
+        auth_client.post(reverse('api_connect:webhooks_bulk_action'), {'ids': str(webhook.pk), 'action': 'delete'})
+        assert resolve_webhook_ids(hub_id, 'sale.created') == []
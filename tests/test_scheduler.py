@@ -0,0 +1,106 @@
+"""Tests for fair scheduling of delivery batches."""
+import uuid
+
+import pytest
+
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.scheduler import FairScheduler, deficit_round_robin
+from api_connect.delivery.worker import DeliveryWorkerPool
+from api_connect.models import APIConnectSettings, WebhookDelivery
+
+
+class TestDeficitRoundRobin:
+    """Splitting slots over queues."""
+
+    def test_equal_shares(self):
+        granted, _ = deficit_round_robin({'a': 100, 'b': 100, 'c': 100}, 9, {})
+        assert granted == {'a': 3, 'b': 3, 'c': 3}
+
+    def test_short_queues_leave_slots_to_others(self):
+        granted, _ = deficit_round_robin({'a': 100, 'b': 1, 'c': 2}, 10, {})
+        assert granted == {'a': 7, 'b': 1, 'c': 2}
+
+    def test_next_call_starts_after_last_served(self):
+        deficits = {}
+        first, last = deficit_round_robin({'a': 10, 'b': 10, 'c': 10}, 2, deficits)
+        second, _ = deficit_round_robin({'a': 10, 'b': 10, 'c': 10}, 2, deficits, last)
+        assert (first, second) == ({'a': 1, 'b': 1}, {'c': 1, 'a': 1})
+
+    def test_unused_credit_carries_over(self):
+        deficits = {}
+        granted, last = deficit_round_robin({'a': 10, 'b': 10}, 5, deficits, quantum=4)
+        assert granted == {'a': 4, 'b': 1}
+        assert deficits == {'a': 0, 'b': 3}
+        granted, _ = deficit_round_robin({'a': 10, 'b': 10}, 7, deficits, last, quantum=4)
+        assert granted == {'a': 4, 'b': 3}
+
+    def test_empty_queue_drops_credit(self):
+        deficits = {'a': 3}
+        deficit_round_robin({'a': 0, 'b': 5}, 2, deficits)
+        assert 'a' not in deficits
+
+
+class TestFairScheduler:
+    """Hub then endpoint shares."""
+
+    def test_hubs_share_before_endpoints(self):
+        noisy, quiet = uuid.UUID(int=1), uuid.UUID(int=2)
+        allocation = FairScheduler().allocate({
+            noisy: {'n1': 500, 'n2': 500, 'n3': 500},
+            quiet: {'q1': 3},
+        }, 10)
+        assert allocation['q1'] == 3
+        assert sum(allocation[w] for w in ('n1', 'n2', 'n3')) == 7
+
+    def test_room_caps_hub(self):
+        capped, other = uuid.UUID(int=1), uuid.UUID(int=2)
+        allocation = FairScheduler().allocate({capped: {'c': 50}, other: {'o': 50}}, 20, {capped: 2})
+        assert allocation == {'c': 2, 'o': 18}
+
+
+@pytest.mark.django_db
+class TestFairClaims:
+    """Claiming from a shared outbox."""
+
+    def test_quiet_hub_is_not_starved(self, hub_id, make_subscriber):
+        quiet_hub = uuid.uuid4()
+        make_subscriber(hub_id, 'Noisy')
+        make_subscriber(quiet_hub, 'Quiet')
+        for _ in range(50):
+            publish(hub_id, 'sale.created', {})
+        publish(quiet_hub, 'sale.created', {})
+        batch = DeliveryWorkerPool(workers=1, batch_size=10).claim()
+        assert len(batch) == 10
+        assert sum(1 for d in batch if d.hub_id == quiet_hub) == 1
+
+    def test_endpoints_share_a_hub(self, hub_id, make_subscriber):
+        first = make_subscriber(hub_id, 'First')
+        for _ in range(30):
+            publish(hub_id, 'sale.created', {})
+        second = make_subscriber(hub_id, 'Second')
+        WebhookDelivery.objects.bulk_create([
+            WebhookDelivery(hub_id=hub_id, webhook=second, event=d.event, next_attempt_at=d.next_attempt_at)
+            for d in WebhookDelivery.objects.filter(webhook=first)[:3]
+        ])
+        batch = DeliveryWorkerPool(workers=1, batch_size=10).claim()
+        assert sum(1 for d in batch if d.webhook_id == second.pk) == 3
+
+    def test_in_flight_cap_spans_workers(self, hub_id, make_subscriber):
+        make_subscriber(hub_id, 'Capped')
+        hub_settings = APIConnectSettings.get_settings(hub_id)
+        hub_settings.delivery_max_in_flight = 4
+        hub_settings.save()
+        for _ in range(10):
+            publish(hub_id, 'sale.created', {})
+        assert len(DeliveryWorkerPool(workers=1).claim()) == 4
+        assert DeliveryWorkerPool(workers=1).claim() == []
+
+    def test_capped_hub_drains_to_completion(self, hub_id, make_subscriber, webhook_server):
+        make_subscriber(hub_id, 'Capped')
+        hub_settings = APIConnectSettings.get_settings(hub_id)
+        hub_settings.delivery_max_in_flight = 3
+        hub_settings.save()
+        for _ in range(10):
+            publish(hub_id, 'sale.created', {})
+        assert DeliveryWorkerPool(workers=2).drain() == 10
+        assert len(webhook_server.received) == 10
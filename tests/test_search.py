@@ -0,0 +1,131 @@
+"""Tests for indexed API key and webhook search."""
+import pytest
+from django.db import connection
+from django.urls import reverse
+
+from api_connect.models import APIKey, Webhook
+from api_connect.search import SQLITE_TRIGRAM, search
+
+KEY_FIELDS = ['name', 'key_prefix']
+
+
+def _key(hub_id, name, prefix='ak_0000000'):
+    return APIKey.objects.create(hub_id=hub_id, name=name, key_prefix=prefix, key_hash='secret-hash')
+
+
+def _names(qs):
+    return sorted(obj.name for obj in qs)
+
+
+@pytest.mark.django_db
+class TestSearch:
+    """``search()`` on the active database."""
+
+    def test_substring_of_any_field(self, hub_id):
+        _key(hub_id, 'Shopify sync')
+        _key(hub_id, 'Backup', prefix='ak_shopxyz')
+        _key(hub_id, 'Reporting')
+        qs, _ = search(APIKey.objects.filter(hub_id=hub_id), 'SHOP', KEY_FIELDS)
+        assert _names(qs) == ['Backup', 'Shopify sync']
+
+    def test_exact_name_ranks_first(self, hub_id):
+        _key(hub_id, 'Zapier production integration')
+        _key(hub_id, 'Zapier')
+        qs, ranked = search(APIKey.objects.filter(hub_id=hub_id), 'zapier', KEY_FIELDS)
+        if not ranked:
+            pytest.skip('no indexed search on this database')
+        assert [k.name for k in qs.order_by('-search_rank')] == ['Zapier', 'Zapier production integration']
+
+    def test_only_given_fields(self, hub_id):
+        _key(hub_id, 'Shopify sync')
+        _key(hub_id, 'Backup', prefix='ak_shopxyz')
+        qs, _ = search(APIKey.objects.filter(hub_id=hub_id), 'shop', ['name'])
+        assert _names(qs) == ['Shopify sync']
+
+    def test_short_query_is_unranked(self, hub_id):
+        _key(hub_id, 'ERP')
+        qs, ranked = search(APIKey.objects.filter(hub_id=hub_id), 'rp', KEY_FIELDS)
+        assert not ranked and _names(qs) == ['ERP']
+
+    def test_index_follows_updates_and_deletes(self, hub_id):
+        key = _key(hub_id, 'Old name')
+        APIKey.objects.filter(pk=key.pk).update(name='New name')
+        qs = APIKey.objects.filter(hub_id=hub_id)
+        assert not search(qs, 'old name', KEY_FIELDS)[0].exists()
+        assert search(qs, 'new name', KEY_FIELDS)[0].exists()
+        APIKey.all_objects.filter(pk=key.pk).delete()
+        assert not search(qs, 'new name', KEY_FIELDS)[0].exists()
+
+    def test_quotes_in_query(self, hub_id):
+        _key(hub_id, 'The "main" key')
+        qs, _ = search(APIKey.objects.filter(hub_id=hub_id), '"main"', KEY_FIELDS)
+        assert _names(qs) == ['The "main" key']
+
+
+@pytest.mark.django_db
+class TestSearchIndexes:
+    """What migrations 0013 and 0017 leave behind."""
+
+    def test_fts_tables_and_triggers(self):
+        if connection.vendor != 'sqlite' or not SQLITE_TRIGRAM:
+            pytest.skip('FTS5 search index is SQLite 3.34+ only')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT type, name FROM sqlite_master WHERE name LIKE 'api_connect_%_fts%'")
+            objects = set(cursor.fetchall())
+        for table in ('api_connect_apikey', 'api_connect_webhook'):
+            assert ('table', f'{table}_fts') in objects
+            for suffix in ('ai', 'ad', 'au'):
+                assert ('trigger', f'{table}_fts_{suffix}') in objects
+
+    def test_trigram_indexes(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('trigram indexes are PostgreSQL only')
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname LIKE 'api_connect_%_trgm'")
+            indexes = {row[0] for row in cursor.fetchall()}
+        assert indexes == {
+            'api_connect_apikey_name_trgm', 'api_connect_apikey_key_prefix_trgm',
+            'api_connect_webhook_name_trgm', 'api_connect_webhook_url_trgm',
+        }
+
+    def test_webhook_index_follows_updates(self, hub_id):
+        webhook = Webhook.objects.create(hub_id=hub_id, name='Orders', url='https://erp.example.com/hooks')
+        Webhook.objects.filter(pk=webhook.pk).update(url='https://shop.example.com/hooks')
+        qs = Webhook.objects.filter(hub_id=hub_id)
+        assert not search(qs, 'erp.example', ['url'])[0].exists()
+        assert search(qs, 'shop.example', ['url'])[0].exists()
+
+
+@pytest.mark.django_db
+class TestListSearch:
+    """The ``q`` parameter of the list views."""
+
+    def test_api_keys(self, auth_client, hub_id):
+        _key(hub_id, 'Zapier')
+        _key(hub_id, 'Zapier staging')
+        deleted = _key(hub_id, 'Deleted zapier')
+        deleted.is_deleted = True
+        deleted.save()
+        _key(hub_id, 'Other', prefix='ak_1111111')
+        response = auth_client.get(reverse('api_connect:api_keys_list'), {'q': 'zapier'})
+        assert [k.name for k in response.context['api_keys']] == ['Zapier', 'Zapier staging']
+
+    def test_api_keys_not_by_hash(self, auth_client, hub_id):
+        _key(hub_id, 'Integration')
+        response = auth_client.get(reverse('api_connect:api_keys_list'), {'q': 'secret-hash'})
+        assert len(response.context['api_keys']) == 0
+
+    def test_ranked_results_page(self, auth_client, hub_id):
+        for i in range(15):
+            _key(hub_id, f'Sync {i:02d}')
+        url = reverse('api_connect:api_keys_list')
+        first = auth_client.get(url, {'q': 'sync'}).context['page_obj']
+        second = auth_client.get(url, {'q': 'sync', 'cursor': first.next_cursor}).context['page_obj']
+        assert len(first) == 12 and len(second) == 3
+        assert len({k.pk for k in first} | {k.pk for k in second}) == 15
+
+    def test_webhooks_by_url_not_secret(self, auth_client, hub_id):
+        Webhook.objects.create(hub_id=hub_id, name='Orders', url='https://erp.example.com/hooks', secret='topsecret')
+        url = reverse('api_connect:webhooks_list')
+        assert [w.name for w in auth_client.get(url, {'q': 'erp.example'}).context['webhooks']] == ['Orders']
+        assert len(auth_client.get(url, {'q': 'topsecret'}).context['webhooks']) == 0
@@ -0,0 +1,50 @@
+"""Tests for webhook payload signing."""
+import hashlib
+import hmac
+
+import pytest
+
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.signing import SIGNATURE_HEADER, TIMESTAMP_HEADER, Signer, verify_signature
+from api_connect.delivery.worker import DeliveryWorkerPool
+
+
+class TestSigner:
+    """Signatures and verification."""
+
+    def test_matches_plain_hmac(self):
+        body = b'{"event": "sale.created"}'
+        expected = hmac.new(b'topsecret', b'1700000000.' + body, hashlib.sha256).hexdigest()
+        assert Signer().sign('topsecret', body, 1700000000) == 'sha256=' + expected
+
+    def test_keyed_state_is_reused(self):
+        signer = Signer()
+        first = signer.sign('topsecret', b'a', 1)
+        assert signer.sign('topsecret', b'b', 1) != first
+        assert signer.sign('topsecret', b'a', 1) == first
+        assert len(signer._keyed) == 1
+
+    def test_no_secret_no_headers(self):
+        assert Signer().headers('', b'{}') == {}
+
+    def test_verify(self):
+        headers = Signer().headers('topsecret', b'{}', timestamp=1000)
+        assert verify_signature('topsecret', b'{}', headers[TIMESTAMP_HEADER], headers[SIGNATURE_HEADER], now=1010)
+        assert not verify_signature('other', b'{}', headers[TIMESTAMP_HEADER], headers[SIGNATURE_HEADER], now=1010)
+        assert not verify_signature('topsecret', b'{ }', headers[TIMESTAMP_HEADER], headers[SIGNATURE_HEADER], now=1010)
+
+    def test_verify_rejects_stale_timestamp(self):
+        headers = Signer().headers('topsecret', b'{}', timestamp=1000)
+        assert not verify_signature('topsecret', b'{}', headers[TIMESTAMP_HEADER], headers[SIGNATURE_HEADER], now=5000)
+
+
+@pytest.mark.django_db
+class TestSignedDelivery:
+    """Signature headers on delivered POSTs."""
+
+    def test_delivery_is_signed(self, hub_id, make_subscriber, webhook_server):
+        make_subscriber(hub_id, 'Signed', secret='topsecret')
+        publish(hub_id, 'sale.created', {'total': '10.00'})
+        DeliveryWorkerPool(workers=1).drain()
+        _, headers, body = webhook_server.received[0]
+        assert verify_signature('topsecret', body, headers[TIMESTAMP_HEADER], headers[SIGNATURE_HEADER])
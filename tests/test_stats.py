@@ -0,0 +1,143 @@
+"""Tests for cached dashboard statistics."""
+import uuid
+from datetime import timedelta
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils import timezone
+
+from api_connect.delivery.outbox import publish
+from api_connect.delivery.worker import DeliveryWorkerPool
+from api_connect.models import APIKey, Webhook, WebhookDeliveryAttempt
+from api_connect.signals import rows_updated
+from api_connect.stats import compute_stats, dashboard_stats
+
+
+@pytest.fixture(autouse=True)
+def locmem_cache(settings):
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stats'}}
+    caches['default'].clear()
+    yield
+    caches['default'].clear()
+
+
+def _key(hub_id, **kwargs):
+    return APIKey.objects.create(hub_id=hub_id, name='Key', key_prefix='ak_0000000', key_hash='x', **kwargs)
+
+
+def _webhook(hub_id, **kwargs):
+    return Webhook.objects.create(hub_id=hub_id, name='Hook', url='https://example.com/hook', **kwargs)
+
+
+@pytest.mark.django_db
+class TestComputeStats:
+    """Numbers from one aggregate query per model."""
+
+    def test_counts(self, hub_id, django_assert_num_queries):
+        now = timezone.now()
+        _key(hub_id)
+        _key(hub_id, is_active=False)
+        _key(hub_id, expires_at=now - timedelta(days=1))
+        _key(hub_id, expires_at=now + timedelta(days=1))
+        _webhook(hub_id, failure_count=3, circuit_state='open')
+        hook = _webhook(hub_id, is_active=False)
+        for status in (200, 204, 500, None):
+            WebhookDeliveryAttempt.objects.create(
+                hub_id=hub_id, webhook=hook, event_name='sale.created', response_status=status, day=now.date(),
+            )
+        with django_assert_num_queries(4):
+            stats = compute_stats(hub_id, now)
+        assert (stats['total_api_keys'], stats['active_api_keys'], stats['expired_api_keys']) == (4, 2, 1)
+        assert (stats['total_webhooks'], stats['active_webhooks'], stats['failing_webhooks']) == (2, 1, 1)
+        assert (stats['circuits_open'], stats['circuits_half_open']) == (1, 0)
+        assert (stats['deliveries_24h'], stats['delivery_success_rate']) == (4, 50)
+
+    def test_empty_hub(self, hub_id):
+        stats = compute_stats(hub_id)
+        assert stats['total_api_keys'] == 0
+        assert stats['delivery_success_rate'] is None and stats['avg_latency_24h'] is None
+
+
+@pytest.mark.django_db
+class TestCache:
+    """Per-hub caching and invalidation."""
+
+    def test_warm_cache_runs_no_queries(self, hub_id, django_assert_num_queries):
+        _key(hub_id)
+        dashboard_stats(hub_id)
+        with django_assert_num_queries(0):
+            assert dashboard_stats(hub_id)['total_api_keys'] == 1
+
+    def test_save_invalidates(self, hub_id):
+        assert dashboard_stats(hub_id)['total_webhooks'] == 0
+        hook = _webhook(hub_id)
+        assert dashboard_stats(hub_id)['total_webhooks'] == 1
+        hook.failure_count = 2
+        hook.save()
+        assert dashboard_stats(hub_id)['failing_webhooks'] == 1
+
+    def test_other_hubs_keep_their_entry(self, hub_id, django_assert_num_queries):
+        other = uuid.uuid4()
+        dashboard_stats(other)
+        _key(hub_id)
+        with django_assert_num_queries(0):
+            dashboard_stats(other)
+
+    def test_rows_updated_invalidates(self, hub_id):
+        key = _key(hub_id)
+        assert dashboard_stats(hub_id)['active_api_keys'] == 1
+        APIKey.objects.filter(pk=key.pk).update(is_active=False)
+        assert dashboard_stats(hub_id)['active_api_keys'] == 1  # update() alone sends nothing
+        rows_updated.send(sender=APIKey, hub_ids=[hub_id])
+        assert dashboard_stats(hub_id)['active_api_keys'] == 0
+
+    def test_bulk_action_invalidates(self, auth_client, hub_id):
+        key = _key(hub_id)
+        assert dashboard_stats(hub_id)['active_api_keys'] == 1
+        auth_client.post(reverse('api_connect:api_keys_bulk_action'), {'ids': str(key.pk), 'action': 'deactivate'})
+        assert dashboard_stats(hub_id)['active_api_keys'] == 0
+
+    def test_entry_expires_with_next_key(self, hub_id):
+        _key(hub_id, expires_at=timezone.now() + timedelta(seconds=30))
+        dashboard_stats(hub_id)
+        cache = caches['default']
+        # LocMemCache keeps the absolute expiry per key.
+        expiry = cache._expire_info[cache.make_key(f'api_connect:stats:{hub_id}')]
+        assert expiry - timezone.now().timestamp() <= 31
+
+    def test_dashboard_view(self, auth_client, hub_id):
+        _key(hub_id)
+        response = auth_client.get(reverse('api_connect:dashboard'))
+        assert response.status_code == 200
+        assert response.context['active_api_keys'] == 1
+
+
+@pytest.mark.django_db
+class TestWorkerInvalidation:
+    """The delivery worker only invalidates when dashboard counts move."""
+
+    @pytest.fixture
+    def sent(self):
+        hub_ids = []
+
+        def receiver(sender, **kwargs):
+            hub_ids.extend(kwargs['hub_ids'])
+
+        rows_updated.connect(receiver, sender=Webhook)
+        yield hub_ids
+        rows_updated.disconnect(receiver, sender=Webhook)
+
+    def test_healthy_delivery_sends_nothing(self, hub_id, make_subscriber, webhook_server, sent):
+        make_subscriber(hub_id)
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        assert len(webhook_server.received) == 1
+        assert sent == []
+
+    def test_first_failure_invalidates(self, hub_id, make_subscriber, webhook_server, sent):
+        make_subscriber(hub_id)
+        webhook_server.status = 500
+        publish(hub_id, 'sale.created', {})
+        DeliveryWorkerPool(workers=1).drain()
+        assert sent == [hub_id]
@@ -0,0 +1,80 @@
+"""Tests for the pooled webhook HTTP transport."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from api_connect.delivery.transport import HostBusy, Transport, TransportError
+
+
+class TestTransport:
+    """Keep-alive pooling and per-host limits."""
+
+    def test_post(self, webhook_server):
+        response = Transport().post(webhook_server.url, b'{"a": 1}', {'X-Test': '1'})
+        assert response.ok
+        assert response.body == b'ok'
+        path, headers, body = webhook_server.received[0]
+        assert body == b'{"a": 1}'
+        assert headers['X-Test'] == '1'
+
+    def test_connections_are_reused(self, webhook_server):
+        transport = Transport()
+        for _ in range(10):
+            assert transport.post(webhook_server.url, b'{}').ok
+        assert webhook_server.connections == 1
+
+    def test_unpooled_opens_connection_per_request(self, webhook_server):
+        transport = Transport(pooled=False)
+        for _ in range(5):
+            assert transport.post(webhook_server.url, b'{}').ok
+        assert webhook_server.connections == 5
+
+    def test_per_host_limit(self, webhook_server):
+        webhook_server.delay = 0.05
+        transport = Transport(max_per_host=2)
+        pool = transport.get_pool('http', '127.0.0.1', webhook_server.server_port)
+        peak = []
+
+        def post(_):
+            response = transport.post(webhook_server.url, b'{}')
+            peak.append(pool.in_use)
+            return response.status
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            assert set(executor.map(post, range(8))) == {200}
+        assert max(peak) <= 2
+        assert webhook_server.connections <= 2
+
+    def test_busy_host_raises_instead_of_blocking(self, webhook_server):
+        webhook_server.delay = 0.5
+        transport = Transport(max_per_host=1, adaptive=False)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow = executor.submit(transport.post, webhook_server.url, b'{}')
+            time.sleep(0.1)
+            with pytest.raises(HostBusy):
+                transport.post(webhook_server.url, b'{}', wait=0.05)
+            assert slow.result().ok
+
+    def test_idle_pools_are_evicted(self, webhook_server, monkeypatch):
+        monkeypatch.setattr('api_connect.delivery.transport.IDLE_POOL_SECONDS', 0)
+        transport = Transport()
+        transport.post(webhook_server.url, b'{}', hub_id='first')
+        transport.post(webhook_server.url, b'{}', hub_id='second')
+        assert transport.host_limit(webhook_server.url, 'first') is None
+        assert transport.host_limit(webhook_server.url, 'second') is not None
+
+    def test_http_error_status(self, webhook_server):
+        webhook_server.status = 503
+        response = Transport().post(webhook_server.url, b'{}')
+        assert response.status == 503
+        assert not response.ok
+
+    def test_connection_refused(self):
+        with pytest.raises(TransportError):
+            Transport(connect_timeout=1).post('http://127.0.0.1:1/hook', b'{}')
+
+    def test_read_timeout(self, webhook_server):
+        webhook_server.delay = 0.5
+        with pytest.raises(TransportError):
+            Transport().post(webhook_server.url, b'{}', read_timeout=0.1)
@@ -0,0 +1,122 @@
+"""Tests for coalesced last_used_at updates and usage rollups."""
+import threading
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from api_connect.models import APIKey, APIKeyUsage
+from api_connect.usage import UsageMeter, UsageRecorder
+
+
+@pytest.mark.django_db
+class TestUsageRecorder:
+    """Buffered last_used_at writes."""
+
+    def test_record_is_buffered(self, api_key):
+        APIKey.objects.filter(pk=api_key.pk).update(last_used_at=None)
+        recorder = UsageRecorder(interval=3600)
+        recorder.record(api_key.pk)
+        api_key.refresh_from_db()
+        assert api_key.last_used_at is None
+        assert recorder.pending(api_key.pk) is not None
+
+    def test_flush_is_one_update(self, hub_id, api_key, django_assert_num_queries):
+        other = APIKey.objects.create(hub_id=hub_id, name='Other', key_prefix='other', key_hash='x')
+        recorder = UsageRecorder(interval=3600)
+        for _ in range(10):
+            recorder.record(api_key.pk)
+            recorder.record(other.pk)
+        with django_assert_num_queries(1):
+            assert recorder.flush() == 2
+        assert recorder.flush() == 0
+
+    def test_flush_writes_latest_timestamp(self, api_key):
+        recorder = UsageRecorder(interval=3600)
+        latest = timezone.now() + timezone.timedelta(minutes=5)
+        recorder.record(api_key.pk, when=timezone.now())
+        recorder.record(api_key.pk, when=latest)
+        recorder.flush()
+        api_key.refresh_from_db()
+        assert api_key.last_used_at == latest
+
+    def test_flushes_on_a_timer(self, api_key):
+        recorder = UsageRecorder(interval=0)
+        flushed = threading.Event()
+        recorder.flush = flushed.set
+        recorder.record(api_key.pk)
+        assert flushed.wait(5)
+        recorder.stop()
+
+    def test_stop_writes_buffered_timestamps(self, api_key):
+        recorder = UsageRecorder(interval=3600)
+        when = timezone.now() + timezone.timedelta(minutes=1)
+        recorder.record(api_key.pk, when=when)
+        recorder.stop()
+        api_key.refresh_from_db()
+        assert api_key.last_used_at == when
+
+    def test_apply_pending(self, api_key):
+        recorder = UsageRecorder(interval=3600)
+        when = timezone.now() + timezone.timedelta(minutes=1)
+        recorder.record(api_key.pk, when=when)
+        recorder.apply_pending([api_key])
+        assert api_key.last_used_at == when
+
+
+@pytest.mark.django_db
+class TestUsageMeter:
+    """Minute and hour rollups."""
+
+    def test_flush_writes_minute_and_hour_rollups(self, hub_id, api_key, django_assert_num_queries):
+        meter = UsageMeter(interval=3600)
+        meter._last_prune = timezone.now()
+        when = timezone.now().replace(minute=10)
+        for status, latency in ((200, 3), (200, 40), (500, 900)):
+            meter.record(hub_id, api_key.pk, status, latency, when=when)
+        meter.record(hub_id, api_key.pk, 200, 20, when=when + timezone.timedelta(minutes=1))
+        # INSERT, SELECT and UPDATE inside a savepoint, however many requests.
+        with django_assert_num_queries(5):
+            assert meter.flush() == 3
+        hour = APIKeyUsage.objects.get(granularity='hour')
+        assert (hour.request_count, hour.error_count, hour.latency_total_ms) == (4, 1, 963)
+        assert hour.period_start == when.replace(minute=0, second=0, microsecond=0)
+        assert hour.latency_percentile(0.5) == 25
+        assert APIKeyUsage.objects.filter(granularity='minute').count() == 2
+
+    def test_flushes_accumulate(self, hub_id, api_key):
+        meter = UsageMeter(interval=3600)
+        for _ in range(2):
+            meter.record(hub_id, api_key.pk, 404, 10)
+            meter.flush()
+        hour = APIKeyUsage.objects.get(granularity='hour')
+        assert (hour.request_count, hour.error_count) == (2, 2)
+        assert sum(hour.latency_histogram) == 2
+
+    def test_flush_errors_are_logged(self, hub_id, api_key, caplog):
+        meter = UsageMeter(interval=3600)
+
+        def fail():
+            raise RuntimeError('database is locked')
+
+        meter.flush = fail
+        assert meter.flush_safely() == 0
+        assert 'UsageMeter flush failed' in caplog.text
+
+    def test_prune_drops_old_minutes(self, hub_id, api_key):
+        meter = UsageMeter(interval=3600, minute_retention=1)
+        meter.record(hub_id, api_key.pk, 200, 10, when=timezone.now() - timezone.timedelta(hours=3))
+        meter.flush()
+        assert not APIKeyUsage.objects.filter(granularity='minute').exists()
+        assert APIKeyUsage.objects.filter(granularity='hour').exists()
+
+    def test_list_sorts_by_requests(self, auth_client, hub_id, api_key):
+        busy = APIKey.objects.create(hub_id=hub_id, name='Busy', key_prefix='busy', key_hash='x')
+        meter = UsageMeter(interval=3600)
+        for _ in range(5):
+            meter.record(hub_id, busy.pk, 200, 10)
+        meter.flush()
+        response = auth_client.get(reverse('api_connect:api_keys_list'), {'sort': 'requests_24h', 'dir': 'desc'})
+        assert [k.name for k in response.context['api_keys']][0] == 'Busy'
+        assert response.context['api_keys'][0].requests_24h == 5
+
@@ -1,7 +1,12 @@
 """Tests for api_connect views."""
 import pytest
+from django.contrib.auth.hashers import check_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from api_connect.models import APIKey
+
 
 @pytest.mark.django_db
 class TestDashboard:
@@ -78,13 +83,16 @@ class TestAPIKeyViews:
         url = reverse('api_connect:api_key_add')
         data = {
             'name': 'New Name',
-            'key_prefix': 'New Key Prefix',
-            'key_hash': 'New Key Hash',
             'is_active': 'on',
             'expires_at': '2025-01-15T10:00',
         }
         response = auth_client.post(url, data)
         assert response.status_code == 200
+        raw_key = response.context['raw_key']
+        assert raw_key in response.content.decode()
+        key = APIKey.objects.get(name='New Name')
+        assert key.key_prefix and raw_key.startswith(key.key_prefix)
+        assert raw_key not in key.key_hash and check_password(raw_key, key.key_hash)
 
     def test_edit_form_loads(self, auth_client, api_key):
         """Test edit form loads."""
@@ -97,13 +105,14 @@ class TestAPIKeyViews:
         url = reverse('api_connect:api_key_edit', args=[api_key.pk])
         data = {
             'name': 'Updated Name',
-            'key_prefix': 'Updated Key Prefix',
-            'key_hash': 'Updated Key Hash',
             'is_active': '',
             'expires_at': '2025-01-15T10:00',
         }
+        key_hash = api_key.key_hash
         response = auth_client.post(url, data)
         assert response.status_code == 200
+        api_key.refresh_from_db()
+        assert api_key.key_hash == key_hash
 
     def test_delete(self, auth_client, api_key):
         """Test soft delete via POST."""
@@ -248,6 +257,54 @@ class TestWebhookViews:
         assert response.status_code == 302
 
 
+@pytest.mark.django_db
+class TestRowSwaps:
+    """Mutations answer with out-of-band swaps of the rows they touched."""
+
+    HTMX = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'datatable-body'}
+
+    def test_toggle_swaps_one_row(self, auth_client, api_key, hub_id):
+        other = APIKey.objects.create(hub_id=hub_id, name='Other', key_prefix='ak_other00', key_hash='x')
+        response = auth_client.post(reverse('api_connect:api_key_toggle_status', args=[api_key.pk]), **self.HTMX)
+        content = response.content.decode()
+        assert response['HX-Reswap'] == 'none'
+        assert content.count('hx-swap-oob="outerHTML"') == 1
+        assert f'id="api-key-{api_key.pk}"' in content
+        assert str(other.pk) not in content
+
+    def test_queries_do_not_grow_with_list(self, auth_client, api_key, hub_id):
+        url = reverse('api_connect:api_key_toggle_status', args=[api_key.pk])
+        auth_client.post(url, **self.HTMX)  # warm per-process caches
+        with CaptureQueriesContext(connection) as small:
+            auth_client.post(url, **self.HTMX)
+        APIKey.objects.bulk_create([
+            APIKey(hub_id=hub_id, name=f'Key {i}', key_prefix=f'ak_{i:07d}', key_hash='x') for i in range(30)
+        ])
+        with CaptureQueriesContext(connection) as large:
+            auth_client.post(url, **self.HTMX)
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_delete_removes_row(self, auth_client, webhook):
+        response = auth_client.post(reverse('api_connect:webhook_delete', args=[webhook.pk]), **self.HTMX)
+        assert f'<tr id="webhook-{webhook.pk}" hx-swap-oob="delete"></tr>' in response.content.decode()
+
+    def test_bulk_action_swaps_selected_rows(self, auth_client, api_key, hub_id):
+        other = APIKey.objects.create(hub_id=hub_id, name='Other', key_prefix='ak_other00', key_hash='x')
+        response = auth_client.post(
+            reverse('api_connect:api_keys_bulk_action'),
+            {'ids': f'{api_key.pk},{other.pk}', 'action': 'deactivate'}, **self.HTMX,
+        )
+        assert response.content.decode().count('hx-swap-oob="outerHTML"') == 2
+
+    def test_full_page_edit_redirects(self, auth_client, webhook):
+        response = auth_client.post(
+            reverse('api_connect:webhook_edit', args=[webhook.pk]),
+            {'name': 'Renamed', 'url': webhook.url, 'events': webhook.events},
+            HTTP_HX_REQUEST='true', HTTP_HX_TARGET='edit-webhook-form',
+        )
+        assert response['HX-Redirect'] == reverse('api_connect:webhooks_list')
+
+
 @pytest.mark.django_db
 class TestSettings:
     """Settings view tests."""
@@ -258,6 +315,24 @@ class TestSettings:
         response = auth_client.get(url)
         assert response.status_code == 200
 
+    def test_settings_save(self, auth_client, hub_id):
+        """Test saving delivery settings."""
+        from api_connect.models import APIConnectSettings
+        url = reverse('api_connect:settings')
+        response = auth_client.post(url, {'connect_timeout': '3', 'read_timeout': '15', 'max_connections_per_host': '4'})
+        assert response.status_code == 200
+        settings = APIConnectSettings.get_settings(hub_id)
+        assert (settings.connect_timeout, settings.read_timeout, settings.max_connections_per_host) == (3, 15, 4)
+
+    def test_settings_in_flight_cap_accepts_zero(self, auth_client, hub_id):
+        """Test the in-flight cap can be removed again with 0."""
+        from api_connect.models import APIConnectSettings
+        url = reverse('api_connect:settings')
+        auth_client.post(url, {'delivery_max_in_flight': '20'})
+        assert APIConnectSettings.get_settings(hub_id).delivery_max_in_flight == 20
+        auth_client.post(url, {'delivery_max_in_flight': '0'})
+        assert APIConnectSettings.get_settings(hub_id).delivery_max_in_flight == 0
+
     def test_settings_requires_auth(self, client):
         """Test settings requires authentication."""
         url = reverse('api_connect:settings')
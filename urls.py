@@ -27,6 +27,14 @@ urlpatterns = [
     path('webhooks/<uuid:pk>/toggle/', views.webhook_toggle_status, name='webhook_toggle_status'),
     path('webhooks/bulk/', views.webhooks_bulk_action, name='webhooks_bulk_action'),
 
+    # Delivery attempts log
+    path('webhooks/<uuid:pk>/attempts/', views.delivery_attempts_list, name='delivery_attempts_list'),
+
+    # Dead letters
+    path('webhooks/dead-letters/', views.dead_letters_list, name='dead_letters_list'),
+    path('webhooks/dead-letters/<uuid:pk>/replay/', views.dead_letter_replay, name='dead_letter_replay'),
+    path('webhooks/dead-letters/replay/', views.dead_letters_replay_all, name='dead_letters_replay_all'),
+
     # Settings
     path('settings/', views.settings_view, name='settings'),
 ]
@@ -0,0 +1,212 @@
+"""
+Write-coalescing API key usage tracking.
+
+Authenticated requests only record in memory; nothing is written per request.
+
+- ``UsageRecorder`` keeps the latest ``APIKey.last_used_at`` per key and
+  writes pending timestamps with a single bulk UPDATE every
+  ``API_CONNECT_LAST_USED_INTERVAL`` seconds per process.
+- ``UsageMeter`` counts requests, errors and a latency histogram per key and
+  minute, and adds them to ``APIKeyUsage`` minute and hour rollups every
+  ``API_CONNECT_USAGE_FLUSH_INTERVAL`` seconds per process. A flush costs an
+  INSERT, a SELECT and a bulk UPDATE however many requests it covers.
+
+Both flush from a daemon thread started by the first ``record()``, and once
+more when the process exits, so the last values before a key goes idle are
+written too. A failed flush is logged and never reaches a request.
+"""
+import atexit
+import logging
+import threading
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from .models import LATENCY_BUCKETS_MS, APIKey, APIKeyUsage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 60
+DEFAULT_MINUTE_RETENTION_HOURS = 48
+# Floor for the flush thread's sleep, so a zero interval can't spin.
+MIN_FLUSH_INTERVAL = 0.1
+
+
+class _PeriodicFlush:
+    """Calls ``flush()`` every ``interval`` seconds on a daemon thread and at exit."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _start_flusher(self):
+        """Start the flush thread; called with ``self._lock`` held."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=f'api-connect-{type(self).__name__.lower()}', daemon=True,
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping.wait(max(self.interval, MIN_FLUSH_INTERVAL)):
+            self.flush_safely()
+            # The thread sleeps for a whole interval: don't hold a connection meanwhile.
+            connections.close_all()
+
+    def flush_safely(self):
+        """``flush()``, logging instead of raising; return rows written."""
+        try:
+            return self.flush()
+        except Exception:
+            logger.exception('%s flush failed', type(self).__name__)
+            return 0
+
+    def stop(self, timeout=None):
+        """Stop the flush thread and write what is still buffered."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush_safely()
+
+    def flush(self):
+        raise NotImplementedError
+
+
+class UsageRecorder(_PeriodicFlush):
+    """Buffers last-used timestamps per key and flushes them in bulk."""
+
+    def __init__(self, interval=DEFAULT_FLUSH_INTERVAL):
+        super().__init__(interval)
+        self._pending = {}  # str(key id) -> datetime
+
+    def record(self, key_id, when=None):
+        with self._lock:
+            self._pending[str(key_id)] = when or timezone.now()
+            self._start_flusher()
+
+    def pending(self, key_id):
+        """Buffered timestamp not yet written for ``key_id``, if any."""
+        return self._pending.get(str(key_id))
+
+    def flush(self):
+        """Write all buffered timestamps in one UPDATE; return rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        return APIKey.all_objects.filter(pk__in=list(pending)).update(last_used_at=Case(
+            *[When(pk=key_id, then=Value(when)) for key_id, when in pending.items()],
+            output_field=DateTimeField(),
+        ))
+
+    def apply_pending(self, api_keys):
+        """Overlay buffered timestamps on ``api_keys`` so the UI shows fresh values."""
+        if not self._pending:
+            return
+        for api_key in api_keys:
+            when = self._pending.get(str(api_key.pk))
+            if when and (api_key.last_used_at is None or when > api_key.last_used_at):
+                api_key.last_used_at = when
+
+
+def _add_stats(total, stats):
+    total[0] += stats[0]
+    total[1] += stats[1]
+    total[2] += stats[2]
+    histogram = total[3]
+    if len(histogram) < len(stats[3]):
+        histogram.extend([0] * (len(stats[3]) - len(histogram)))
+    for i, count in enumerate(stats[3]):
+        histogram[i] += count
+
+
+class UsageMeter(_PeriodicFlush):
+    """Aggregates per-key request metrics in memory and flushes rollups.
+
+    Responses with status 400 or above count as errors.
+    """
+
+    def __init__(self, interval=DEFAULT_FLUSH_INTERVAL, minute_retention=DEFAULT_MINUTE_RETENTION_HOURS):
+        super().__init__(interval)
+        self.minute_retention = minute_retention
+        # (hub_id, str(key id), minute) -> [requests, errors, latency ms, histogram]
+        self._pending = {}
+        self._last_prune = None
+
+    def record(self, hub_id, key_id, status, latency_ms, when=None):
+        minute = (when or timezone.now()).replace(second=0, microsecond=0)
+        bucket = bisect_left(LATENCY_BUCKETS_MS, latency_ms)
+        with self._lock:
+            stats = self._pending.get((hub_id, str(key_id), minute))
+            if stats is None:
+                stats = self._pending[(hub_id, str(key_id), minute)] = [0, 0, 0, [0] * (len(LATENCY_BUCKETS_MS) + 1)]
+            stats[0] += 1
+            stats[1] += status >= 400
+            stats[2] += round(latency_ms)
+            stats[3][bucket] += 1
+            self._start_flusher()
+
+    def flush(self):
+        """Add buffered metrics to the minute and hour rollups; return rows touched."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rollups = {}  # (key id, granularity, period start) -> [hub_id, stats]
+        for (hub_id, key_id, minute), stats in pending.items():
+            for granularity, period_start in (('minute', minute), ('hour', minute.replace(minute=0))):
+                entry = rollups.get((key_id, granularity, period_start))
+                if entry is None:
+                    entry = rollups[(key_id, granularity, period_start)] = [hub_id, [0, 0, 0, []]]
+                _add_stats(entry[1], stats)
+        with transaction.atomic():
+            # Make sure every row exists (other processes may be creating the
+            # same ones), then lock and add to them.
+            APIKeyUsage.all_objects.bulk_create([
+                APIKeyUsage(hub_id=hub_id, api_key_id=key_id, granularity=granularity, period_start=period_start)
+                for (key_id, granularity, period_start), (hub_id, _) in rollups.items()
+            ], ignore_conflicts=True)
+            rows = list(APIKeyUsage.all_objects.select_for_update().filter(
+                api_key_id__in=list({key for key, _, _ in rollups}),
+                period_start__in=list({period for _, _, period in rollups}),
+            ))
+            touched = []
+            for row in rows:
+                entry = rollups.get((str(row.api_key_id), row.granularity, row.period_start))
+                if entry is None:
+                    continue
+                total = [row.request_count, row.error_count, row.latency_total_ms, list(row.latency_histogram)]
+                _add_stats(total, entry[1])
+                row.request_count, row.error_count, row.latency_total_ms, row.latency_histogram = total
+                row.updated_at = timezone.now()
+                touched.append(row)
+            APIKeyUsage.all_objects.bulk_update(
+                touched, ['request_count', 'error_count', 'latency_total_ms', 'latency_histogram', 'updated_at'],
+            )
+        self.prune()
+        return len(touched)
+
+    def prune(self, now=None):
+        """Drop minute rollups older than the retention window, at most hourly."""
+        now = now or timezone.now()
+        if self._last_prune and now - self._last_prune < timedelta(hours=1):
+            return 0
+        self._last_prune = now
+        deleted, _ = APIKeyUsage.all_objects.filter(
+            granularity='minute', period_start__lt=now - timedelta(hours=self.minute_retention),
+        ).delete()
+        return deleted
+
+
+usage_recorder = UsageRecorder(interval=getattr(settings, 'API_CONNECT_LAST_USED_INTERVAL', DEFAULT_FLUSH_INTERVAL))
+usage_meter = UsageMeter(
+    interval=getattr(settings, 'API_CONNECT_USAGE_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+    minute_retention=getattr(settings, 'API_CONNECT_USAGE_MINUTE_RETENTION_HOURS', DEFAULT_MINUTE_RETENTION_HOURS),
+)
@@ -2,22 +2,87 @@
 API & Webhooks Module Views
 """
 from django.core.paginator import Paginator
-from django.db.models import Q, Count
+from datetime import timedelta
+
+from django.db.models import F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.http import HttpResponse
 from django.urls import reverse
 from django.shortcuts import get_object_or_404, render as django_render
+from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views.decorators.http import require_POST
 
 from apps.accounts.decorators import login_required, permission_required
 from apps.core.htmx import htmx_view
-from apps.core.services import export_to_csv, export_to_excel
 from apps.modules_runtime.navigation import with_module_nav
 
-from .models import APIKey, Webhook
+from .authentication import generate_api_key, invalidate_api_keys
+from .bulk import apply_bulk
+from .delivery.retry import replay_dead_letters
+from .exports import stream_csv, stream_excel
+from .models import APIConnectSettings, APIKey, APIKeyUsage, Webhook, WebhookDeadLetter, WebhookDeliveryAttempt
+from .pagination import paginate_keyset
+from .search import search
+from .stats import dashboard_stats
+from .usage import usage_recorder
 
 PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
+# per_page=0 ("Max") still pages, just with the largest page size.
+MAX_PER_PAGE = 500
+# Usage columns and dashboard cards cover the last day of hourly rollups.
+USAGE_WINDOW = timedelta(hours=24)
+
+
+def _keyset_page(qs, order_field, sort_dir, per_page, cursor=None, before=None):
+    """Page of ``qs`` ordered by ``order_field`` then ``id``, selected by cursor instead of OFFSET."""
+    return paginate_keyset(
+        qs, [order_field, 'id'], cursor, per_page or MAX_PER_PAGE, descending=sort_dir == 'desc', before=before,
+    )
+
+
+def _row_swaps(request, template, rows):
+    """Out-of-band swaps of ``rows`` in the list on the page.
+
+    Mutations answer with just the rows they touched (deleted rows are removed)
+    and ``HX-Reswap: none``, so the rest of the list keeps its sort, search and
+    page and nothing else is queried or rendered.
+    """
+    content = ''.join(render_to_string(template, {'item': row, 'oob': True}, request) for row in rows)
+    response = HttpResponse(content)
+    response['HX-Reswap'] = 'none'
+    return response
+
+
+def _bulk_action(request, hub_id, base, changes, search_fields, render_rows):
+    """Apply ``changes`` to the rows picked in a list's bulk bar.
+
+    A page selection (``ids``) is applied at once and answered with row swaps.
+    ``scope=all`` selects every row matching the list's search; it runs in
+    time-boxed steps, each answered with ``bulk_progress.html``, which posts the
+    next step until the selection is done and then fires ``bulk-complete`` so
+    the list reloads.
+    """
+    if changes is None:
+        return HttpResponse(status=400)
+    if request.POST.get('scope') != 'all':
+        ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
+        apply_bulk(base.filter(id__in=ids), changes, hub_id, time_budget=None)
+        return render_rows(ids)
+    search_query = request.POST.get('q', '').strip()
+    selection = search(base, search_query, search_fields)[0] if search_query else base
+    total = request.POST.get('total')
+    total = int(total) if total else selection.count()
+    step = apply_bulk(selection, changes, hub_id, after=request.POST.get('after') or None)
+    response = django_render(request, 'api_connect/partials/bulk_progress.html', {
+        'url': request.path, 'action': request.POST.get('action', ''), 'search_query': search_query,
+        'after': step.after, 'total': total, 'processed': int(request.POST.get('processed') or 0) + step.processed,
+        'done': step.done,
+    })
+    if step.done:
+        response['HX-Trigger'] = 'bulk-complete'
+    return response
 
 
 # ======================================================================
@@ -28,11 +93,7 @@ PER_PAGE_CHOICES = [12, 24, 48, 96, 0]
 @with_module_nav('api_connect', 'dashboard')
 @htmx_view('api_connect/pages/index.html', 'api_connect/partials/dashboard_content.html')
 def dashboard(request):
-    hub_id = request.session.get('hub_id')
-    return {
-        'total_api_keys': APIKey.objects.filter(hub_id=hub_id, is_deleted=False).count(),
-        'total_webhooks': Webhook.objects.filter(hub_id=hub_id, is_deleted=False).count(),
-    }
+    return dashboard_stats(request.session.get('hub_id'))
 
 
 # ======================================================================
@@ -46,26 +107,38 @@ API_KEY_SORT_FIELDS = {
     'key_hash': 'key_hash',
     'expires_at': 'expires_at',
     'last_used_at': 'last_used_at',
+    'requests_24h': 'requests_24h',
+    'errors_24h': 'errors_24h',
+    'avg_latency_ms': 'avg_latency_ms',
     'created_at': 'created_at',
 }
 
-def _build_api_keys_context(hub_id, per_page=10):
-    qs = APIKey.objects.filter(hub_id=hub_id, is_deleted=False).order_by('name')
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(1)
-    return {
-        'api_keys': page_obj,
-        'page_obj': page_obj,
-        'search_query': '',
-        'sort_field': 'name',
-        'sort_dir': 'asc',
-        'current_view': 'table',
-        'per_page': per_page,
-    }
+API_KEY_SEARCH_FIELDS = ['name', 'key_prefix']
+
+def _with_usage(qs):
+    """Annotate API keys with request/error counts and mean latency over ``USAGE_WINDOW``.
+
+    Correlated subqueries rather than a JOIN + GROUP BY, so the list can still
+    walk a sort index and only computes usage for the rows on the page.
+    """
+    usage = APIKeyUsage.objects.filter(
+        api_key=OuterRef('pk'), granularity='hour', period_start__gte=timezone.now() - USAGE_WINDOW,
+    ).order_by().values('api_key')
 
-def _render_api_keys_list(request, hub_id, per_page=10):
-    ctx = _build_api_keys_context(hub_id, per_page)
-    return django_render(request, 'api_connect/partials/api_keys_list.html', ctx)
+    def total(column):
+        return Subquery(usage.annotate(total=Sum(column)).values('total'))
+
+    return qs.annotate(
+        requests_24h=Coalesce(total('request_count'), 0),
+        errors_24h=Coalesce(total('error_count'), 0),
+        latency_24h=total('latency_total_ms'),
+    ).annotate(
+        avg_latency_ms=Cast(F('latency_24h'), FloatField()) / NullIf(F('requests_24h'), 0),
+    )
+
+def _render_api_key_rows(request, api_keys):
+    usage_recorder.apply_pending(api_keys)
+    return _row_swaps(request, 'api_connect/partials/api_key_row.html', api_keys)
 
 @login_required
 @with_module_nav('api_connect', 'keys')
@@ -75,20 +148,21 @@ def api_keys_list(request):
     search_query = request.GET.get('q', '').strip()
     sort_field = request.GET.get('sort', 'name')
     sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor')
+    before = request.GET.get('before')
     current_view = request.GET.get('view', 'table')
     per_page = int(request.GET.get('per_page', 12))
     if per_page not in PER_PAGE_CHOICES:
         per_page = 12
 
-    qs = APIKey.objects.filter(hub_id=hub_id, is_deleted=False)
+    qs = _with_usage(APIKey.objects.filter(hub_id=hub_id, is_deleted=False))
 
+    ranked = False
     if search_query:
-        qs = qs.filter(Q(name__icontains=search_query) | Q(key_prefix__icontains=search_query) | Q(key_hash__icontains=search_query))
+        qs, ranked = search(qs, search_query, API_KEY_SEARCH_FIELDS)
 
-    order_by = API_KEY_SORT_FIELDS.get(sort_field, 'name')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
+    order_field = API_KEY_SORT_FIELDS.get(sort_field, 'name')
+    order_by = f'-{order_field}' if sort_dir == 'desc' else order_field
     qs = qs.order_by(order_by)
 
     export_format = request.GET.get('export')
@@ -96,11 +170,15 @@ def api_keys_list(request):
         fields = ['name', 'is_active', 'key_prefix', 'key_hash', 'expires_at', 'last_used_at']
         headers = ['Name', 'Is Active', 'Key Prefix', 'Key Hash', 'Expires At', 'Last Used At']
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='api_keys.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='api_keys.xlsx')
+            return stream_csv(qs, fields, headers, filename='api_keys.csv')
+        return stream_excel(qs, fields, headers, filename='api_keys.xlsx', sheet_name='API Keys')
 
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
+    if ranked:
+        # Search results come most relevant first; column sorting applies to the unfiltered list.
+        page_obj = _keyset_page(qs, 'search_rank', 'desc', per_page, cursor, before)
+    else:
+        page_obj = _keyset_page(qs, order_field, sort_dir, per_page, cursor, before)
+    usage_recorder.apply_pending(page_obj)
 
     if request.htmx and request.htmx.target == 'datatable-body':
         return django_render(request, 'api_connect/partials/api_keys_list.html', {
@@ -121,11 +199,12 @@ def api_key_add(request):
     hub_id = request.session.get('hub_id')
     if request.method == 'POST':
         name = request.POST.get('name', '').strip()
-        key_prefix = request.POST.get('key_prefix', '').strip()
-        key_hash = request.POST.get('key_hash', '').strip()
+        raw_key, key_prefix, key_hash = generate_api_key()
         is_active = request.POST.get('is_active') == 'on'
         expires_at = request.POST.get('expires_at') or None
         last_used_at = request.POST.get('last_used_at') or None
+        rate_limit_per_second = int(request.POST.get('rate_limit_per_second', 0) or 0)
+        rate_limit_burst = int(request.POST.get('rate_limit_burst', 0) or 0)
         obj = APIKey(hub_id=hub_id)
         obj.name = name
         obj.key_prefix = key_prefix
@@ -133,10 +212,11 @@ def api_key_add(request):
         obj.is_active = is_active
         obj.expires_at = expires_at
         obj.last_used_at = last_used_at
+        obj.rate_limit_per_second = rate_limit_per_second
+        obj.rate_limit_burst = rate_limit_burst
         obj.save()
-        response = HttpResponse(status=204)
-        response['HX-Redirect'] = reverse('api_connect:api_keys_list')
-        return response
+        # Only the prefix and hash are stored: this response is the one chance to copy the key.
+        return {'obj': obj, 'raw_key': raw_key}
     return {}
 
 @login_required
@@ -146,13 +226,18 @@ def api_key_edit(request, pk):
     obj = get_object_or_404(APIKey, pk=pk, hub_id=hub_id, is_deleted=False)
     if request.method == 'POST':
         obj.name = request.POST.get('name', '').strip()
-        obj.key_prefix = request.POST.get('key_prefix', '').strip()
-        obj.key_hash = request.POST.get('key_hash', '').strip()
         obj.is_active = request.POST.get('is_active') == 'on'
         obj.expires_at = request.POST.get('expires_at') or None
         obj.last_used_at = request.POST.get('last_used_at') or None
+        obj.rate_limit_per_second = int(request.POST.get('rate_limit_per_second', obj.rate_limit_per_second) or 0)
+        obj.rate_limit_burst = int(request.POST.get('rate_limit_burst', obj.rate_limit_burst) or 0)
         obj.save()
-        return _render_api_keys_list(request, hub_id)
+        invalidate_api_keys([obj.pk])
+        response = _render_api_key_rows(request, _with_usage(APIKey.objects.filter(pk=obj.pk)))
+        if not (request.htmx and request.htmx.target == 'datatable-body'):
+            # Saved from the full-page form: there is no list row to swap.
+            response['HX-Redirect'] = reverse('api_connect:api_keys_list')
+        return response
     return {'obj': obj}
 
 @login_required
@@ -163,31 +248,33 @@ def api_key_delete(request, pk):
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
     obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
-    return _render_api_keys_list(request, hub_id)
+    invalidate_api_keys([obj.pk])
+    return _render_api_key_rows(request, [obj])
 
 @login_required
 @require_POST
 def api_key_toggle_status(request, pk):
     hub_id = request.session.get('hub_id')
-    obj = get_object_or_404(APIKey, pk=pk, hub_id=hub_id, is_deleted=False)
+    obj = get_object_or_404(_with_usage(APIKey.objects.all()), pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_active = not obj.is_active
     obj.save(update_fields=['is_active', 'updated_at'])
-    return _render_api_keys_list(request, hub_id)
+    invalidate_api_keys([obj.pk])
+    return _render_api_key_rows(request, [obj])
 
 @login_required
 @require_POST
 def api_keys_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
-    action = request.POST.get('action', '')
-    qs = APIKey.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
-    if action == 'activate':
-        qs.update(is_active=True)
-    elif action == 'deactivate':
-        qs.update(is_active=False)
-    elif action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
-    return _render_api_keys_list(request, hub_id)
+    changes = {
+        'activate': {'is_active': True},
+        'deactivate': {'is_active': False},
+        'delete': {'is_deleted': True, 'deleted_at': timezone.now()},
+    }.get(request.POST.get('action', ''))
+    return _bulk_action(
+        request, hub_id, APIKey.objects.filter(hub_id=hub_id, is_deleted=False), changes, API_KEY_SEARCH_FIELDS,
+        # all_objects: rows deleted by the action are answered with their removal.
+        lambda ids: _render_api_key_rows(request, _with_usage(APIKey.all_objects.filter(hub_id=hub_id, id__in=ids))),
+    )
 
 
 # ======================================================================
@@ -203,23 +290,10 @@ WEBHOOK_SORT_FIELDS = {
     'created_at': 'created_at',
 }
 
-def _build_webhooks_context(hub_id, per_page=10):
-    qs = Webhook.objects.filter(hub_id=hub_id, is_deleted=False).order_by('name')
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(1)
-    return {
-        'webhooks': page_obj,
-        'page_obj': page_obj,
-        'search_query': '',
-        'sort_field': 'name',
-        'sort_dir': 'asc',
-        'current_view': 'table',
-        'per_page': per_page,
-    }
+WEBHOOK_SEARCH_FIELDS = ['name', 'url']
 
-def _render_webhooks_list(request, hub_id, per_page=10):
-    ctx = _build_webhooks_context(hub_id, per_page)
-    return django_render(request, 'api_connect/partials/webhooks_list.html', ctx)
+def _render_webhook_rows(request, webhooks):
+    return _row_swaps(request, 'api_connect/partials/webhook_row.html', webhooks)
 
 @login_required
 @with_module_nav('api_connect', 'webhooks')
@@ -229,7 +303,8 @@ def webhooks_list(request):
     search_query = request.GET.get('q', '').strip()
     sort_field = request.GET.get('sort', 'name')
     sort_dir = request.GET.get('dir', 'asc')
-    page_number = request.GET.get('page', 1)
+    cursor = request.GET.get('cursor')
+    before = request.GET.get('before')
     current_view = request.GET.get('view', 'table')
     per_page = int(request.GET.get('per_page', 12))
     if per_page not in PER_PAGE_CHOICES:
@@ -237,12 +312,12 @@ def webhooks_list(request):
 
     qs = Webhook.objects.filter(hub_id=hub_id, is_deleted=False)
 
+    ranked = False
     if search_query:
-        qs = qs.filter(Q(name__icontains=search_query) | Q(secret__icontains=search_query))
+        qs, ranked = search(qs, search_query, WEBHOOK_SEARCH_FIELDS)
 
-    order_by = WEBHOOK_SORT_FIELDS.get(sort_field, 'name')
-    if sort_dir == 'desc':
-        order_by = f'-{order_by}'
+    order_field = WEBHOOK_SORT_FIELDS.get(sort_field, 'name')
+    order_by = f'-{order_field}' if sort_dir == 'desc' else order_field
     qs = qs.order_by(order_by)
 
     export_format = request.GET.get('export')
@@ -250,11 +325,14 @@ def webhooks_list(request):
         fields = ['name', 'is_active', 'failure_count', 'url', 'events', 'secret']
         headers = ['Name', 'Is Active', 'Failure Count', 'Url', 'Events', 'Secret']
         if export_format == 'csv':
-            return export_to_csv(qs, fields=fields, headers=headers, filename='webhooks.csv')
-        return export_to_excel(qs, fields=fields, headers=headers, filename='webhooks.xlsx')
+            return stream_csv(qs, fields, headers, filename='webhooks.csv')
+        return stream_excel(qs, fields, headers, filename='webhooks.xlsx', sheet_name='Webhooks')
 
-    paginator = Paginator(qs, per_page if per_page > 0 else max(qs.count(), 1))
-    page_obj = paginator.get_page(page_number)
+    if ranked:
+        # Search results come most relevant first; column sorting applies to the unfiltered list.
+        page_obj = _keyset_page(qs, 'search_rank', 'desc', per_page, cursor, before)
+    else:
+        page_obj = _keyset_page(qs, order_field, sort_dir, per_page, cursor, before)
 
     if request.htmx and request.htmx.target == 'datatable-body':
         return django_render(request, 'api_connect/partials/webhooks_list.html', {
@@ -281,6 +359,10 @@ def webhook_add(request):
         secret = request.POST.get('secret', '').strip()
         last_triggered_at = request.POST.get('last_triggered_at') or None
         failure_count = int(request.POST.get('failure_count', 0) or 0)
+        max_attempts = int(request.POST.get('max_attempts', 8) or 8)
+        batch_enabled = request.POST.get('batch_enabled') == 'on'
+        batch_max_size = int(request.POST.get('batch_max_size', 100) or 100)
+        batch_linger_seconds = int(request.POST.get('batch_linger_seconds', 5) or 0)
         obj = Webhook(hub_id=hub_id)
         obj.name = name
         obj.url = url
@@ -289,6 +371,10 @@ def webhook_add(request):
         obj.secret = secret
         obj.last_triggered_at = last_triggered_at
         obj.failure_count = failure_count
+        obj.max_attempts = max_attempts
+        obj.batch_enabled = batch_enabled
+        obj.batch_max_size = batch_max_size
+        obj.batch_linger_seconds = batch_linger_seconds
         obj.save()
         response = HttpResponse(status=204)
         response['HX-Redirect'] = reverse('api_connect:webhooks_list')
@@ -308,8 +394,17 @@ def webhook_edit(request, pk):
         obj.secret = request.POST.get('secret', '').strip()
         obj.last_triggered_at = request.POST.get('last_triggered_at') or None
         obj.failure_count = int(request.POST.get('failure_count', 0) or 0)
+        obj.max_attempts = int(request.POST.get('max_attempts', obj.max_attempts) or obj.max_attempts)
+        obj.batch_enabled = request.POST.get('batch_enabled') == 'on'
+        obj.batch_max_size = int(request.POST.get('batch_max_size', obj.batch_max_size) or obj.batch_max_size)
+        obj.batch_linger_seconds = int(request.POST.get('batch_linger_seconds', obj.batch_linger_seconds) or 0)
         obj.save()
-        return _render_webhooks_list(request, hub_id)
+        obj.refresh_from_db()
+        response = _render_webhook_rows(request, [obj])
+        if not (request.htmx and request.htmx.target == 'datatable-body'):
+            # Saved from the full-page form: there is no list row to swap.
+            response['HX-Redirect'] = reverse('api_connect:webhooks_list')
+        return response
     return {'obj': obj}
 
 @login_required
@@ -320,7 +415,7 @@ def webhook_delete(request, pk):
     obj.is_deleted = True
     obj.deleted_at = timezone.now()
     obj.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
-    return _render_webhooks_list(request, hub_id)
+    return _render_webhook_rows(request, [obj])
 
 @login_required
 @require_POST
@@ -328,23 +423,105 @@ def webhook_toggle_status(request, pk):
     hub_id = request.session.get('hub_id')
     obj = get_object_or_404(Webhook, pk=pk, hub_id=hub_id, is_deleted=False)
     obj.is_active = not obj.is_active
-    obj.save(update_fields=['is_active', 'updated_at'])
-    return _render_webhooks_list(request, hub_id)
+    update_fields = ['is_active', 'updated_at']
+    if obj.is_active:
+        # Re-enabling gives the endpoint a fresh circuit.
+        obj.circuit_state, obj.circuit_opened_at, obj.failure_count = 'closed', None, 0
+        update_fields += ['circuit_state', 'circuit_opened_at', 'failure_count']
+    obj.save(update_fields=update_fields)
+    return _render_webhook_rows(request, [obj])
 
 @login_required
 @require_POST
 def webhooks_bulk_action(request):
     hub_id = request.session.get('hub_id')
-    ids = [i.strip() for i in request.POST.get('ids', '').split(',') if i.strip()]
     action = request.POST.get('action', '')
-    qs = Webhook.objects.filter(hub_id=hub_id, is_deleted=False, id__in=ids)
+    base = Webhook.objects.filter(hub_id=hub_id, is_deleted=False)
     if action == 'activate':
-        qs.update(is_active=True)
-    elif action == 'deactivate':
-        qs.update(is_active=False)
-    elif action == 'delete':
-        qs.update(is_deleted=True, deleted_at=timezone.now())
-    return _render_webhooks_list(request, hub_id)
+        # Only re-enabled webhooks get a fresh circuit.
+        base = base.filter(is_active=False)
+    changes = {
+        'activate': {'is_active': True, 'circuit_state': 'closed', 'circuit_opened_at': None, 'failure_count': 0},
+        'deactivate': {'is_active': False},
+        'delete': {'is_deleted': True, 'deleted_at': timezone.now()},
+    }.get(action)
+    return _bulk_action(
+        request, hub_id, base, changes, WEBHOOK_SEARCH_FIELDS,
+        # all_objects: rows deleted by the action are answered with their removal.
+        lambda ids: _render_webhook_rows(request, Webhook.all_objects.filter(hub_id=hub_id, id__in=ids)),
+    )
+
+
+# ======================================================================
+# Delivery attempts log
+# ======================================================================
+
+DELIVERY_ATTEMPTS_PER_PAGE = 50
+
+def _delivery_attempts_context(hub_id, webhook, cursor=None):
+    qs = WebhookDeliveryAttempt.objects.filter(hub_id=hub_id, webhook=webhook)
+    page = paginate_keyset(qs, ['created_at', 'id'], cursor, DELIVERY_ATTEMPTS_PER_PAGE)
+    return {'webhook': webhook, 'attempts': page, 'page_obj': page, 'cursor': cursor or ''}
+
+@login_required
+@with_module_nav('api_connect', 'webhooks')
+@htmx_view('api_connect/pages/delivery_attempts.html', 'api_connect/partials/delivery_attempts_content.html')
+def delivery_attempts_list(request, pk):
+    hub_id = request.session.get('hub_id')
+    webhook = get_object_or_404(Webhook, pk=pk, hub_id=hub_id, is_deleted=False)
+    ctx = _delivery_attempts_context(hub_id, webhook, request.GET.get('cursor'))
+    if request.htmx and request.htmx.target == 'datatable-body':
+        return django_render(request, 'api_connect/partials/delivery_attempts_list.html', ctx)
+    return ctx
+
+
+# ======================================================================
+# Dead letters
+# ======================================================================
+
+def _dead_letters_queryset(hub_id, webhook_id=None):
+    qs = WebhookDeadLetter.objects.filter(hub_id=hub_id, is_deleted=False, replayed_at__isnull=True)
+    if webhook_id:
+        qs = qs.filter(webhook_id=webhook_id)
+    return qs
+
+def _render_dead_letters_list(request, hub_id, webhook_id=None, page_number=1):
+    qs = _dead_letters_queryset(hub_id, webhook_id).select_related('webhook', 'event').order_by('-created_at')
+    page_obj = Paginator(qs, 24).get_page(page_number)
+    return django_render(request, 'api_connect/partials/dead_letters_list.html', {
+        'dead_letters': page_obj, 'page_obj': page_obj, 'webhook_id': webhook_id or '',
+    })
+
+@login_required
+@with_module_nav('api_connect', 'webhooks')
+@htmx_view('api_connect/pages/dead_letters.html', 'api_connect/partials/dead_letters_content.html')
+def dead_letters_list(request):
+    hub_id = request.session.get('hub_id')
+    webhook_id = request.GET.get('webhook', '')
+    page_number = request.GET.get('page', 1)
+    if request.htmx and request.htmx.target == 'datatable-body':
+        return _render_dead_letters_list(request, hub_id, webhook_id, page_number)
+    qs = _dead_letters_queryset(hub_id, webhook_id).select_related('webhook', 'event').order_by('-created_at')
+    page_obj = Paginator(qs, 24).get_page(page_number)
+    return {'dead_letters': page_obj, 'page_obj': page_obj, 'webhook_id': webhook_id}
+
+@login_required
+@permission_required('api_connect.change_webhook')
+@require_POST
+def dead_letter_replay(request, pk):
+    hub_id = request.session.get('hub_id')
+    obj = get_object_or_404(WebhookDeadLetter, pk=pk, hub_id=hub_id, is_deleted=False, replayed_at__isnull=True)
+    replay_dead_letters([obj])
+    return _render_dead_letters_list(request, hub_id, request.POST.get('webhook'))
+
+@login_required
+@permission_required('api_connect.change_webhook')
+@require_POST
+def dead_letters_replay_all(request):
+    hub_id = request.session.get('hub_id')
+    webhook_id = request.POST.get('webhook')
+    replay_dead_letters(_dead_letters_queryset(hub_id, webhook_id).only('id', 'delivery_id'))
+    return _render_dead_letters_list(request, hub_id, webhook_id)
 
 
 @login_required
@@ -352,5 +529,21 @@ def webhooks_bulk_action(request):
 @with_module_nav('api_connect', 'settings')
 @htmx_view('api_connect/pages/settings.html', 'api_connect/partials/settings_content.html')
 def settings_view(request):
-    return {}
+    hub_id = request.session.get('hub_id')
+    obj = APIConnectSettings.get_settings(hub_id)
+    saved = False
+    if request.method == 'POST':
+        for field, minimum in (
+            ('connect_timeout', 1), ('read_timeout', 1), ('max_connections_per_host', 1),
+            ('delivery_log_retention_days', 1), ('delivery_max_in_flight', 0),
+        ):
+            try:
+                value = int(request.POST.get(field, ''))
+            except ValueError:
+                continue
+            if value >= minimum:
+                setattr(obj, field, value)
+        obj.save()
+        saved = True
+    return {'settings': obj, 'saved': saved}
 